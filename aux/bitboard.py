@@ -0,0 +1,281 @@
+"""
+Integer ids and bitboards for the board.
+There are only 54 vertices, 72 edges and 19 hexagons, so every set of
+positions fits in a python int (bit n is the position with id n).
+* Vertex and hexagon ids follow the (level, index) order.
+* Edge ids follow the order of its canonical (sorted) endpoints.
+"""
+from aux.topology import EDGES, HEXE_VERTICES, VERTEX_NEIGHBORS, make_edge
+
+
+VERTICES = tuple(sorted(VERTEX_NEIGHBORS))
+HEXES = tuple(sorted(HEXE_VERTICES))
+EDGE_LIST = tuple(sorted(EDGES))
+
+VERTEX_ID = {vertex: vid for vid, vertex in enumerate(VERTICES)}
+HEXE_ID = {hexe: hid for hid, hexe in enumerate(HEXES)}
+EDGE_ID = {edge: eid for eid, edge in enumerate(EDGE_LIST)}
+
+ALL_VERTICES = (1 << len(VERTICES)) - 1
+ALL_EDGES = (1 << len(EDGE_LIST)) - 1
+
+
+def iter_bits(mask):
+    """
+    A generator of the ids of the bits set in a mask (ascending order).
+    """
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+def vertex_id(level, index):
+    """
+    Return the id of the vertex (level, index) or None if it
+    does not exist.
+    """
+    return VERTEX_ID.get((level, index))
+
+
+def vertex_position(vid):
+    """
+    Return the (level, index) of the vertex with the given id.
+    """
+    return VERTICES[vid]
+
+
+def hexe_id(level, index):
+    """
+    Return the id of the hexagon (level, index) or None if it
+    does not exist.
+    """
+    return HEXE_ID.get((level, index))
+
+
+def hexe_position(hid):
+    """
+    Return the (level, index) of the hexagon with the given id.
+    """
+    return HEXES[hid]
+
+
+def edge_id(vertex_1, vertex_2):
+    """
+    Return the id of the edge between two vertex positions, in any
+    order, or None if they are not neighbors.
+    """
+    return EDGE_ID.get(make_edge(vertex_1, vertex_2))
+
+
+def edge_positions(eid):
+    """
+    Return the two (level, index) endpoints of the edge with the given id.
+    """
+    return EDGE_LIST[eid]
+
+
+def unique_roads(roads):
+    """
+    Return the roads of a list without the repeated edges (a road and
+    its reverse are the same edge), keeping the first one of each edge.
+    """
+    seen = set()
+    unique = []
+    for road in roads:
+        eid = edge_id(road[0], road[1])
+        if eid not in seen:
+            seen.add(eid)
+            unique.append(road)
+    return unique
+
+
+def vertices_mask(positions):
+    """
+    Return the mask of a list of vertex positions.
+    """
+    mask = 0
+    for position in positions:
+        mask |= 1 << VERTEX_ID[tuple(position)]
+    return mask
+
+
+def mask_to_vertices(mask):
+    """
+    Return the list of vertex positions [[level, index], ...]
+    of a mask, in the (level, index) order.
+    """
+    return [list(VERTICES[vid]) for vid in iter_bits(mask)]
+
+
+def generate_neighbor_masks():
+    return tuple(vertices_mask(VERTEX_NEIGHBORS[vertex])
+                 for vertex in VERTICES)
+
+
+def generate_vertex_edges_masks():
+    masks = [0] * len(VERTICES)
+    for eid, (vertex_1, vertex_2) in enumerate(EDGE_LIST):
+        masks[VERTEX_ID[vertex_1]] |= 1 << eid
+        masks[VERTEX_ID[vertex_2]] |= 1 << eid
+    return tuple(masks)
+
+
+def generate_edge_vertices_masks():
+    return tuple(vertices_mask(edge) for edge in EDGE_LIST)
+
+
+def generate_hexe_vertices_masks():
+    return tuple(vertices_mask(HEXE_VERTICES[hexe]) for hexe in HEXES)
+
+
+# NEIGHBOR_MASK[vid]: the vertices next to the vertex vid.
+NEIGHBOR_MASK = generate_neighbor_masks()
+# VERTEX_EDGES_MASK[vid]: the edges that touch the vertex vid.
+VERTEX_EDGES_MASK = generate_vertex_edges_masks()
+# EDGE_VERTICES_MASK[eid]: the two endpoints of the edge eid.
+EDGE_VERTICES_MASK = generate_edge_vertices_masks()
+# HEXE_VERTICES_MASK[hid]: the six vertices of the hexagon hid.
+HEXE_VERTICES_MASK = generate_hexe_vertices_masks()
+
+
+def neighbors_mask(mask):
+    """
+    Return the mask of all the vertices next to the vertices of a mask.
+    """
+    neighbors = 0
+    for vid in iter_bits(mask):
+        neighbors |= NEIGHBOR_MASK[vid]
+    return neighbors
+
+
+def edges_vertices_mask(edges):
+    """
+    Return the mask of the vertices touched by the edges of a mask.
+    """
+    vertices = 0
+    for eid in iter_bits(edges):
+        vertices |= EDGE_VERTICES_MASK[eid]
+    return vertices
+
+
+def vertices_edges_mask(vertices):
+    """
+    Return the mask of the edges that touch the vertices of a mask.
+    """
+    edges = 0
+    for vid in iter_bits(vertices):
+        edges |= VERTEX_EDGES_MASK[vid]
+    return edges
+
+
+def road_components(roads, blockers=0):
+    """
+    Return the connected parts of a mask of roads, as a list of masks.
+    Two roads are connected by their common vertex, unless it's one of
+    the blockers (a building of other player cuts the road there).
+    """
+    components = []
+    while roads:
+        component = roads & -roads
+        frontier = component
+        while frontier:
+            vertices = edges_vertices_mask(frontier) & ~blockers
+            frontier = vertices_edges_mask(vertices) & roads & ~component
+            component |= frontier
+        roads &= ~component
+        components.append(component)
+    return components
+
+
+def trail_from(vid, roads, blockers):
+    """
+    Return the length of the longest trail (a path that doesn't repeat
+    roads) that starts in the vertex vid with the roads of a mask. A
+    trail ends in a blocker, it can't go through it.
+    """
+    best = 0
+    for eid in iter_bits(VERTEX_EDGES_MASK[vid] & roads):
+        other = (EDGE_VERTICES_MASK[eid] & ~(1 << vid)).bit_length() - 1
+        length = 1
+        if not blockers & (1 << other):
+            length += trail_from(other, roads & ~(1 << eid), blockers)
+        if length > best:
+            best = length
+    return best
+
+
+def longest_trail(roads, blockers=0):
+    """
+    Return the length of the longest trail of a connected mask of roads
+    (see road_components). A longest trail can always start in a vertex
+    that is a blocker or that hasn't two roads, so only a cycle is
+    searched from any other vertex.
+    """
+    vertices = edges_vertices_mask(roads)
+    starts = vertices & blockers
+    for vid in iter_bits(vertices):
+        if bin(VERTEX_EDGES_MASK[vid] & roads).count('1') != 2:
+            starts |= 1 << vid
+    if not starts:
+        starts = vertices & -vertices
+    return max((trail_from(vid, roads, blockers) for vid in iter_bits(starts)),
+               default=0)
+
+
+class RoadLengths(object):
+    """
+    The longest road of the roads of the players, computed by connected
+    parts: the length of a part is kept by its roads and the blockers on
+    it, so only the parts with a new road or a new blocker (a building of
+    other player) are searched again.
+    """
+    __slots__ = ('lengths',)
+
+    def __init__(self):
+        self.lengths = {}
+
+    def get(self, roads, blockers=0):
+        """
+        Return the length of the longest road of a mask of roads.
+        Args:
+        roads: the roads of a player.
+        blockers: the buildings of the other players.
+        """
+        best = 0
+        for component in road_components(roads, blockers):
+            key = (component, blockers & edges_vertices_mask(component))
+            length = self.lengths.get(key)
+            if length is None:
+                length = longest_trail(*key)
+                self.lengths[key] = length
+            best = max(best, length)
+        return best
+
+
+class BlockedVertices(object):
+    """
+    The vertices where nobody can build: the buildings and their
+    neighbors (distance rule). The buildings never leave the board, so
+    only the ones built since the last call are added; if one was
+    removed, the vertices are computed again. The buildings and their
+    blocked vertices are replaced together, as one tuple.
+    """
+    __slots__ = ('known',)
+
+    def __init__(self, known=(0, 0)):
+        self.known = known
+
+    def get(self, buildings):
+        """
+        Return the mask of the vertices blocked by a mask of buildings.
+        """
+        known, blocked = self.known
+        if known & ~buildings:
+            known, blocked = 0, 0
+        new = buildings & ~known
+        blocked |= new
+        for vid in iter_bits(new):
+            blocked |= NEIGHBOR_MASK[vid]
+        self.known = (buildings, blocked)
+        return blocked
@@ -1,27 +1,24 @@
-from catan.models import *
-import json
-import os
+from aux.topology import HEXE_VERTICES, VERTEX_NEIGHBORS
 
 
-MYDIR = os.path.dirname(__file__)
+def to_list_positions(positions):
+    """
+    A method to get the old list shape [[level, index], ...] of a
+    tuple of positions. A new list is returned in each call, so the
+    callers can modify it without changing the index.
+    """
+    return [[position[0], position[1]] for position in positions]
 
 
+# get the vertices of a given hexagon
 def HexagonInfo(level, index):
-    with open(os.path.join(MYDIR, 'hexe_neighbors.json')) as file:
-        data = json.load(file)
-
-        for aux in data['data']:
-            hexagon = aux['hexagono']
-            if level == hexagon[0] and index == hexagon[1]:
-                return aux['vecinos']
+    vertices = HEXE_VERTICES.get((level, index))
+    if vertices is not None:
+        return to_list_positions(vertices)
 
 
 # get the neighbors of a given vertex
 def VertexInfo(level, index):
-    with open(os.path.join(MYDIR, 'vertex_neighbors.json')) as file:
-        data = json.load(file)
-
-        for aux in data["data"]:
-            vertex = aux['vertice']
-            if level == vertex[0] and index == vertex[1]:
-                return aux['vecinos']
+    neighbors = VERTEX_NEIGHBORS.get((level, index))
+    if neighbors is not None:
+        return to_list_positions(neighbors)
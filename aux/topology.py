@@ -0,0 +1,107 @@
+"""
+Board topology index.
+The neighbors files are loaded only one time (at import) and indexed
+in immutable dicts and tuples, so every lookup is O(1) and there is no
+file access while a request is served.
+* A position (vertex or hexagon) is a tuple (level, index).
+* An edge is a sorted tuple of two vertex positions.
+"""
+import json
+import os
+
+
+MYDIR = os.path.dirname(__file__)
+
+
+def load_data(file_name, key):
+    """
+    A method to load the list of positions and its neighbors from a
+    json file. If a position is repeated only the first one is kept
+    (the same one that the old linear scan found).
+    Args:
+    file_name: the name of the json file in this directory.
+    key: the key of the position in each item of the file.
+    """
+    with open(os.path.join(MYDIR, file_name)) as file:
+        data = json.load(file)
+    positions = {}
+    for item in data['data']:
+        position = tuple(item[key])
+        if position not in positions:
+            positions[position] = tuple(tuple(neighbor)
+                                        for neighbor in item['vecinos'])
+    return positions
+
+
+def generate_vertex_hexes(hexe_vertices):
+    """
+    A method to invert the hexagon -> vertices index.
+    Args:
+    hexe_vertices: a dict with the vertices of each hexagon.
+    """
+    vertex_hexes = {}
+    for hexe, vertices in hexe_vertices.items():
+        for vertex in vertices:
+            vertex_hexes.setdefault(vertex, []).append(hexe)
+    return {vertex: tuple(hexes) for vertex, hexes in vertex_hexes.items()}
+
+
+def generate_edges(vertex_neighbors):
+    """
+    A method to get all the edges of the board (without repetitions).
+    Args:
+    vertex_neighbors: a dict with the neighbors of each vertex.
+    """
+    edges = set()
+    for vertex, neighbors in vertex_neighbors.items():
+        for neighbor in neighbors:
+            edges.add(make_edge(vertex, neighbor))
+    return frozenset(edges)
+
+
+def make_edge(vertex_1, vertex_2):
+    """
+    Return the canonical form of the edge between two vertex.
+    """
+    vertex_1 = tuple(vertex_1)
+    vertex_2 = tuple(vertex_2)
+    if vertex_2 < vertex_1:
+        return (vertex_2, vertex_1)
+    return (vertex_1, vertex_2)
+
+
+VERTEX_NEIGHBORS = load_data('vertex_neighbors.json', 'vertice')
+HEXE_VERTICES = load_data('hexe_neighbors.json', 'hexagono')
+VERTEX_HEXES = generate_vertex_hexes(HEXE_VERTICES)
+EDGES = generate_edges(VERTEX_NEIGHBORS)
+
+
+def vertex_neighbors(level, index):
+    """
+    Return a tuple with the neighbors vertex of a given vertex,
+    or an empty tuple if the vertex does not exist.
+    """
+    return VERTEX_NEIGHBORS.get((level, index), ())
+
+
+def hexe_vertices(level, index):
+    """
+    Return a tuple with the vertices of a given hexagon,
+    or an empty tuple if the hexagon does not exist.
+    """
+    return HEXE_VERTICES.get((level, index), ())
+
+
+def vertex_hexes(level, index):
+    """
+    Return a tuple with the hexagons that touch a given vertex,
+    or an empty tuple if the vertex does not exist.
+    """
+    return VERTEX_HEXES.get((level, index), ())
+
+
+def is_edge(vertex_1, vertex_2):
+    """
+    Return True if the two vertex are neighbors on the board.
+    """
+    return make_edge(vertex_1, vertex_2) in EDGES
@@ -0,0 +1,24 @@
+"""
+ASGI config for backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+The long polling and the events stream of the games are served here
+(without a sync worker) and the other requests go to the Django application.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+django_application = get_asgi_application()
+
+# The models can be imported only after the setup of Django
+from catan.views.wait_views import WaitGameChange  # noqa: E402
+from catan.views.events_views import GameEventStream  # noqa: E402
+
+application = WaitGameChange(GameEventStream(django_application))
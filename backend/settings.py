@@ -66,6 +66,9 @@ CORS_ORIGIN_WHITELIST = (
     'http://localhost:3000',
 )
 
+# The url of the next page of the lists
+CORS_EXPOSE_HEADERS = ['Link']
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -172,6 +175,34 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Long polling of the games (seconds). The waits are woken by the changes
+# of the games, and the version is checked again every LONG_POLL_RECHECK
+LONG_POLL_TIMEOUT = 25
+LONG_POLL_RECHECK = 5
+# Time between the keepalive comments of the events stream (seconds)
+EVENTS_KEEPALIVE = 15
+# Time to open the events stream with a stream token (seconds)
+EVENTS_TOKEN_MAX_AGE = 30
+# Actions of a game between the snapshots of its action log
+ACTION_LOG_SNAPSHOT_EVERY = 50
+# Play the games in the memory of the worker and write them at the end
+# of each turn, or after the actions or the seconds below, in one
+# transaction. It needs only one worker (WEB_CONCURRENCY=1), as the games
+# in memory are only seen by their worker
+WRITE_BEHIND = False
+WRITE_BEHIND_FLUSH_ACTIONS = 20
+WRITE_BEHIND_FLUSH_SECONDS = 5
+# The games without actions in these seconds are flushed and removed
+# from memory, by a timer that runs every WRITE_BEHIND_TICK_SECONDS
+WRITE_BEHIND_IDLE_SECONDS = 300
+WRITE_BEHIND_TICK_SECONDS = 1
+# Items of the pages of the lists of rooms and games (see
+# catan/views/pagination.py)
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 500
+# Serialized boards kept in the memory of each worker
+BOARD_CACHE_SIZE = 100
+
 # Activate Django-Heroku.
 django_heroku.settings(locals())
 
@@ -4,10 +4,12 @@ from catan.models import *
 admin.site.register(Room)
 admin.site.register(Card)
 admin.site.register(Player)
-admin.site.register(Resource)
+admin.site.register(Hand)
 admin.site.register(Hexe)
 admin.site.register(Game)
 admin.site.register(Current_Turn)
 admin.site.register(Board)
 admin.site.register(Building)
 admin.site.register(Road)
+admin.site.register(GameAction)
+admin.site.register(StateSnapshot)
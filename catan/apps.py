@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class CatanConfig(AppConfig):
     name = 'catan'
+
+    def ready(self):
+        from django.conf import settings
+        from catan.engine.write_behind import (check_single_worker,
+                                               start_flush_timer)
+        check_single_worker()
+        if settings.WRITE_BEHIND:
+            start_flush_timer()
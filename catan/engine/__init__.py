@@ -0,0 +1,14 @@
+"""
+The game engine: the whole state of a started game in memory and the
+rules as functions of it, without the ORM (see
+:mod: `catan.engine.persistence` to load and save a game).
+"""
+from catan.engine.state import (RuleError, GameState, PlayerState,
+                                TurnState, HexeState)
+from catan.engine.rules import (throw_dices, change_turn, end_turn,
+                                build_settlement, upgrade_city, build_road,
+                                play_road_building_card, buy_card,
+                                bank_trade, move_robber, play_monopoly_card,
+                                play_year_of_plenty)
+from catan.engine.actions import (legal_actions, apply_action, has_won,
+                                  action_events)
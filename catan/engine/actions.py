@@ -0,0 +1,270 @@
+"""
+The actions of the player in turn over a :class: `GameState`: the list
+of legal actions (the same data that the actions endpoint sends to the
+client) and the dispatch of an action to its rule.
+"""
+import random
+from aux.topology import VERTEX_NEIGHBORS
+from aux.bitboard import (HEXES, VERTICES, ALL_VERTICES, edge_id,
+                          edges_vertices_mask, mask_to_vertices,
+                          vertex_position, iter_bits, unique_roads)
+from catan.engine.state import RuleError
+from catan.engine import rules
+
+
+def to_json_positions(positions):
+    return [{'level': position[0], 'index': position[1]}
+            for position in positions]
+
+
+def initial_settlements(state):
+    """
+    The vertices without buildings and without buildings in their
+    neighbors.
+    """
+    return mask_to_vertices(ALL_VERTICES & ~state.blocked)
+
+
+def initial_roads(player):
+    """
+    The roads from the last building of the player.
+    """
+    vertex = list(vertex_position(player.buildings[-1]))
+    return [[vertex, list(neighbor)]
+            for neighbor in VERTEX_NEIGHBORS[tuple(vertex)]]
+
+
+def get_potencial_roads(state, available_vertex):
+    """
+    The roads without owner from each vertex of a list.
+    """
+    roads = state.roads
+    potencial_roads = []
+    for vertex in available_vertex:
+        vertex = list(vertex)
+        for neighbor in VERTEX_NEIGHBORS[tuple(vertex)]:
+            if not roads & (1 << edge_id(vertex, neighbor)):
+                potencial_roads.append([vertex, list(neighbor)])
+    return potencial_roads
+
+
+def posible_roads(state, player):
+    """
+    The roads without owner from the roads and the buildings of the
+    player.
+    """
+    vertices = edges_vertices_mask(player.roads) | player.settlements | \
+        player.cities
+    available_vertex = [VERTICES[vid] for vid in iter_bits(vertices)]
+    return get_potencial_roads(state, available_vertex)
+
+
+def posibles_roads_card_road_building(state, player):
+    """
+    The roads that can be built with a road building card: the posible
+    roads and the roads that continue them.
+    """
+    potencial_roads = posible_roads(state, player)
+    new_positions = [road[1] for road in potencial_roads]
+    total_roads = potencial_roads + get_potencial_roads(state,
+                                                        new_positions)
+    # Remove the repeated roads
+    return unique_roads(total_roads)
+
+
+def posible_settlements(state, player):
+    """
+    The vertices of the roads of the player where he can build.
+    """
+    return mask_to_vertices(edges_vertices_mask(player.roads) &
+                            ~state.blocked)
+
+
+def posible_robber_positions(state, player):
+    """
+    The hexagons where the robber can be moved and, for each one, the
+    players that can be stolen.
+    """
+    owners = state.get_hexe_owners()
+    data = []
+    for hexe in HEXES:
+        if hexe == state.robber:
+            continue
+        players = [username for username in owners.get(hexe, ())
+                   if username != player.username]
+        data.append({'position': {'level': hexe[0], 'index': hexe[1]},
+                     'players': players})
+    return data
+
+
+def roads_item(action, roads):
+    return {'type': action,
+            'payload': [to_json_positions(road) for road in roads]}
+
+
+def legal_actions(state, player):
+    """
+    A method to get the list of actions that a player can do in a game,
+    with the positions where each one can be done.
+    """
+    data = []
+    if player is None or not state.is_in_turn(player):
+        return data
+    turn = state.turn
+    if turn.game_stage != 'FULL_PLAY':
+        if turn.last_action == 'NON_BLOCKING_ACTION':
+            data.append({'type': 'build_settlement',
+                         'payload': to_json_positions(
+                             initial_settlements(state))})
+        if turn.last_action == 'BUILD_SETTLEMENT':
+            data.append(roads_item('build_road', initial_roads(player)))
+        if turn.last_action == 'BUILD_ROAD':
+            data.append({'type': 'end_turn'})
+        return data
+    if sum(turn.dices) == 7 and not turn.robber_moved:
+        return [{'type': 'move_robber',
+                 'payload': posible_robber_positions(state, player)}]
+    data.append({'type': 'end_turn'})
+    if rules.has_necessary_resources(player, 'build_road'):
+        item = roads_item('build_road', posible_roads(state, player))
+        if len(item['payload']) != 0:
+            data.append(item)
+    if rules.can_trade_bank(player):
+        data.append({'type': 'bank_trade'})
+    if rules.has_necessary_resources(player, 'buy_card') and \
+            rules.has_cards_left(state):
+        data.append({'type': 'buy_card'})
+    if rules.has_necessary_resources(player, 'build_settlement'):
+        payload = to_json_positions(posible_settlements(state, player))
+        if len(payload) != 0:
+            data.append({'type': 'build_settlement', 'payload': payload})
+    if rules.has_necessary_resources(player, 'upgrade_city'):
+        payload = to_json_positions(player.settlement_positions())
+        if len(payload) != 0:
+            data.append({'type': 'upgrade_city', 'payload': payload})
+    if player.has_card('knight'):
+        data.append({'type': 'play_knight_card',
+                     'payload': posible_robber_positions(state, player)})
+    if player.has_card('monopoly'):
+        data.append({'type': 'play_monopoly_card'})
+    if player.has_card('year_of_plenty'):
+        data.append({'type': 'play_year_of_plenty_card'})
+    if player.has_card('road_building'):
+        item = roads_item('play_road_building_card',
+                          posibles_roads_card_road_building(state, player))
+        if len(item['payload']) != 0:
+            data.append(item)
+    return data
+
+
+def to_vertex(position):
+    return (position['level'], position['index'])
+
+
+def apply_action(state, player, data, rng=random, outcomes=None):
+    """
+    A method to do an action of the player in turn, with the same data
+    that the actions endpoint receives. Return the result of the rule
+    (see :mod: `catan.engine.rules`).
+    Args:
+    @data: the type and the payload of the action.
+    @rng: the random generator of the dices, the discards and the
+          stolen resources.
+    @outcomes: optional, a dict where the random results are saved
+               or, if they are there, where they are taken from.
+    """
+    if not state.is_in_turn(player):
+        raise RuleError("Not in turn")
+    action = data['type']
+    payload = data.get('payload')
+    if action == 'end_turn':
+        return rules.end_turn(state, rng, outcomes)
+    if action == 'build_settlement':
+        return rules.build_settlement(state, player, payload['level'],
+                                      payload['index'])
+    if action == 'upgrade_city':
+        return rules.upgrade_city(state, player, payload['level'],
+                                  payload['index'])
+    if action == 'build_road':
+        return rules.build_road(state, player, to_vertex(payload[0]),
+                                to_vertex(payload[1]))
+    if action == 'buy_card':
+        return rules.buy_card(state, player, outcomes)
+    if action == 'bank_trade':
+        return rules.bank_trade(state, player, payload['give'],
+                                payload['receive'])
+    if action in ('move_robber', 'play_knight_card'):
+        position = payload['position']
+        return rules.move_robber(state, player, position['level'],
+                                 position['index'], payload['player'],
+                                 knight=(action == 'play_knight_card'),
+                                 rng=rng, outcomes=outcomes)
+    if action == 'play_road_building_card':
+        roads = [[to_vertex(road[0]), to_vertex(road[1])]
+                 for road in payload]
+        return rules.play_road_building_card(state, player, roads[0],
+                                             roads[1])
+    if action == 'play_monopoly_card':
+        return rules.play_monopoly_card(state, player, payload)
+    if action == 'play_year_of_plenty_card':
+        return rules.play_year_of_plenty(state, player, payload)
+    raise RuleError('Please select a valid action')
+
+
+def has_won(state, player, data, result):
+    """
+    A method to check if the player won with an action done with
+    apply_action: the rules that can give points return True, and a
+    knight card (that returns the stolen player) can give the largest
+    army.
+    Args:
+    @data: the type and the payload of the action.
+    @result: the result of the rule.
+    """
+    if data['type'] == 'play_knight_card':
+        return state.winner_id == player.user_id
+    return result is True
+
+
+def action_events(state, player, data, stage, result):
+    """
+    A method to get the events of an action done with apply_action, as
+    (event_type, data) (see :mod: `catan.events`).
+    Args:
+    @stage: the game stage before the action.
+    @result: the result of the rule (see apply_action).
+    """
+    action = data['type']
+    payload = data.get('payload')
+    username = player.username
+    events = []
+    if action == 'end_turn':
+        events.append(('turn_changed',
+                       {'user': state.player_in_turn().username}))
+        if stage == 'FULL_PLAY':
+            events.append(('dice_rolled', {'dices': list(state.turn.dices)}))
+            resources = {}
+            for (owner, name), amount in result.items():
+                owner = state.get_player(owner).username
+                resources.setdefault(owner, {})[name] = amount
+            if resources:
+                events.append(('resources_gained',
+                               {'resources': resources}))
+    elif action in ('build_settlement', 'upgrade_city'):
+        building = 'settlement' if action == 'build_settlement' else 'city'
+        events.append(('build', {'player': username, 'building': building,
+                                 'position': {'level': payload['level'],
+                                              'index': payload['index']}}))
+    elif action in ('build_road', 'play_road_building_card'):
+        roads = [payload] if action == 'build_road' else payload
+        for road in roads:
+            events.append(('build', {'player': username,
+                                     'building': 'road', 'position': road}))
+    elif action in ('move_robber', 'play_knight_card'):
+        events.append(('robber_moved', {
+            'player': username, 'position': payload['position'],
+            'stolen_player': result,
+            'knight': action == 'play_knight_card'}))
+    if has_won(state, player, data, result):
+        events.append(('winner', {'player': username}))
+    return events
@@ -0,0 +1,109 @@
+"""
+The action log of the games: the state of a game as a json compatible
+dict (the snapshots) and the replay of the logged actions over it.
+Each entry of the log is the user in turn, the data of the action and
+its random outcomes (the dices, the bought card, the stolen and the
+discarded resources), so the replay doesn't draw anything.
+"""
+from catan.engine.state import GameState, PlayerState, TurnState
+from catan.engine.rules import DECK_SIZE
+from catan.engine.actions import apply_action
+
+
+class SnapshotError(ValueError):
+    """
+    A snapshot that isn't a state saved with dump_state.
+    """
+
+
+def dump_state(state):
+    """
+    A method to get the state of a game (without its board, that never
+    changes) as a dict that can be saved as json.
+    """
+    turn = state.turn
+    return {
+        'robber': list(state.robber),
+        'winner': state.winner_id,
+        'longest_road': state.longest_road_id,
+        'largest_army': state.largest_army_id,
+        'deck': state.deck,
+        'deck_top': state.deck_top,
+        'turn': {'user': turn.user_id, 'game_stage': turn.game_stage,
+                 'last_action': turn.last_action,
+                 'dices': list(turn.dices),
+                 'robber_moved': turn.robber_moved},
+        'players': [{'id': player.id, 'user': player.user_id,
+                     'username': player.username, 'turn': player.turn,
+                     'colour': player.colour,
+                     'victory_points': player.victory_points,
+                     'knights': player.knights,
+                     'hand': player.hand,
+                     'last_gained': player.last_gained,
+                     'cards': player.cards,
+                     'buildings': player.buildings,
+                     'cities': player.cities,
+                     'roads': player.roads}
+                    for player in state.players]
+    }
+
+
+def load_state(data, game_id, board_id, hexes, version=0):
+    """
+    A method to get a GameState from a dict of dump_state.
+    Raise SnapshotError if the dict is not a saved state.
+    Args:
+    data: the dict of the state.
+    hexes: the hexes of the board of the game (see GameState).
+    """
+    try:
+        players = [load_player(item) for item in data['players']]
+        turn = data['turn']
+        turn = TurnState(turn['user'], turn['game_stage'],
+                         turn['last_action'], turn['dices'],
+                         turn['robber_moved'])
+        deck, deck_top = data['deck'], data['deck_top']
+        state = GameState(game_id, board_id, hexes, data['robber'], players,
+                          turn, data['winner'], version,
+                          data['longest_road'], data['largest_army'],
+                          deck, deck_top)
+    except (KeyError, TypeError, ValueError) as e:
+        raise SnapshotError(
+            'The snapshot of the game %s is malformed: %r' % (game_id, e))
+    if not (isinstance(deck, str) and len(deck) == DECK_SIZE and
+            isinstance(deck_top, int) and 0 <= deck_top <= DECK_SIZE):
+        raise SnapshotError(
+            'The snapshot of the game %s has a malformed deck' % game_id)
+    return state
+
+
+def load_player(item):
+    """
+    A method to get a PlayerState from its dict in dump_state.
+    """
+    player = PlayerState(item['id'], item['user'], item['username'],
+                         item['turn'], item['colour'],
+                         item['victory_points'], item['knights'])
+    player.hand = dict(item['hand'])
+    player.last_gained = dict(item['last_gained'])
+    player.cards = list(item['cards'])
+    for vid in item['buildings']:
+        name = 'city' if item['cities'] & (1 << vid) else 'settlement'
+        player.add_building(vid, name)
+    player.roads = item['roads']
+    return player
+
+
+def replay(state, entries):
+    """
+    A method to do again the logged actions of a game over its state.
+    Return the number of actions replayed.
+    Args:
+    entries: an iterable of (user_id, data, outcomes).
+    """
+    count = 0
+    for user_id, data, outcomes in entries:
+        apply_action(state, state.get_player_by_user(user_id), data,
+                     outcomes=outcomes)
+        count += 1
+    return count
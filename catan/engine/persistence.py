@@ -0,0 +1,355 @@
+"""
+The adapter between the database and the :class: `GameState`.
+A game is loaded with one query per table and it's saved with at most
+one query per kind of change, no matter how many pieces the game has.
+The accepted actions are appended to the action log of the game, with
+a snapshot of its state every ACTION_LOG_SNAPSHOT_EVERY actions.
+"""
+import json
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Max
+from aux.bitboard import VERTICES, vertex_id, edge_positions, iter_bits
+from catan.models import (Game, Hexe, Player, Building, Road, Hand, Card,
+                          Current_Turn, GameAction, StateSnapshot)
+from catan.engine.state import GameState, PlayerState, TurnState, HexeState
+from catan.engine.log import dump_state, load_state, replay
+
+
+def load_hexes(board_id):
+    """
+    A method to get the hexes of a board by (level, index).
+    """
+    hexes = {}
+    for id, level, index, terrain, token in Hexe.objects.filter(
+            board=board_id).values_list('id', 'level', 'index',
+                                        'terrain', 'token'):
+        hexes[(level, index)] = HexeState(id, terrain, token)
+    return hexes
+
+
+def load_game(game_id):
+    """
+    A method to load the whole state of a game with 7 queries (an
+    archived game is rebuilt from its action log).
+    Raise Game.DoesNotExist if the game doesn't exist.
+    Args:
+    game_id: the id of the game.
+    """
+    game = Game.objects.select_related('robber', 'current_turn').get(
+                id=game_id)
+    if game.archived:
+        return rebuild_state(game)
+    hexes = load_hexes(game.board_id)
+    players = {}
+    for id, user_id, username, turn, colour, points, knights in \
+            Player.objects.filter(game=game_id).values_list(
+                'id', 'username', 'username__username', 'turn', 'colour',
+                'victory_points', 'knights'):
+        players[id] = PlayerState(id, user_id, username, turn, colour,
+                                  points, knights)
+    buildings = Building.objects.filter(game=game_id).order_by(
+                    'id').values_list('owner', 'name', 'level', 'index')
+    for owner, name, level, index in buildings:
+        players[owner].add_building(vertex_id(level, index), name)
+    roads = Road.objects.filter(game=game_id).values_list('owner', 'edge')
+    for owner, edge in roads:
+        players[owner].roads |= 1 << edge
+    hands = Hand.objects.filter(owner__game=game_id).values_list(
+                'owner', 'name', 'amount', 'last_gained')
+    for owner, name, amount, last_gained in hands:
+        players[owner].hand[name] = amount
+        players[owner].last_gained[name] = last_gained
+    cards = Card.objects.filter(owner__game=game_id).order_by(
+                'id').values_list('owner', 'name')
+    for owner, name in cards:
+        players[owner].cards.append(name)
+    return make_state(game, hexes, players.values())
+
+
+def make_state(game, hexes, players):
+    """
+    A method to get the state of a game from the rows already read.
+    Args:
+    game: the game, with its robber and current turn.
+    hexes: the hexes of its board (see load_hexes).
+    players: the PlayerState of each player, with all its pieces.
+    """
+    try:
+        current_turn = game.current_turn
+        turn = TurnState(current_turn.user_id, current_turn.game_stage,
+                         current_turn.last_action, current_turn.get_dices(),
+                         current_turn.robber_moved)
+    except Current_Turn.DoesNotExist:
+        turn = None
+    state = GameState(game.id, game.board_id, hexes,
+                      (game.robber.level, game.robber.index),
+                      list(players), turn, game.winner_id,
+                      game.version, game.longest_road_id,
+                      game.largest_army_id, game.deck, game.deck_top)
+    state.origin = state.copy()
+    return state
+
+
+def save_game(state):
+    """
+    A method to write the changes of a game since it was loaded (or
+    saved) in one transaction. The version of the game is not changed.
+    Args:
+    state: a GameState loaded with load_game.
+    """
+    origin = state.origin
+    with transaction.atomic():
+        save_game_row(state, origin)
+        save_turn(state, origin)
+        players = [(player, origin.get_player(player.id))
+                   for player in state.players]
+        save_points(players)
+        save_buildings(state, players)
+        save_roads(state, players)
+        save_hands(state, players)
+        save_cards(state, players)
+    state.origin = state.copy()
+
+
+def save_game_row(state, origin):
+    if (state.robber, state.winner_id, state.longest_road_id,
+            state.largest_army_id, state.deck_top) != \
+            (origin.robber, origin.winner_id, origin.longest_road_id,
+             origin.largest_army_id, origin.deck_top):
+        Game.objects.filter(id=state.id).update(
+            robber=state.hexes[state.robber].id, winner=state.winner_id,
+            longest_road=state.longest_road_id,
+            largest_army=state.largest_army_id, deck_top=state.deck_top)
+
+
+def save_turn(state, origin):
+    turn = state.turn
+    old = origin.turn
+    if turn is None:
+        return
+    if (turn.user_id, turn.game_stage, turn.last_action, turn.dices,
+            turn.robber_moved) != (old.user_id, old.game_stage,
+                                   old.last_action, old.dices,
+                                   old.robber_moved):
+        Current_Turn.objects.filter(game=state.id).update(
+            user=turn.user_id, game_stage=turn.game_stage,
+            last_action=turn.last_action, dices1=turn.dices[0],
+            dices2=turn.dices[1], robber_moved=turn.robber_moved)
+
+
+def save_points(players):
+    changed = [Player(id=player.id, victory_points=player.victory_points,
+                      knights=player.knights)
+               for player, old in players
+               if (player.victory_points, player.knights) !=
+               (old.victory_points, old.knights)]
+    if len(changed) != 0:
+        Player.objects.bulk_update(changed, ['victory_points', 'knights'])
+
+
+def save_buildings(state, players):
+    new_buildings = []
+    upgrades = Q()
+    for player, old in players:
+        old_buildings = old.settlements | old.cities
+        for vid in player.buildings:
+            if not old_buildings & (1 << vid):
+                name = 'city' if player.cities & (1 << vid) else \
+                    'settlement'
+                level, index = VERTICES[vid]
+                new_buildings.append(Building(game_id=state.id,
+                                              owner_id=player.id, name=name,
+                                              level=level, index=index))
+        for vid in iter_bits(player.cities & old.settlements):
+            level, index = VERTICES[vid]
+            upgrades |= Q(level=level, index=index)
+    if len(new_buildings) != 0:
+        Building.objects.bulk_create(new_buildings)
+    if upgrades:
+        Building.objects.filter(upgrades, game=state.id).update(name='city')
+
+
+def save_roads(state, players):
+    new_roads = []
+    removed = []
+    for player, old in players:
+        for eid in iter_bits(player.roads & ~old.roads):
+            (level_1, index_1), (level_2, index_2) = edge_positions(eid)
+            new_roads.append(Road(game_id=state.id, owner_id=player.id,
+                                  level_1=level_1, index_1=index_1,
+                                  level_2=level_2, index_2=index_2,
+                                  edge=eid))
+        removed.extend(iter_bits(old.roads & ~player.roads))
+    if len(new_roads) != 0:
+        Road.objects.bulk_create(new_roads)
+    if removed:
+        Road.objects.filter(game=state.id, edge__in=removed).delete()
+
+
+def save_hands(state, players):
+    amounts = {}
+    gained = {}
+    new_hands = []
+    for player, old in players:
+        for name, amount in player.hand.items():
+            last_gained = player.last_gained.get(name, 0)
+            if name not in old.hand:
+                new_hands.append((player.id, name, amount, last_gained))
+            elif amount != old.hand[name] or \
+                    last_gained != old.last_gained.get(name, 0):
+                amounts[(player.id, name)] = amount
+                gained[(player.id, name)] = last_gained
+    if len(amounts) != 0:
+        Hand.get_rows(amounts).update(
+            amount=Hand.get_amounts_case(amounts),
+            last_gained=Hand.get_amounts_case(gained))
+    if len(new_hands) != 0:
+        Hand.objects.bulk_create(
+            [Hand(owner_id=owner, game_id=state.id, name=name,
+                  amount=amount, last_gained=last_gained)
+             for owner, name, amount, last_gained in new_hands])
+
+
+def count_cards(cards):
+    counts = {}
+    for name in cards:
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def save_cards(state, players):
+    new_cards = []
+    removed = {}
+    for player, old in players:
+        counts = count_cards(player.cards)
+        old_counts = count_cards(old.cards)
+        for name in set(counts).union(old_counts):
+            difference = counts.get(name, 0) - old_counts.get(name, 0)
+            if difference > 0:
+                new_cards.extend([Card(game_id=state.id, owner_id=player.id,
+                                       name=name)
+                                  for i in range(difference)])
+            elif difference < 0:
+                removed[(player.id, name)] = -difference
+    if len(new_cards) != 0:
+        Card.objects.bulk_create(new_cards)
+    if len(removed) != 0:
+        rows = Q()
+        for owner, name in removed:
+            rows |= Q(owner=owner, name=name)
+        ids = []
+        for id, owner, name in Card.objects.filter(rows).order_by(
+                'id').values_list('id', 'owner', 'name'):
+            if removed[(owner, name)] > 0:
+                removed[(owner, name)] -= 1
+                ids.append(id)
+        Card.objects.filter(id__in=ids).delete()
+
+
+def take_snapshot(state, number):
+    """
+    A method to save the state of a game after its action `number`.
+    """
+    StateSnapshot.objects.update_or_create(
+        game_id=state.id, number=number,
+        defaults={'state': json.dumps(dump_state(state))})
+
+
+def last_action_number(game_id):
+    return GameAction.objects.filter(game=game_id).aggregate(
+                number=Max('number'))['number']
+
+
+def next_action_number(state):
+    """
+    A method to get the number of the next action of a game. Before its
+    first action, the state of the game is saved as the snapshot 0.
+    Args:
+    state: the state of a started game, before the action.
+    """
+    last = last_action_number(state.id)
+    if last is not None:
+        return last + 1
+    if not StateSnapshot.objects.filter(game=state.id).exists():
+        take_snapshot(state, 0)
+    return 1
+
+
+def log_action(state, user_id, data, outcomes, number):
+    """
+    A method to append an accepted action to the log of a game and, each
+    ACTION_LOG_SNAPSHOT_EVERY actions, to save a snapshot of the game.
+    Args:
+    state: the state of a started game, after the action.
+    user_id: the id of the user that did the action.
+    data: the type and the payload of the action.
+    outcomes: the random outcomes of the action.
+    number: the number of the action (see next_action_number).
+    """
+    GameAction.objects.create(game_id=state.id, number=number,
+                              user_id=user_id, action=data['type'],
+                              data=json.dumps({
+                                  'payload': data.get('payload'),
+                                  'outcomes': outcomes}))
+    if number % settings.ACTION_LOG_SNAPSHOT_EVERY == 0:
+        take_snapshot(state, number)
+
+
+def get_log(game_id, after=0):
+    """
+    A generator of the actions of a game logged after the action
+    `after`, as (user_id, data, outcomes).
+    """
+    entries = GameAction.objects.filter(
+                game=game_id, number__gt=after).values_list(
+                'user', 'action', 'data')
+    for user_id, action, data in entries:
+        data = json.loads(data)
+        yield (user_id, {'type': action, 'payload': data['payload']},
+               data['outcomes'])
+
+
+def rebuild_state(game):
+    """
+    A method to get the state of a game from its last snapshot and the
+    actions logged after it, without reading the rows of its pieces.
+    Raise StateSnapshot.DoesNotExist if the game has no snapshots.
+    """
+    snapshot = StateSnapshot.objects.filter(game=game.id).last()
+    if snapshot is None:
+        raise StateSnapshot.DoesNotExist(
+            'The game %s has no snapshots' % game.id)
+    state = load_state(json.loads(snapshot.state), game.id, game.board_id,
+                       load_hexes(game.board_id), game.version)
+    replay(state, get_log(game.id, snapshot.number))
+    state.origin = state.copy()
+    return state
+
+
+def rebuild_game(game_id):
+    """
+    A method to rebuild a game from its action log only (see
+    rebuild_state), with a constant number of queries plus the replay.
+    Args:
+    game_id: the id of the game.
+    """
+    return rebuild_state(Game.objects.get(id=game_id))
+
+
+def archive_game(game_id):
+    """
+    A method to keep a game only in its action log: a last snapshot is
+    saved and the rows of its pieces, hands and cards are removed, so
+    they are not written again. load_game rebuilds it from the log.
+    Args:
+    game_id: the id of the game.
+    """
+    with transaction.atomic():
+        state = load_game(game_id)
+        take_snapshot(state, last_action_number(game_id) or 0)
+        Building.objects.filter(game=game_id).delete()
+        Road.objects.filter(game=game_id).delete()
+        Hand.objects.filter(owner__game=game_id).delete()
+        Card.objects.filter(owner__game=game_id).delete()
+        Game.objects.filter(id=game_id).update(archived=True)
@@ -0,0 +1,623 @@
+"""
+The rules of the game as functions of a :class: `GameState`.
+They are the same rules of the models and the actions of the views,
+but they only change the state in memory: they don't make queries and
+they don't publish events. An action that is not allowed raises a
+:class: `RuleError` before changing anything. The random functions
+take a random generator, so a game can be replayed with a seed, and
+a dict of outcomes: the random results are saved in it and, if they are
+already there, they are used instead of drawing new ones (so a game can
+be replayed from its action log).
+"""
+import math
+import random
+from aux.bitboard import (vertex_id, hexe_id, edge_id, NEIGHBOR_MASK,
+                          HEXE_VERTICES_MASK, EDGE_VERTICES_MASK,
+                          edges_vertices_mask)
+from catan.engine.state import RuleError
+
+
+RESOURCES = ('brick', 'lumber', 'wool', 'grain', 'ore')
+
+"""
+The development cards of the deck of a game (the 25 cards of the
+standard game) and the letter of each one in the shuffled deck that
+is saved with the game (see new_deck).
+"""
+DEVELOPMENT_CARDS = {'knight': 14, 'victory_point': 5, 'road_building': 2,
+                     'year_of_plenty': 2, 'monopoly': 2}
+CARD_LETTERS = {'knight': 'k', 'victory_point': 'v', 'road_building': 'r',
+                'year_of_plenty': 'y', 'monopoly': 'm'}
+CARD_NAMES = {letter: name for name, letter in CARD_LETTERS.items()}
+DECK_SIZE = sum(DEVELOPMENT_CARDS.values())
+
+COSTS = {
+    'build_settlement': {'brick': 1, 'lumber': 1, 'wool': 1, 'grain': 1},
+    'upgrade_city': {'ore': 3, 'grain': 2},
+    'build_road': {'brick': 1, 'lumber': 1},
+    'buy_card': {'ore': 1, 'grain': 1, 'wool': 1}
+}
+
+POINTS_TO_WIN = 10
+
+# The longest road (of 5 roads or more) and the largest army (of 3
+# knights or more) give 2 points to the player that has them.
+LONGEST_ROAD_MIN = 5
+LARGEST_ARMY_MIN = 3
+AWARD_POINTS = 2
+
+
+def bit_count(mask):
+    return bin(mask).count('1')
+
+
+def chance(outcomes, name, draw):
+    """
+    A method to get a random result: the one of the outcomes if it's
+    there or a new one (that is saved in the outcomes).
+    Args:
+    outcomes: a dict of outcomes or None.
+    name: the name of the result.
+    draw: a function that draws a new result.
+    """
+    if outcomes is None:
+        return draw()
+    if name not in outcomes:
+        outcomes[name] = draw()
+    return outcomes[name]
+
+
+def new_deck(rng=random):
+    """
+    A method to get a shuffled deck of development cards as a string,
+    one letter per card (see CARD_LETTERS). The cards are drawn in
+    order, so a game with a deck shuffled with a seeded generator always
+    draws the same cards.
+    """
+    deck = [CARD_LETTERS[name] for name, amount in DEVELOPMENT_CARDS.items()
+            for i in range(amount)]
+    rng.shuffle(deck)
+    return ''.join(deck)
+
+
+def deck_card(deck, position):
+    """
+    A method to get the name of the card in a position of a deck.
+    """
+    return CARD_NAMES[deck[position]]
+
+
+def has_cards_left(state):
+    return state.deck_top < len(state.deck)
+
+
+def is_resource(name):
+    return name in RESOURCES
+
+
+def gain_resources(player, name, amount):
+    """
+    A method to give resources to a player (as last gained).
+    """
+    if amount > 0:
+        player.hand[name] = player.hand.get(name, 0) + amount
+        player.last_gained[name] = player.last_gained.get(name, 0) + amount
+
+
+def remove_resources(player, name, amount):
+    """
+    A method to remove resources of a player. The resources not gained
+    in the last turn are removed first.
+    """
+    if amount > 0:
+        left = player.hand.get(name, 0) - amount
+        player.hand[name] = left
+        player.last_gained[name] = min(player.last_gained.get(name, 0),
+                                       left)
+
+
+def has_necessary_resources(player, action):
+    """
+    A method to check if the player has the resources to pay an action
+    (see COSTS).
+    """
+    for name, amount in COSTS[action].items():
+        if player.hand.get(name, 0) < amount:
+            return False
+    return True
+
+
+def pay(player, action):
+    for name, amount in COSTS[action].items():
+        remove_resources(player, name, amount)
+
+
+def can_trade_bank(player):
+    for name in RESOURCES:
+        if player.hand.get(name, 0) >= 4:
+            return True
+    return False
+
+
+def award_holder(scores, holder, minimum):
+    """
+    A method to get who has an award after a change of the scores: the
+    holder keeps it while nobody has more, otherwise it's for the only
+    player with the best score. Return a player id or None.
+    Args:
+    scores: a dict {player_id: score}.
+    holder: the player id that has the award or None.
+    minimum: the score needed to have the award.
+    """
+    best = max(scores.values(), default=0)
+    if best < minimum:
+        return None
+    if scores.get(holder) == best:
+        return holder
+    leaders = [player_id for player_id, score in scores.items()
+               if score == best]
+    if len(leaders) == 1:
+        return leaders[0]
+    return None
+
+
+def road_length(state, player):
+    """
+    A method to get the length of the longest road of a player, cut by
+    the buildings of the other players. Only the parts of the roads that
+    changed since they were measured are searched (see
+    :class: `aux.bitboard.RoadLengths`).
+    """
+    blockers = state.buildings & ~(player.settlements | player.cities)
+    return state.road_lengths.get(player.roads, blockers)
+
+
+def update_longest_road(state):
+    """
+    A method to give the longest road after a new road or a new
+    settlement (that can cut the roads of the other players).
+    """
+    lengths = {player.id: road_length(state, player)
+               for player in state.players}
+    state.longest_road_id = award_holder(lengths, state.longest_road_id,
+                                         LONGEST_ROAD_MIN)
+
+
+def update_largest_army(state):
+    """
+    A method to give the largest army after a knight card was played.
+    """
+    knights = {player.id: player.knights for player in state.players}
+    state.largest_army_id = award_holder(knights, state.largest_army_id,
+                                         LARGEST_ARMY_MIN)
+
+
+def award_points(state, player):
+    """
+    A method to get the points of the awards of a player.
+    """
+    awards = [state.longest_road_id, state.largest_army_id]
+    return AWARD_POINTS * awards.count(player.id)
+
+
+def check_winner(state, player):
+    """
+    A method to check if the player has won (his points, his victory
+    point cards and his awards). The winner is saved in the state.
+    """
+    points = player.victory_points + player.cards.count('victory_point') + \
+        award_points(state, player)
+    if points < POINTS_TO_WIN:
+        return False
+    state.winner_id = player.user_id
+    return True
+
+
+def get_yields(state, token):
+    """
+    A method to get the resources that the players gain with a token:
+    a dict {(player_id, resource_name): amount}. The hexe of the robber
+    doesn't produce.
+    Params:
+    @token: the sum of the dices.
+    """
+    yields = {}
+    for position, hexe in state.hexes.items():
+        if hexe.token != token or hexe.terrain == 'desert' or \
+                position == state.robber:
+            continue
+        mask = HEXE_VERTICES_MASK[hexe_id(*position)]
+        for player in state.players:
+            amount = bit_count(player.settlements & mask) + \
+                2 * bit_count(player.cities & mask)
+            if amount:
+                key = (player.id, hexe.terrain)
+                yields[key] = yields.get(key, 0) + amount
+    return yields
+
+
+def distribute_resources(state, token):
+    """
+    A method that gives to each player the resources of the hexagons
+    with the given token. The new resources are the only last gained
+    of the game. Return the yields (see get_yields).
+    """
+    yields = get_yields(state, token)
+    for player in state.players:
+        for name in player.last_gained:
+            player.last_gained[name] = 0
+    for (owner, name), amount in yields.items():
+        gain_resources(state.get_player(owner), name, amount)
+    return yields
+
+
+def draw_discards(state, rng):
+    """
+    A method to choose (at random) the half of the resources of the
+    players with more than 7 resources: a sorted list of
+    [player_id, resource_name, amount].
+    """
+    discarded = {}
+    for player in state.players:
+        resources = []
+        for name, amount in player.hand.items():
+            resources.extend([name] * amount)
+        if len(resources) > 7:
+            rng.shuffle(resources)
+            for name in resources[0:math.floor(len(resources)/2)]:
+                key = (player.id, name)
+                discarded[key] = discarded.get(key, 0) + 1
+    return sorted([owner, name, amount]
+                  for (owner, name), amount in discarded.items())
+
+
+def random_discard(state, rng=random, outcomes=None):
+    """
+    A method to discard (at random) the half of the resources
+    of the players with more than 7 resources.
+    """
+    discarded = chance(outcomes, 'discarded',
+                       lambda: draw_discards(state, rng))
+    for owner, name, amount in discarded:
+        remove_resources(state.get_player(owner), name, amount)
+
+
+def throw_dices(state, rng=random, dices=None, outcomes=None):
+    """
+    A method that rolls the two dice and distributes the resources of
+    the hexagons with the token of their sum. With a 7 the players
+    with more than 7 resources discard the half. Return the yields
+    (see get_yields).
+    Params:
+    @dices: optional, the values of the dices (used for testing).
+    """
+    if dices is None:
+        dices = chance(outcomes, 'dices',
+                       lambda: [rng.randint(1, 6), rng.randint(1, 6)])
+    elif outcomes is not None:
+        outcomes['dices'] = list(dices)
+    state.turn.dices = tuple(dices)
+    token = sum(dices)
+    if token == 7:
+        for player in state.players:
+            for name in player.last_gained:
+                player.last_gained[name] = 0
+        random_discard(state, rng, outcomes)
+        return {}
+    return distribute_resources(state, token)
+
+
+def get_next_player(state, rng=random, outcomes=None):
+    """
+    A method to get the next player in turn. In the 'FIRST_CONSTRUCTION'
+    and 'FULL_PLAY' stages the order is the natural, and in the
+    'SECOND_CONSTRUCTION' stage the order is the inverse. The change of
+    stage to 'FULL_PLAY' throws the dices.
+    """
+    turn = state.turn
+    players = state.players
+    position = players.index(state.player_in_turn())
+    if turn.game_stage == 'FIRST_CONSTRUCTION':
+        if position != len(players) - 1:
+            position += 1
+        else:
+            turn.game_stage = 'SECOND_CONSTRUCTION'
+    elif turn.game_stage == 'SECOND_CONSTRUCTION':
+        if position != 0:
+            position -= 1
+        else:
+            turn.game_stage = 'FULL_PLAY'
+            throw_dices(state, rng, outcomes=outcomes)
+    else:
+        position = (position + 1) % len(players)
+    return players[position]
+
+
+def change_turn(state, rng=random, outcomes=None):
+    """
+    A method to give the turn to the next player.
+    """
+    turn = state.turn
+    if turn.game_stage != 'FULL_PLAY' and turn.last_action != 'BUILD_ROAD':
+        raise RuleError("You must build your first constructions")
+    next_player = get_next_player(state, rng, outcomes)
+    turn.user_id = next_player.user_id
+    turn.last_action = 'NON_BLOCKING_ACTION'
+    turn.robber_moved = False
+    return next_player
+
+
+def end_turn(state, rng=random, outcomes=None):
+    """
+    A method to end the turn of the player: the turn changes and, in
+    the full play, the next player throws the dices. Return the yields
+    of the dices (see get_yields).
+    """
+    game_stage = state.turn.game_stage
+    if sum(state.turn.dices) == 7 and not state.turn.robber_moved:
+        raise RuleError("You have to move the thief")
+    change_turn(state, rng, outcomes)
+    if game_stage == 'FULL_PLAY':
+        return throw_dices(state, rng, outcomes=outcomes)
+    return {}
+
+
+def gain_resources_free(state, player, vid):
+    """
+    A method to give to a player one resource of each hexagon around
+    his second settlement.
+    """
+    bit = 1 << vid
+    for position, hexe in state.hexes.items():
+        if hexe.terrain != 'desert' and \
+                HEXE_VERTICES_MASK[hexe_id(*position)] & bit:
+            gain_resources(player, hexe.terrain, 1)
+
+
+def build_settlement(state, player, level, index):
+    """
+    A method to build a settlement. In the full play it must be on
+    a road of the player, far from the other buildings and it's paid.
+    Return True if the player won.
+    """
+    vid = vertex_id(level, index)
+    if vid is None:
+        raise RuleError("Non-existent position")
+    bit = 1 << vid
+    buildings = state.buildings
+    if buildings & bit:
+        raise RuleError("Busy position")
+    turn = state.turn
+    if turn.game_stage == 'FULL_PLAY':
+        if not has_necessary_resources(player, 'build_settlement'):
+            raise RuleError("It does not have" +
+                            "the necessary resources")
+        is_road = edges_vertices_mask(player.roads) & bit
+        is_free = not (buildings & NEIGHBOR_MASK[vid])
+        if not is_free or not is_road:
+            raise RuleError("Invalid position")
+        player.add_building(vid)
+        pay(player, 'build_settlement')
+        update_longest_road(state)
+    else:
+        if turn.last_action != 'NON_BLOCKING_ACTION':
+            raise RuleError("You cannot construct at this momment")
+        player.add_building(vid)
+        turn.last_action = 'BUILD_SETTLEMENT'
+        if turn.game_stage == 'SECOND_CONSTRUCTION':
+            gain_resources_free(state, player, vid)
+    player.victory_points += 1
+    return check_winner(state, player)
+
+
+def upgrade_city(state, player, level, index):
+    """
+    A method to upgrade a settlement of the player to a city.
+    Return True if the player won.
+    """
+    vid = vertex_id(level, index)
+    if vid is None:
+        raise RuleError("Non-existent position")
+    bit = 1 << vid
+    if not player.settlements & bit:
+        raise RuleError("Must upgrade an existent settlement")
+    if state.turn.game_stage != 'FULL_PLAY':
+        raise RuleError("You cannot construct at this momment")
+    if not has_necessary_resources(player, 'upgrade_city'):
+        raise RuleError("It does not have" +
+                        "the necessary resources")
+    player.settlements &= ~bit
+    player.cities |= bit
+    player.victory_points += 1
+    pay(player, 'upgrade_city')
+    return check_winner(state, player)
+
+
+def place_road(state, player, vertex_1, vertex_2, free=False):
+    """
+    A method to place a road between two vertex positions. In the full
+    play it must continue a road or a building of the player and, if
+    it's not free (road building card), it's paid. In the construction
+    stage it must start in the last settlement of the player.
+    """
+    vid_1 = vertex_id(*vertex_1)
+    vid_2 = vertex_id(*vertex_2)
+    if vid_1 is None or vid_2 is None:
+        raise RuleError("Non-existent vertexs positions")
+    eid = edge_id(vertex_1, vertex_2)
+    if eid is None:
+        raise RuleError("not neighbors")
+    road = 1 << eid
+    if state.roads & road:
+        raise RuleError("Busy position, reserved")
+    turn = state.turn
+    if turn.game_stage == 'FULL_PLAY':
+        my_vertices = edges_vertices_mask(player.roads) | \
+            player.settlements | player.cities
+        if not my_vertices & EDGE_VERTICES_MASK[eid]:
+            raise RuleError("You must have something built")
+    elif turn.last_action == 'BUILD_SETTLEMENT':
+        settlements = [vid for vid in player.buildings
+                       if player.settlements & (1 << vid)]
+        if settlements[-1] not in (vid_1, vid_2):
+            raise RuleError("You must build since your last building")
+    if not free and turn.game_stage == 'FULL_PLAY':
+        if not has_necessary_resources(player, 'build_road'):
+            raise RuleError("Doesn't have enough resources")
+        pay(player, 'build_road')
+    player.roads |= road
+    turn.last_action = 'BUILD_ROAD'
+
+
+def build_road(state, player, vertex_1, vertex_2):
+    """
+    A method to build a road (see place_road), that can give the longest
+    road to the player. Return True if the player won.
+    """
+    place_road(state, player, vertex_1, vertex_2)
+    update_longest_road(state)
+    return check_winner(state, player)
+
+
+def play_road_building_card(state, player, road_1, road_2):
+    """
+    A method to build two free roads with a road building card. If the
+    second road can't be built, the first one is removed.
+    Return True if the player won.
+    Params:
+    @road_1, road_2: each one a pair of vertex positions.
+    """
+    if not player.has_card('road_building'):
+        raise RuleError("Missing Road Building card")
+    last_action = state.turn.last_action
+    place_road(state, player, road_1[0], road_1[1], free=True)
+    try:
+        place_road(state, player, road_2[0], road_2[1], free=True)
+    except RuleError:
+        player.roads &= ~(1 << edge_id(road_1[0], road_1[1]))
+        state.turn.last_action = last_action
+        raise
+    player.cards.remove('road_building')
+    update_longest_road(state)
+    return check_winner(state, player)
+
+
+def buy_card(state, player, outcomes=None):
+    """
+    A method to buy the development card on the top of the deck.
+    Return True if the player won.
+    """
+    if not has_necessary_resources(player, 'buy_card'):
+        raise RuleError("It does not have" +
+                        " the necessary resources")
+    if not has_cards_left(state):
+        raise RuleError("There are no more cards")
+    player.cards.append(chance(outcomes, 'card',
+                               lambda: deck_card(state.deck,
+                                                 state.deck_top)))
+    state.deck_top += 1
+    pay(player, 'buy_card')
+    return check_winner(state, player)
+
+
+def bank_trade(state, player, give, receive):
+    """
+    A method to trade 4 resources of a type for 1 of other type.
+    """
+    if not is_resource(give) or not is_resource(receive):
+        raise RuleError("Non-existent resource")
+    if player.hand.get(give, 0) < 4:
+        raise RuleError("It does not have" +
+                        " the necessary resources")
+    gain_resources(player, receive, 1)
+    remove_resources(player, give, 4)
+
+
+def get_players_to_steal(state, player, level, index):
+    """
+    A method to get the usernames of the other players with buildings
+    around a hexagon.
+    """
+    owners = state.get_hexe_owners().get((level, index), ())
+    return [username for username in owners
+            if username != player.username]
+
+
+def steal_to(state, player, victim, rng=random, outcomes=None):
+    """
+    A method to steal a random resource of other player.
+    """
+    resources = []
+    for name, amount in victim.hand.items():
+        resources.extend([name] * amount)
+    if len(resources) != 0:
+        name = chance(outcomes, 'stolen',
+                      lambda: resources[rng.randint(0, len(resources) - 1)])
+        remove_resources(victim, name, 1)
+        gain_resources(player, name, 1)
+
+
+def move_robber(state, player, level, index, choosen_player, knight=False,
+                rng=random, outcomes=None):
+    """
+    A method to move the robber (after a 7 or with a knight card) and
+    steal a resource to a player with buildings around the new hexagon.
+    A knight card counts for the largest army, so the player can win
+    with it (see check_winner).
+    Return the username of the stolen player or None.
+    """
+    if knight:
+        if not player.has_card('knight'):
+            raise RuleError('You have not knight cards')
+    elif sum(state.turn.dices) != 7:
+        raise RuleError('The sum dices is not 7')
+    if hexe_id(level, index) is None:
+        raise RuleError("There is no hexe in that position")
+    if state.robber == (level, index):
+        raise RuleError("You must enter a new hexe position")
+    if choosen_player == player.username:
+        raise RuleError("You can't choose yourself")
+    players_to_steal = get_players_to_steal(state, player, level, index)
+    if choosen_player not in players_to_steal and players_to_steal != []:
+        raise RuleError("You have to choose a player that has buildings")
+    state.robber = (level, index)
+    state.turn.robber_moved = True
+    stolen_player = None
+    if players_to_steal != []:
+        steal_to(state, player,
+                 state.get_player_by_username(choosen_player), rng, outcomes)
+        stolen_player = choosen_player
+    if knight:
+        player.cards.remove('knight')
+        player.knights += 1
+        update_largest_army(state)
+        check_winner(state, player)
+    return stolen_player
+
+
+def play_monopoly_card(state, player, resource):
+    """
+    A method to take all the resources of a type of the players.
+    """
+    if not player.has_card('monopoly'):
+        raise RuleError('You have not monopoly card')
+    if not is_resource(resource):
+        raise RuleError("Non-existent resource")
+    for other in state.players:
+        count = other.hand.get(resource, 0)
+        if count != 0:
+            remove_resources(other, resource, count)
+            gain_resources(player, resource, count)
+
+
+def play_year_of_plenty(state, player, resources):
+    """
+    A method to take two resources of the bank.
+    """
+    if not player.has_card('year_of_plenty'):
+        raise RuleError('You have not year of plenty card')
+    for name in resources:
+        if not is_resource(name):
+            raise RuleError("Non-existent resource")
+    gain_resources(player, resources[0], 1)
+    gain_resources(player, resources[1], 1)
@@ -0,0 +1,85 @@
+"""
+Random games played only in memory, to measure and to test the engine:
+each player chooses at random between its legal actions.
+"""
+import random
+from aux.bitboard import HEXES
+from catan.engine.state import (GameState, PlayerState, TurnState,
+                                HexeState, RuleError)
+from catan.engine.rules import RESOURCES, new_deck
+from catan.engine.actions import legal_actions, apply_action
+
+
+TERRAINS = ['wool'] * 4 + ['brick'] * 3 + ['grain'] * 4 + ['ore'] * 3 + \
+    ['lumber'] * 4
+TOKENS = [2, 12] + list(range(3, 12)) * 2
+
+
+def random_state(rng=random, players=4):
+    """
+    A method to get a new game (in the first construction stage) with
+    a random board and deck.
+    """
+    positions = list(HEXES)
+    rng.shuffle(positions)
+    terrains = list(TERRAINS)
+    tokens = list(TOKENS)
+    rng.shuffle(terrains)
+    rng.shuffle(tokens)
+    hexes = {positions[0]: HexeState(1, 'desert', 0)}
+    for i, position in enumerate(positions[1:]):
+        hexes[position] = HexeState(i + 2, terrains[i], tokens[i])
+    game_players = [PlayerState(turn, turn, 'player%d' % turn, turn)
+                    for turn in range(1, players + 1)]
+    turn = TurnState(1, 'FIRST_CONSTRUCTION')
+    return GameState(1, 1, hexes, positions[0], game_players, turn,
+                     deck=new_deck(rng))
+
+
+def choose_data(action, player, rng=random):
+    """
+    A method to get the data of a legal action with a random payload.
+    """
+    action_type = action['type']
+    payload = action.get('payload')
+    if action_type in ('move_robber', 'play_knight_card'):
+        item = rng.choice(payload)
+        players = item['players']
+        payload = {'position': item['position'],
+                   'player': rng.choice(players) if players else ''}
+    elif action_type == 'play_road_building_card':
+        payload = [rng.choice(payload), rng.choice(payload)]
+    elif action_type == 'bank_trade':
+        give = [name for name in RESOURCES if player.hand.get(name, 0) >= 4]
+        payload = {'give': rng.choice(give),
+                   'receive': rng.choice(RESOURCES)}
+    elif action_type == 'play_monopoly_card':
+        payload = rng.choice(RESOURCES)
+    elif action_type == 'play_year_of_plenty_card':
+        payload = [rng.choice(RESOURCES), rng.choice(RESOURCES)]
+    elif payload is not None:
+        payload = rng.choice(payload)
+    return {'type': action_type, 'payload': payload}
+
+
+def play_random_game(state, actions, rng=random):
+    """
+    A method to play a game until there is a winner or the actions are
+    done. Return the number of actions played (with the ones that the
+    rules rejected) and the log of the accepted actions: a list of
+    (user_id, data, outcomes).
+    """
+    log = []
+    played = 0
+    while played < actions and state.winner_id is None:
+        played += 1
+        player = state.player_in_turn()
+        data = choose_data(rng.choice(legal_actions(state, player)),
+                           player, rng)
+        outcomes = {}
+        try:
+            apply_action(state, player, data, rng, outcomes)
+        except RuleError:
+            continue
+        log.append((player.user_id, data, outcomes))
+    return (played, log)
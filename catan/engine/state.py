@@ -0,0 +1,255 @@
+"""
+The state of a started game in memory, without the ORM.
+The pieces of each player are bitmasks (see :mod: `aux.bitboard`), the
+hands are dicts {resource_name: amount} and the cards are lists of
+names, so a whole game is a few small objects that are cheap to copy.
+"""
+from aux.topology import HEXE_VERTICES, VERTEX_HEXES
+from aux.bitboard import (VERTICES, vertex_position, vertex_id, iter_bits,
+                          BlockedVertices, RoadLengths)
+
+
+class RuleError(Exception):
+    """
+    An action that the rules don't allow. The detail is the same
+    message that the views send to the client.
+    """
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class HexeState(object):
+    """
+    One hexagon of the board: its id in the database, terrain and token.
+    """
+    __slots__ = ('id', 'terrain', 'token')
+
+    def __init__(self, id, terrain, token):
+        self.id = id
+        self.terrain = terrain
+        self.token = token
+
+
+class PlayerState(object):
+    """
+    A player of a started game. buildings keeps the vertex ids of the
+    buildings in the order they were built (the last one is used by
+    the roads of the construction stage) and knights counts the knight
+    cards played (see the largest army of :mod: `catan.engine.rules`).
+    """
+    __slots__ = ('id', 'user_id', 'username', 'turn', 'colour',
+                 'victory_points', 'knights', 'hand', 'last_gained',
+                 'cards', 'buildings', 'settlements', 'cities', 'roads')
+
+    def __init__(self, id, user_id, username, turn, colour='',
+                 victory_points=0, knights=0):
+        self.id = id
+        self.user_id = user_id
+        self.username = username
+        self.turn = turn
+        self.colour = colour
+        self.victory_points = victory_points
+        self.knights = knights
+        self.hand = {}
+        self.last_gained = {}
+        self.cards = []
+        self.buildings = []
+        self.settlements = 0
+        self.cities = 0
+        self.roads = 0
+
+    def copy(self):
+        player = PlayerState(self.id, self.user_id, self.username,
+                             self.turn, self.colour, self.victory_points,
+                             self.knights)
+        player.hand = dict(self.hand)
+        player.last_gained = dict(self.last_gained)
+        player.cards = list(self.cards)
+        player.buildings = list(self.buildings)
+        player.settlements = self.settlements
+        player.cities = self.cities
+        player.roads = self.roads
+        return player
+
+    def add_building(self, vid, name='settlement'):
+        self.buildings.append(vid)
+        if name == 'city':
+            self.cities |= 1 << vid
+        else:
+            self.settlements |= 1 << vid
+
+    def resources_count(self):
+        return sum(self.hand.values())
+
+    def has_card(self, name):
+        return name in self.cards
+
+    def settlement_positions(self):
+        """
+        The positions of the settlements of the player, in the order
+        they were built.
+        """
+        return [list(vertex_position(vid)) for vid in self.buildings
+                if self.settlements & (1 << vid)]
+
+
+class TurnState(object):
+    """
+    The player in turn (by user id), the stage of the game, the last
+    action of the construction stage, the dices and if the robber
+    has been moved in this turn.
+    """
+    __slots__ = ('user_id', 'game_stage', 'last_action', 'dices',
+                 'robber_moved')
+
+    def __init__(self, user_id, game_stage='FULL_PLAY',
+                 last_action='NON_BLOCKING_ACTION', dices=(1, 1),
+                 robber_moved=False):
+        self.user_id = user_id
+        self.game_stage = game_stage
+        self.last_action = last_action
+        self.dices = tuple(dices)
+        self.robber_moved = robber_moved
+
+    def copy(self):
+        return TurnState(self.user_id, self.game_stage, self.last_action,
+                         self.dices, self.robber_moved)
+
+
+class GameState(object):
+    """
+    A started game: the hexagons of its board by (level, index), the
+    position of the robber, the players (in the order of their turns),
+    the turn, the winner (a user id), the players (by player id) with
+    the longest road and the largest army and the deck of development
+    cards (a string, see :func: `catan.engine.rules.new_deck`) with the
+    position of its next card. origin is the state as it was
+    loaded or saved the last time, so only the changes are written.
+    The vertices blocked by the buildings (see blocked) and the owners
+    of the buildings around each hexagon (see get_hexe_owners) are kept
+    in the state and only the new buildings are added to them. The
+    lengths of the roads only depend on the pieces, so road_lengths is
+    shared by the copies of the state.
+    """
+    __slots__ = ('id', 'board_id', 'version', 'hexes', 'robber', 'players',
+                 'turn', 'winner_id', 'longest_road_id', 'largest_army_id',
+                 'deck', 'deck_top', 'origin', 'blocked_vertices',
+                 'owners_buildings', 'hexe_owners', 'road_lengths')
+
+    def __init__(self, id, board_id, hexes, robber, players, turn,
+                 winner_id=None, version=0, longest_road_id=None,
+                 largest_army_id=None, deck='', deck_top=0):
+        self.id = id
+        self.board_id = board_id
+        self.version = version
+        self.hexes = hexes
+        self.robber = tuple(robber)
+        self.players = sorted(players, key=lambda player: player.turn)
+        self.turn = turn
+        self.winner_id = winner_id
+        self.longest_road_id = longest_road_id
+        self.largest_army_id = largest_army_id
+        self.deck = deck
+        self.deck_top = deck_top
+        self.origin = None
+        self.blocked_vertices = BlockedVertices()
+        self.owners_buildings = ()
+        self.hexe_owners = {}
+        self.road_lengths = RoadLengths()
+
+    def copy(self):
+        """
+        A copy of the state that doesn't share anything mutable with it
+        (the hexagons never change and the lengths of the roads are a
+        cache of the pieces, so they are shared).
+        """
+        turn = self.turn.copy() if self.turn is not None else None
+        state = GameState(self.id, self.board_id, self.hexes, self.robber,
+                          [player.copy() for player in self.players], turn,
+                          self.winner_id, self.version,
+                          self.longest_road_id, self.largest_army_id,
+                          self.deck, self.deck_top)
+        state.blocked_vertices = BlockedVertices(self.blocked_vertices.known)
+        state.owners_buildings = self.owners_buildings
+        state.hexe_owners = dict(self.hexe_owners)
+        state.road_lengths = self.road_lengths
+        return state
+
+    def get_player(self, player_id):
+        for player in self.players:
+            if player.id == player_id:
+                return player
+        return None
+
+    def get_player_by_user(self, user_id):
+        for player in self.players:
+            if player.user_id == user_id:
+                return player
+        return None
+
+    def get_player_by_username(self, username):
+        for player in self.players:
+            if player.username == username:
+                return player
+        return None
+
+    def player_in_turn(self):
+        return self.get_player_by_user(self.turn.user_id)
+
+    def is_in_turn(self, player):
+        return self.turn.user_id == player.user_id
+
+    @property
+    def buildings(self):
+        buildings = 0
+        for player in self.players:
+            buildings |= player.settlements | player.cities
+        return buildings
+
+    @property
+    def blocked(self):
+        """
+        The vertices where nobody can build (see
+        :class: `aux.bitboard.BlockedVertices`).
+        """
+        return self.blocked_vertices.get(self.buildings)
+
+    @property
+    def roads(self):
+        roads = 0
+        for player in self.players:
+            roads |= player.roads
+        return roads
+
+    def get_hexe_owners(self):
+        """
+        The usernames of the players with buildings around each hexagon,
+        {(level, index): (username, ...)}, in the order of the vertices
+        of the hexagon (the hexagons without buildings are missing).
+        Only the hexagons of the buildings built since the last call are
+        computed again; if a building was removed, all of them are.
+        """
+        buildings = tuple(player.settlements | player.cities
+                          for player in self.players)
+        known = self.owners_buildings
+        if len(known) != len(buildings) or \
+                any(old & ~new for old, new in zip(known, buildings)):
+            known = (0,) * len(buildings)
+            self.hexe_owners = {}
+        new = 0
+        for old, mask in zip(known, buildings):
+            new |= mask & ~old
+        hexes = set()
+        for vid in iter_bits(new):
+            hexes.update(VERTEX_HEXES[VERTICES[vid]])
+        for hexe in hexes:
+            owners = []
+            for vertex in HEXE_VERTICES[hexe]:
+                bit = 1 << vertex_id(*vertex)
+                for player, mask in zip(self.players, buildings):
+                    if mask & bit and player.username not in owners:
+                        owners.append(player.username)
+            self.hexe_owners[hexe] = tuple(owners)
+        self.owners_buildings = buildings
+        return self.hexe_owners
@@ -0,0 +1,320 @@
+"""
+Write-behind persistence of the active games (see the WRITE_BEHIND
+setting). The state of each game played in this process lives in an
+:class: `ActiveGame` and the actions are done in memory with the engine.
+The events are published when the actions are done, and the changes,
+the logged actions and their snapshots are written in one transaction
+when the turn ends, the game has a winner or the budget of actions or
+seconds of the game is exhausted. A timer of the process (see
+FlushTimer) flushes the games whose budget of seconds is exhausted and
+removes the idle ones from memory, and the pending changes of all the
+games are written when the process exits.
+A crash loses only the actions that were not flushed: the rows of the
+game and its action log are always written together, and a game is
+recovered from its log when it's loaded again (see recover_game).
+The state in memory is only seen by its process, so write-behind can't
+be used with more than one worker (see check_single_worker).
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import time
+from threading import Lock, Thread, Event
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction, close_old_connections
+from catan.models import Game, GameAction, StateSnapshot
+from catan.events import publish_event, publish_change
+from catan.engine.state import RuleError
+from catan.engine.actions import apply_action, action_events
+from catan.engine.log import dump_state
+from catan.engine.persistence import (load_game, save_game, rebuild_game,
+                                      take_snapshot, last_action_number)
+
+logger = logging.getLogger(__name__)
+
+
+def check_single_worker():
+    """
+    A method to refuse write-behind when the server runs more than one
+    worker (WEB_CONCURRENCY, the number of workers of gunicorn): the
+    requests of a game could go to a worker that doesn't have its state.
+    Raise ImproperlyConfigured in that case.
+    """
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    if settings.WRITE_BEHIND and workers > 1:
+        raise ImproperlyConfigured(
+            'WRITE_BEHIND needs one worker, WEB_CONCURRENCY is %d' % workers)
+
+
+class VersionConflict(Exception):
+    """
+    An action sent for a version of the game that is not the last one.
+    """
+    def __init__(self, version):
+        super().__init__(version)
+        self.version = version
+
+
+def recover_game(game_id):
+    """
+    A method to load a game to play it in memory. If the game has an
+    action log, the state is rebuilt from it and the rows of the game
+    are corrected, so the actions that were not logged are lost.
+    Raise Game.DoesNotExist if the game doesn't exist.
+    """
+    state = load_game(game_id)
+    try:
+        rebuilt = rebuild_game(game_id)
+    except StateSnapshot.DoesNotExist:
+        # The game was never played, the log starts with it
+        take_snapshot(state, 0)
+        return state
+    rebuilt.origin = state.origin
+    save_game(rebuilt)
+    return rebuilt
+
+
+class ActiveGame(object):
+    """
+    A game played in memory and what must be written when it's flushed:
+    the logged actions and the snapshots. The version of the state counts
+    the actions done in memory. An evicted game was removed from memory,
+    so its actions must be done in the one loaded again.
+    """
+    __slots__ = ('state', 'lock', 'number', 'actions', 'snapshots',
+                 'first_pending', 'last_used', 'evicted')
+
+    def __init__(self, state):
+        self.state = state
+        self.lock = Lock()
+        self.number = last_action_number(state.id) or 0
+        self.actions = []
+        self.snapshots = []
+        self.first_pending = None
+        self.last_used = time.monotonic()
+        self.evicted = False
+
+    def do_action(self, user_id, data, rng=random):
+        """
+        A method to do an action of a player in memory.
+        Return the result of the rule (see apply_action).
+        Raise RuleError if the player is not in the game or the rules
+        don't allow the action.
+        """
+        state = self.state
+        player = state.get_player_by_user(user_id)
+        if player is None:
+            raise RuleError("Not in turn")
+        stage = state.turn.game_stage
+        outcomes = {}
+        result = apply_action(state, player, data, rng, outcomes)
+        state.version += 1
+        self.number += 1
+        self.actions.append(GameAction(
+            game_id=state.id, number=self.number, user_id=user_id,
+            action=data['type'],
+            data=json.dumps({'payload': data.get('payload'),
+                             'outcomes': outcomes})))
+        if self.number % settings.ACTION_LOG_SNAPSHOT_EVERY == 0:
+            self.snapshots.append(StateSnapshot(
+                game_id=state.id, number=self.number,
+                state=json.dumps(dump_state(state))))
+        for event_type, event in action_events(state, player, data, stage,
+                                               result):
+            publish_event(state.id, event_type, **event)
+        publish_change(state.id)
+        self.last_used = time.monotonic()
+        if self.first_pending is None:
+            self.first_pending = self.last_used
+        return result
+
+    def must_flush(self, turn_ended=False):
+        """
+        A method to check if the pending changes must be written: at the
+        end of a turn, when there is a winner or when the budget of
+        actions (WRITE_BEHIND_FLUSH_ACTIONS) or of seconds
+        (WRITE_BEHIND_FLUSH_SECONDS) is exhausted.
+        """
+        if not self.actions:
+            return False
+        return turn_ended or self.state.winner_id is not None or \
+            len(self.actions) >= settings.WRITE_BEHIND_FLUSH_ACTIONS or \
+            time.monotonic() - self.first_pending >= \
+            settings.WRITE_BEHIND_FLUSH_SECONDS
+
+    def is_idle(self):
+        """
+        A method to check if the game has no actions since
+        WRITE_BEHIND_IDLE_SECONDS.
+        """
+        return time.monotonic() - self.last_used >= \
+            settings.WRITE_BEHIND_IDLE_SECONDS
+
+    def flush(self):
+        """
+        A method to write the pending changes of the game in one
+        transaction.
+        """
+        if not self.actions:
+            return
+        state = self.state
+        with transaction.atomic():
+            save_game(state)
+            GameAction.objects.bulk_create(self.actions)
+            StateSnapshot.objects.bulk_create(self.snapshots)
+            Game.objects.filter(id=state.id).update(version=state.version)
+        self.actions = []
+        self.snapshots = []
+        self.first_pending = None
+
+
+class ActiveGames(object):
+    """
+    The games played in memory by this process, by id.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.games = {}
+
+    def get(self, game_id):
+        """
+        A method to get an active game, loading it if it's not in memory.
+        Raise Game.DoesNotExist if the game doesn't exist.
+        """
+        with self.lock:
+            active = self.games.get(game_id)
+            if active is None:
+                active = ActiveGame(recover_game(game_id))
+                self.games[game_id] = active
+            return active
+
+    def peek(self, game_id):
+        """
+        A method to get an active game only if it's in memory.
+        """
+        return self.games.get(game_id)
+
+    def do_action(self, game_id, user_id, data, rng=random,
+                  expected_version=None):
+        """
+        A method to do an action in an active game and to flush the game
+        if it must be (see ActiveGame.must_flush). Return the active game
+        and the result of the rule.
+        Raise VersionConflict if the game is not in the expected version.
+        """
+        while True:
+            active = self.get(game_id)
+            with active.lock:
+                if active.evicted:
+                    # It was flushed and removed, it's loaded again
+                    continue
+                if expected_version is not None and \
+                        expected_version != active.state.version:
+                    raise VersionConflict(active.state.version)
+                turn = active.state.turn.user_id
+                result = active.do_action(user_id, data, rng)
+                if active.must_flush(active.state.turn.user_id != turn):
+                    active.flush()
+                break
+        if active.state.winner_id is not None:
+            self.discard(game_id)
+        return (active, result)
+
+    def flush_expired(self):
+        """
+        A method to flush the games whose budget of seconds is exhausted.
+        """
+        for active in list(self.games.values()):
+            with active.lock:
+                if active.must_flush():
+                    active.flush()
+
+    def evict_idle(self):
+        """
+        A method to flush the idle games (see ActiveGame.is_idle) and to
+        remove them from memory.
+        """
+        for game_id, active in list(self.games.items()):
+            with active.lock:
+                if not active.is_idle():
+                    continue
+                active.flush()
+                active.evicted = True
+                self.discard(game_id)
+
+    def flush_all(self):
+        for active in list(self.games.values()):
+            with active.lock:
+                active.flush()
+
+    def discard(self, game_id):
+        """
+        A method to remove a game from memory (its pending changes are
+        lost, so it must be flushed before).
+        """
+        with self.lock:
+            self.games.pop(game_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.games.clear()
+
+
+ACTIVE_GAMES = ActiveGames()
+
+
+class FlushTimer(Thread):
+    """
+    The thread that flushes the active games whose budget of seconds is
+    exhausted and evicts the idle ones, every WRITE_BEHIND_TICK_SECONDS.
+    """
+    def __init__(self, games):
+        super().__init__(name='write-behind-flush', daemon=True)
+        self.games = games
+        self.stopped = Event()
+
+    def run(self):
+        while not self.stopped.wait(settings.WRITE_BEHIND_TICK_SECONDS):
+            self.tick()
+
+    def tick(self):
+        close_old_connections()
+        try:
+            self.games.flush_expired()
+            self.games.evict_idle()
+        except Exception:
+            logger.exception('The active games could not be flushed')
+
+    def stop(self):
+        self.stopped.set()
+
+
+FLUSH_TIMER = None
+
+
+def start_flush_timer():
+    """
+    A method to start the FlushTimer of the process and to flush all the
+    active games when it exits (the workers of gunicorn and uvicorn exit
+    normally on SIGTERM, so the handlers of atexit are called).
+    """
+    global FLUSH_TIMER
+    if FLUSH_TIMER is not None:
+        return FLUSH_TIMER
+    FLUSH_TIMER = FlushTimer(ACTIVE_GAMES)
+    FLUSH_TIMER.start()
+    atexit.register(stop_flush_timer)
+    return FLUSH_TIMER
+
+
+def stop_flush_timer():
+    """
+    A method to stop the FlushTimer and to write the pending changes of
+    all the active games.
+    """
+    if FLUSH_TIMER is not None:
+        FLUSH_TIMER.stop()
+    ACTIVE_GAMES.flush_all()
@@ -0,0 +1,191 @@
+"""
+In-process publish/subscribe of the events of the games.
+The actions publish typed events (dice_rolled, resources_gained, build,
+robber_moved, turn_changed, winner) and each subscriber (a player or a
+spectator connected to the events stream) has an asyncio queue in the
+event loop of its connection.
+The long polling of the games (see :class: `catan.views.wait_views.
+WaitGameChange`) waits on a Watcher, that is woken when the version of
+the game changes (see publish_change).
+The hub lives in the process memory, so it needs no external broker:
+the subscribers only get the events of the actions done by the same
+process.
+"""
+import asyncio
+import itertools
+import threading
+from django.db import transaction
+
+
+class Subscriber(object):
+    """
+    The queue of events of one connection to the stream of a game.
+    If the client is too slow and its queue is full, it's marked as
+    lagging and it must reconnect.
+    """
+    __slots__ = ('game_id', 'loop', 'queue', 'lagging')
+
+    def __init__(self, game_id, loop, max_events):
+        self.game_id = game_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_events)
+        self.lagging = False
+
+    def push(self, event):
+        """
+        Add an event to the queue (only from the loop of the subscriber).
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Watcher(object):
+    """
+    A wait of a change of a game, from the event loop of its connection.
+    """
+    __slots__ = ('game_id', 'loop', 'changed')
+
+    def __init__(self, game_id, loop):
+        self.game_id = game_id
+        self.loop = loop
+        self.changed = asyncio.Event()
+
+    async def wait(self, timeout):
+        """
+        A method to wait a change for some seconds. Return True if the
+        game changed.
+        """
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.changed.clear()
+        return True
+
+
+class GameHub(object):
+    """
+    The subscribers of each game, by game id. The events can be published
+    from any thread (the views run in worker threads) and they are given
+    to each subscriber in its own event loop. The ids of the events of a
+    game are counted while it has subscribers.
+    """
+    def __init__(self, max_events=100):
+        self.max_events = max_events
+        self.lock = threading.Lock()
+        self.games = {}
+        self.counters = {}
+        self.watchers = {}
+
+    def subscribe(self, game_id):
+        """
+        A method to subscribe to the events of a game from the running
+        event loop.
+        Args:
+        game_id: the id of the game.
+        """
+        loop = asyncio.get_event_loop()
+        subscriber = Subscriber(game_id, loop, self.max_events)
+        with self.lock:
+            self.games.setdefault(game_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            subscribers = self.games.get(subscriber.game_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if len(subscribers) == 0:
+                del self.games[subscriber.game_id]
+                self.counters.pop(subscriber.game_id, None)
+
+    def subscribers_count(self, game_id):
+        with self.lock:
+            return len(self.games.get(game_id, ()))
+
+    def publish(self, game_id, event_type, data):
+        """
+        A method to give an event to all the subscribers of a game.
+        Args:
+        game_id: the id of the game.
+        event_type: the type of the event.
+        data: a dict with the data of the event (json serializable).
+        """
+        with self.lock:
+            subscribers = list(self.games.get(game_id, ()))
+            if len(subscribers) == 0:
+                return None
+            counter = self.counters.setdefault(game_id, itertools.count(1))
+            event = {'id': next(counter), 'type': event_type, 'data': data}
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.push, event)
+            except RuntimeError:
+                # The loop of the subscriber is closed
+                self.unsubscribe(subscriber)
+        return event
+
+    def watch(self, game_id):
+        """
+        A method to wait the changes of a game from the running event
+        loop (see Watcher).
+        """
+        watcher = Watcher(game_id, asyncio.get_event_loop())
+        with self.lock:
+            self.watchers.setdefault(game_id, set()).add(watcher)
+        return watcher
+
+    def unwatch(self, watcher):
+        with self.lock:
+            watchers = self.watchers.get(watcher.game_id)
+            if watchers is None:
+                return
+            watchers.discard(watcher)
+            if len(watchers) == 0:
+                del self.watchers[watcher.game_id]
+
+    def notify_change(self, game_id):
+        """
+        A method to wake the watchers of a game, from any thread.
+        """
+        with self.lock:
+            watchers = list(self.watchers.get(game_id, ()))
+        for watcher in watchers:
+            try:
+                watcher.loop.call_soon_threadsafe(watcher.changed.set)
+            except RuntimeError:
+                # The loop of the watcher is closed
+                self.unwatch(watcher)
+
+
+HUB = GameHub()
+
+
+def publish_event(game_id, event_type, **data):
+    """
+    A method to publish an event of a game when the current transaction
+    is committed (or now, if there is no transaction), so the subscribers
+    never get events of changes that are not saved.
+    Args:
+    game_id: the id of the game.
+    event_type: the type of the event.
+    data: the data of the event.
+    """
+    transaction.on_commit(lambda: HUB.publish(game_id, event_type, data))
+
+
+def publish_change(game_id):
+    """
+    A method to wake the watchers of a game (see GameHub.watch) when the
+    current transaction is committed (or now, if there is no
+    transaction), after its version changed.
+    Args:
+    game_id: the id of the game.
+    """
+    transaction.on_commit(lambda: HUB.notify_change(game_id))
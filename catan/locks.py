@@ -0,0 +1,42 @@
+"""
+Locks of the games in the process memory. The actions of a game are
+done one at a time: the lock of the game is held by the request that
+is doing an action, and the row of the game is locked in the database
+(select_for_update) for the other processes.
+"""
+from contextlib import contextmanager
+from threading import Lock
+
+
+class GameLocks(object):
+    """
+    A lock for each game that has a request waiting for it or doing an
+    action. The lock of a game is removed when nobody is using it.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.locks = {}
+
+    @contextmanager
+    def hold(self, game_id):
+        """
+        A context where the current thread holds the lock of a game.
+        """
+        with self.lock:
+            entry = self.locks.setdefault(game_id, [Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.locks[game_id]
+
+    def __len__(self):
+        with self.lock:
+            return len(self.locks)
+
+
+GAME_LOCKS = GameLocks()
@@ -0,0 +1,173 @@
+# Generated by Django 3.0.7 on 2026-10-18 11:19
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Board',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=15)),
+            ],
+            options={
+                'ordering': ['id'],
+                'unique_together': {('id', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Card',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('road_building', 'ROAD_BUILDING'), ('year_of_plenty', 'YEAR_OF_PLENTY'), ('monopoly', 'MONOPOLY'), ('victory_point', 'VICTORY_POINT'), ('knight', 'KNIGHT'), ('brick', 'BRICK'), ('lumber', 'LUMBER'), ('wool', 'WOOL'), ('grain', 'GRAIN'), ('ore', 'ORE')], max_length=50)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=15)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_board', to='catan.Board')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Player',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('turn', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(4)])),
+                ('colour', models.CharField(choices=[('Yellow', 'Yellow'), ('Blue', 'Blue'), ('Green', 'Green'), ('Red', 'Red')], max_length=50)),
+                ('victory_points', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='catan.Game')),
+                ('username', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('card_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='catan.Card')),
+                ('last_gained', models.BooleanField(default=False)),
+            ],
+            bases=('catan.card',),
+        ),
+        migrations.CreateModel(
+            name='Room',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('max_players', models.IntegerField(default=4, validators=[django.core.validators.MinValueValidator(4), django.core.validators.MaxValueValidator(4)])),
+                ('game_id', models.IntegerField(blank=True, null=True)),
+                ('board_id', models.IntegerField()),
+                ('game_has_started', models.BooleanField(default=False)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('players', models.ManyToManyField(blank=True, related_name='room_players', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Road',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level_1', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(2)])),
+                ('index_1', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(29)])),
+                ('level_2', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(2)])),
+                ('index_2', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(29)])),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='road_game', to='catan.Game')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roads', to='catan.Player')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Hexe',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terrain', models.CharField(choices=[('desert', 'DESERT'), ('brick', 'BRICK'), ('lumber', 'LUMBER'), ('wool', 'WOOL'), ('grain', 'GRAIN'), ('ore', 'ORE')], max_length=6)),
+                ('token', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(2), django.core.validators.MaxValueValidator(12)])),
+                ('level', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(2)])),
+                ('index', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(11)])),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='board_hexe', to='catan.Board')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='robber',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='robber', to='catan.Hexe'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='game_winner', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='Current_Turn',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_stage', models.CharField(choices=[('FIRST_CONSTRUCTION', 'FIRST_CONSTRUCTION'), ('SECOND_CONSTRUCTION', 'SECOND_CONSTRUCTION'), ('FULL_PLAY', 'FULL_PLAY')], default='FULL_PLAY', max_length=50)),
+                ('last_action', models.CharField(choices=[('BUILD_SETTLEMENT', 'BUILD_SETTLEMENT'), ('BUILD_ROAD', 'BUILD_ROAD'), ('NON_BLOCKING_ACTION', 'NON_BLOCKING_ACTION')], default='NON_BLOCKING_ACTION', max_length=50)),
+                ('dices1', models.IntegerField(default=1, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)])),
+                ('dices2', models.IntegerField(default=1, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)])),
+                ('robber_moved', models.BooleanField(default=False)),
+                ('game', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='current_turn', to='catan.Game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='catan.Game'),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='catan.Player'),
+        ),
+        migrations.CreateModel(
+            name='Building',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('settlement', 'SETTLEMENT'), ('city', 'CITY')], max_length=50)),
+                ('level', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(2)])),
+                ('index', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(29)])),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='building_game', to='catan.Game')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buildings', to='catan.Player')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='road',
+            constraint=models.UniqueConstraint(fields=('level_1', 'index_1', 'level_2', 'index_2', 'game'), name='One Road per vertex in game'),
+        ),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(fields=('turn', 'game'), name='User with unique turn per game'),
+        ),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(fields=('colour', 'game'), name='User with unique colour per game'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='hexe',
+            unique_together={('board', 'level', 'index')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='game',
+            unique_together={('id', 'name')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='building',
+            unique_together={('level', 'index', 'game')},
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.0.7 on 2026-10-18 11:20
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('brick', 'BRICK'), ('lumber', 'LUMBER'), ('wool', 'WOOL'), ('grain', 'GRAIN'), ('ore', 'ORE')], max_length=50)),
+                ('amount', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('last_gained', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='catan.Game')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hand', to='catan.Player')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hand',
+            constraint=models.UniqueConstraint(fields=('owner', 'name'), name='One hand per resource and player'),
+        ),
+        migrations.AddConstraint(
+            model_name='hand',
+            constraint=models.CheckConstraint(check=models.Q(amount__gte=0), name='Hand amount not negative'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.0.7 on 2026-10-18 11:20
+
+from django.db import migrations
+
+RESOURCE_NAMES = ['brick', 'lumber', 'wool', 'grain', 'ore']
+
+
+def resources_to_hands(apps, schema_editor):
+    """
+    Convert the Resource rows (one per card) in Hand rows (one per
+    player and resource with the amount of cards).
+    """
+    Resource = apps.get_model('catan', 'Resource')
+    Card = apps.get_model('catan', 'Card')
+    Hand = apps.get_model('catan', 'Hand')
+    hands = {}
+    resources = Resource.objects.order_by('id').values_list(
+                    'owner', 'game', 'name', 'last_gained')
+    for owner, game, name, last_gained in resources.iterator():
+        hand = hands.get((owner, name))
+        if hand is None:
+            hand = Hand(owner_id=owner, game_id=game, name=name)
+            hands[(owner, name)] = hand
+        hand.amount += 1
+        if last_gained:
+            hand.last_gained += 1
+    Hand.objects.bulk_create(hands.values(), batch_size=500)
+    # The parents of the Resource rows
+    Card.objects.filter(name__in=RESOURCE_NAMES).delete()
+
+
+def hands_to_resources(apps, schema_editor):
+    Resource = apps.get_model('catan', 'Resource')
+    Hand = apps.get_model('catan', 'Hand')
+    for hand in Hand.objects.order_by('id').iterator():
+        for i in range(hand.amount):
+            Resource.objects.create(owner_id=hand.owner_id,
+                                    game_id=hand.game_id, name=hand.name,
+                                    last_gained=i < hand.last_gained)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0002_hand'),
+    ]
+
+    operations = [
+        migrations.RunPython(resources_to_hands, hands_to_resources),
+    ]
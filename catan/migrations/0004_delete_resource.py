@@ -0,0 +1,21 @@
+# Generated by Django 3.0.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0003_resources_to_hands'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Resource',
+        ),
+        migrations.AlterField(
+            model_name='card',
+            name='name',
+            field=models.CharField(choices=[('road_building', 'ROAD_BUILDING'), ('year_of_plenty', 'YEAR_OF_PLENTY'), ('monopoly', 'MONOPOLY'), ('victory_point', 'VICTORY_POINT'), ('knight', 'KNIGHT')], max_length=50),
+        ),
+    ]
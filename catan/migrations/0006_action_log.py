@@ -0,0 +1,49 @@
+# Generated by Django 3.0.7 on 2026-10-18 11:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('catan', '0005_game_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='StateSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('state', models.TextField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='catan.Game')),
+            ],
+            options={
+                'ordering': ['game', 'number'],
+                'unique_together': {('game', 'number')},
+            },
+        ),
+        migrations.CreateModel(
+            name='GameAction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('action', models.CharField(max_length=50)),
+                ('data', models.TextField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actions', to='catan.Game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['game', 'number'],
+                'unique_together': {('game', 'number')},
+            },
+        ),
+    ]
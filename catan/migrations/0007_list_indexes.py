@@ -0,0 +1,21 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0006_action_log'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['winner', 'id'], name='game_winner_id'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['game_has_started', 'id'], name='room_started_id'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0007_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='road',
+            name='One Road per vertex in game',
+        ),
+        migrations.AlterUniqueTogether(
+            name='building',
+            unique_together={('game', 'level', 'index')},
+        ),
+        migrations.AddIndex(
+            model_name='building',
+            index=models.Index(fields=['owner', 'name'], name='building_owner_name'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['owner', 'name'], name='card_owner_name'),
+        ),
+        migrations.AddIndex(
+            model_name='hand',
+            index=models.Index(fields=['owner', 'last_gained'], name='hand_owner_last_gained'),
+        ),
+        migrations.AddIndex(
+            model_name='hexe',
+            index=models.Index(fields=['board', 'token'], name='hexe_board_token'),
+        ),
+        migrations.AddIndex(
+            model_name='road',
+            index=models.Index(fields=['game', 'level_2', 'index_2'], name='road_game_vertex_2'),
+        ),
+        migrations.AddConstraint(
+            model_name='road',
+            constraint=models.UniqueConstraint(fields=('game', 'level_1', 'index_1', 'level_2', 'index_2'), name='One Road per vertex in game'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='road',
+            name='One Road per vertex in game',
+        ),
+        migrations.AddField(
+            model_name='road',
+            name='edge',
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='road',
+            index=models.Index(fields=['game', 'level_1', 'index_1'], name='road_game_vertex_1'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:15
+
+from django.db import migrations
+
+# The edges of the board when the roads got their edge, sorted: the id
+# of an edge is its position (see aux.bitboard.edge_id)
+EDGES = (
+    ((0, 0), (0, 1)), ((0, 0), (0, 5)), ((0, 0), (1, 0)), ((0, 1), (0, 2)),
+    ((0, 1), (1, 3)), ((0, 2), (0, 3)), ((0, 2), (1, 6)), ((0, 3), (0, 4)),
+    ((0, 3), (1, 9)), ((0, 4), (0, 5)), ((0, 4), (1, 12)), ((0, 5), (1, 15)),
+    ((1, 0), (1, 1)), ((1, 0), (1, 17)), ((1, 1), (1, 2)), ((1, 1), (2, 1)),
+    ((1, 2), (1, 3)), ((1, 2), (2, 4)), ((1, 3), (1, 4)), ((1, 4), (1, 5)),
+    ((1, 4), (2, 6)), ((1, 5), (1, 6)), ((1, 5), (2, 9)), ((1, 6), (1, 7)),
+    ((1, 7), (1, 8)), ((1, 7), (2, 11)), ((1, 8), (1, 9)), ((1, 8), (2, 14)),
+    ((1, 9), (1, 10)), ((1, 10), (1, 11)), ((1, 10), (2, 16)),
+    ((1, 11), (1, 12)), ((1, 11), (2, 19)), ((1, 12), (1, 13)),
+    ((1, 13), (1, 14)), ((1, 13), (2, 21)), ((1, 14), (1, 15)),
+    ((1, 14), (2, 24)), ((1, 15), (1, 16)), ((1, 16), (1, 17)),
+    ((1, 16), (2, 26)), ((1, 17), (2, 29)), ((2, 0), (2, 1)),
+    ((2, 0), (2, 29)), ((2, 1), (2, 2)), ((2, 2), (2, 3)), ((2, 3), (2, 4)),
+    ((2, 4), (2, 5)), ((2, 5), (2, 6)), ((2, 6), (2, 7)), ((2, 7), (2, 8)),
+    ((2, 8), (2, 9)), ((2, 9), (2, 10)), ((2, 10), (2, 11)),
+    ((2, 11), (2, 12)), ((2, 12), (2, 13)), ((2, 13), (2, 14)),
+    ((2, 14), (2, 15)), ((2, 15), (2, 16)), ((2, 16), (2, 17)),
+    ((2, 17), (2, 18)), ((2, 18), (2, 19)), ((2, 19), (2, 20)),
+    ((2, 20), (2, 21)), ((2, 21), (2, 22)), ((2, 22), (2, 23)),
+    ((2, 23), (2, 24)), ((2, 24), (2, 25)), ((2, 25), (2, 26)),
+    ((2, 26), (2, 27)), ((2, 27), (2, 28)), ((2, 28), (2, 29))
+)
+EDGE_IDS = {edge: eid for eid, edge in enumerate(EDGES)}
+
+
+def set_road_edges(apps, schema_editor):
+    """
+    Set the edge of the roads. A road saved in both orders of its
+    vertices is the same edge, so only the first one is kept, and the
+    roads between vertices that aren't neighbors are removed.
+    """
+    Road = apps.get_model('catan', 'Road')
+    seen = set()
+    removed = []
+    for road in Road.objects.order_by('id').iterator():
+        edge = tuple(sorted([(road.level_1, road.index_1),
+                             (road.level_2, road.index_2)]))
+        road.edge = EDGE_IDS.get(edge)
+        if road.edge is None or (road.game_id, road.edge) in seen:
+            removed.append(road.id)
+            continue
+        seen.add((road.game_id, road.edge))
+        road.save(update_fields=['edge'])
+    Road.objects.filter(id__in=removed).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0009_road_edge'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_road_edges, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0010_road_edges'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='road',
+            name='edge',
+            field=models.IntegerField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='road',
+            constraint=models.UniqueConstraint(fields=('game', 'edge'), name='One Road per edge in game'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0011_road_edge_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='largest_army',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catan.Player'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='longest_road',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catan.Player'),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='knights',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:27
+
+import catan.engine.rules
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0012_awards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='deck',
+            field=models.CharField(default=catan.engine.rules.new_deck, max_length=25),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='deck_top',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.0.7 on 2026-10-18 12:27
+
+import random
+from django.db import migrations
+from django.db.models import Count
+
+# The development cards when the games got their deck, one letter per
+# card (see catan.engine.rules.new_deck)
+DECK = 'k' * 14 + 'v' * 5 + 'rr' + 'yy' + 'mm'
+
+
+def shuffle_decks(apps, schema_editor):
+    """
+    Give its own deck to each game (the default of the new field is the
+    same for all the rows). The cards that the players have are out of
+    the deck.
+    """
+    Game = apps.get_model('catan', 'Game')
+    for game in Game.objects.annotate(cards=Count('card')).order_by(
+            'id').iterator():
+        deck = list(DECK)
+        random.shuffle(deck)
+        game.deck = ''.join(deck)
+        game.deck_top = min(game.cards, len(deck))
+        game.save(update_fields=['deck', 'deck_top'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catan', '0013_game_deck'),
+    ]
+
+    operations = [
+        migrations.RunPython(shuffle_decks, migrations.RunPython.noop),
+    ]
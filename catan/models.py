@@ -1,11 +1,14 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.core.exceptions import ValidationError
-from random import random, shuffle, randint, choice
-from django.db.models import Q
+from random import random, shuffle, randint
+from django.db.models import Q, F, Case, When, Value
+from django.db.models.functions import Least
 import math
 from aux.json_load import VertexInfo, HexagonInfo
+from aux.bitboard import edge_id
+from catan.engine.rules import new_deck
 
 
 def generateHexesPositions():
@@ -33,7 +36,6 @@ def generateVertexPositions():
     return positions
 
 
-VERTEX_POSITIONS = generateVertexPositions()
 HEXE_POSITIONS = generateHexesPositions()
 
 
@@ -53,6 +55,11 @@ class Room(models.Model):
     board_id = models.IntegerField()
     game_has_started = models.BooleanField(default=False)
 
+    class Meta:
+        # The lists of open rooms are paginated by id
+        indexes = [models.Index(fields=['game_has_started', 'id'],
+                                name='room_started_id')]
+
     def is_full(self):
         return len(self.players.all()) == 4
 
@@ -139,6 +146,9 @@ class Hexe(models.Model):
 
     class Meta:
         unique_together = ['board', 'level', 'index']
+        # The producers of a token are searched in the board
+        indexes = [models.Index(fields=['board', 'token'],
+                                name='hexe_board_token')]
         ordering = ['id']
 
     def clean(self):
@@ -170,180 +180,39 @@ class Game(models.Model):
     winner = models.ForeignKey(User, related_name="game_winner",
                                on_delete=models.CASCADE,
                                blank=True, null=True)
+    # It's increased in each change of the state of the game
+    version = models.PositiveIntegerField(default=0)
+    # The rows of the pieces of an archived game were removed, and its
+    # state is only in the action log (see :model `StateSnapshot`)
+    archived = models.BooleanField(default=False)
+    # The players with the longest road and the largest army
+    # (see :func: `catan.engine.rules.award_holder`)
+    longest_road = models.ForeignKey('Player', related_name='+',
+                                     on_delete=models.SET_NULL,
+                                     blank=True, null=True)
+    largest_army = models.ForeignKey('Player', related_name='+',
+                                     on_delete=models.SET_NULL,
+                                     blank=True, null=True)
+    # The development cards, shuffled when the game is created (one
+    # letter per card, see :func: `catan.engine.rules.new_deck`), and
+    # the position of the next card to draw
+    deck = models.CharField(max_length=25, default=new_deck)
+    deck_top = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         unique_together = ['id', 'name']
         ordering = ['id']
+        # The lists of finished or unfinished games are paginated by id
+        indexes = [models.Index(fields=['winner', 'id'],
+                                name='game_winner_id')]
 
-    def exists_building(self, level, index):
-        """
-        Return true is there's a bulding in the
-        vertex position with gaven level and index
-        """
-        return Building.objects.filter(game=self, level=level,
-                                       index=index).exists()
-
-    def exists_road(self, level1, index1, level2, index2):
-        road_1 = Road.objects.filter(game=self,
-                                     level_1=level1, level_2=level2,
-                                     index_1=index1, index_2=index2
-                                     ).exists()
-        road_2 = Road.objects.filter(game=self,
-                                     level_2=level1, level_1=level2,
-                                     index_2=index1, index_1=index2
-                                     ).exists()
-        return road_1 or road_2
-
-    def check_not_building(self, level, index):
+    def bump_version(self):
         """
-        Returns True if there is no construction in the neighbors of the
-        VertexPosition entered by the player.
+        A method to increase the version of the game after a change
+        of its state, with one atomic update.
         """
-        list_build = Building.objects.filter(game=self)
-        list_vertex = VertexInfo(level, index)
-        for build in list_build:
-            for vertex in list_vertex:
-                if build.level == vertex[0] and \
-                   build.index == vertex[1]:
-                    return False
-        return True
-
-    def posibles_initial_settlements(self):
-        """
-        A function that obtains positions that the players might have
-        available to build settlements on the board during the
-        construction stage of a started game
-        """
-        vertex_available = VERTEX_POSITIONS
-        # Get all the buildings
-        buildings = Building.objects.filter(game=self)
-        if len(buildings) == 0:
-            return vertex_available
-        else:
-            for building in buildings:
-                building_vertex = [building.level, building.index]
-                if building_vertex in vertex_available:
-                    vertex_available.remove(building_vertex)
-                neighbors = VertexInfo(building.level, building.index)
-                for neighbor in neighbors:
-                    if neighbor in vertex_available:
-                        vertex_available.remove(neighbor)
-            return vertex_available
-
-    def move_robber(self, level, index):
-        hexe_robber = Hexe.objects.filter(board=self.board,
-                                          level=level,
-                                          index=index).get()
-        self.robber = hexe_robber
-        self.save()
-        self.current_turn.robber_moved = True
-        self.current_turn.save()
-
-    def robber_has_been_moved(self):
-        return self.current_turn.robber_moved
-
-    def is_new_robber_position(self, level, index):
-        return (self.robber.level != level) or (self.robber.index != index)
-
-    def get_sum_dices(self):
-        return sum(self.current_turn.get_dices())
-
-    def set_players_resources_not_last_gained(self):
-        """
-        A method to set the resources of a list of players
-        as not last gained.
-        """
-        players = Player.objects.filter(game=self)
-        for player in players:
-            player.set_not_last_gained()
-
-    def random_discard(self):
-        players = Player.objects.filter(game=self)
-        for player in players:
-            if len(Resource.objects.filter(owner=player)) > 7:
-                resources = Resource.objects.filter(owner=player)
-                res_pos = [i for i in range(0, len(resources))]
-                shuffle(res_pos)
-                res_pos = res_pos[0:math.floor(len(res_pos)/2)]
-                for elem in res_pos:
-                    resources[elem].delete()
-
-    def distribute_resources(self, hexes):
-        """
-        A method that takes a list of hexagons and a list of players.
-        For each hex on the list, check if each player on the list has
-        buildings at the vertices of that hex; if the player has them
-        increases his amount of resources.
-        Params:
-        @hexes: a list of selected objects Hexes of the board.
-        @players: a list of players of a started game.
-        @game: a started game.
-        """
-        players = Player.objects.filter(game=self)
-        if len(hexes) != 0:
-            for hexe in hexes:
-                hexe_level = hexe.level
-                hexe_index = hexe.index
-                hexe_neighbors = HexagonInfo(hexe_level, hexe_index)
-                for player in players:
-                    # get the buildings of the player
-                    buildings = Building.objects.filter(owner=player)
-                    if len(buildings) != 0:
-                        for building in buildings:
-                            building_vertex = [building.level,
-                                               building.index]
-                            if building_vertex in hexe_neighbors:
-                                if building.name == 'settlement':
-                                    player.gain_resources(hexe.terrain, 1)
-                                else:
-                                    player.gain_resources(hexe.terrain, 2)
-
-    def throw_dices(self, dice1=0, dice2=0):
-        """
-        A method that rolls the two dice at the begin of the turn and
-        distributes the resources according to the hexagons with the
-        token of the sum of the dice.
-        Params:
-        @dice1: the value of the dice1 (used only for testing).
-        @dice2: the value of the dice2 (used only for testing).
-        """
-        # Get the trow of dices and then sum them.
-        two_dices = self.current_turn.throw_two_dices(dice1, dice2)
-        sum_dices = sum(two_dices)
-        # Get the players of the games
-        if sum_dices == 7:
-            self.set_players_resources_not_last_gained()
-            self.random_discard()
-        else:
-            self.set_players_resources_not_last_gained()
-            # Get the hexes with this token from the board
-            hexes = Hexe.objects.filter(board=self.board, token=sum_dices)
-            # If the robber is in one hexes with the token of the sum
-            # then we must exclude it...
-            if hexes.filter(id=self.robber.id).exists():
-                hexes = hexes.exclude(id=self.robber.id)
-            # Then distribute_resources...
-            self.distribute_resources(hexes)
-
-    def can_change_turn(self):
-        game_stage = self.current_turn.game_stage
-        last_action = self.current_turn.last_action
-        if game_stage != 'FULL_PLAY':
-            if last_action != 'BUILD_ROAD':
-                return False
-        return True
-
-    def change_turn(self):
-        self.current_turn.set_new_turn()
-
-    def check_player_in_turn(self, player):
-        """
-        A method to check if the player is in turn in the given game.
-        Args:
-        @game: a started game.
-        @player: a player in the game.
-        """
-        return self.current_turn.user == player.username
+        Game.objects.filter(id=self.id).update(version=F('version') + 1)
+        self.refresh_from_db(fields=['version'])
 
 
 class Player(models.Model):
@@ -365,6 +234,8 @@ class Player(models.Model):
     colour = models.CharField(max_length=50, choices=COLOUR)
     victory_points = models.IntegerField(default=0,
                                          validators=[MinValueValidator(0)])
+    # The knight cards played, for the largest army
+    knights = models.PositiveIntegerField(default=0)
 
     class Meta:
         constraints = [
@@ -383,323 +254,22 @@ class Player(models.Model):
         resource_name: the type of resources to obtain.
         amount: the amount of resources to obtain.
         """
-        for i in range(amount):
-            Resource.objects.create(owner=self, game=self.game,
-                                    name=resource_name,
-                                    last_gained=True)
+        if amount > 0:
+            Hand.add_resources(self.game_id,
+                               {(self.id, resource_name): amount})
 
-    def gain_resources_free(self, position):
-        """
-        """
-        hexes = Hexe.objects.filter(board=self.game.board)
-        for hexe in hexes:
-            hexe_level = hexe.level
-            hexe_index = hexe.index
-            hexagon_neighbors = HexagonInfo(hexe_level, hexe_index)
-            if position in hexagon_neighbors:
-                if hexe.terrain != 'desert':
-                    self.gain_resources(hexe.terrain, 1)
-
-    def has_necessary_resources(self, action, gaven=''):
+    def get_hand(self):
         """
-        A method to check is the player has necessary resources for
-        do the desired action.
-        Args:
-        @action: the action of the player
-        @gave: optional, only used if the action is 'trade_bank'.
-               It's the type of resource that the player want to get.
-        """
-        NECESSARY_RESOURCES = {'build_settlement': ['brick', 'lumber',
-                                                    'wool', 'grain'],
-                               'build_road': ['brick', 'lumber'],
-                               'buy_card': ['ore', 'grain', 'wool']
-                               }
-        if gaven:
-            return Resource.objects.filter(owner=self,
-                                           name=gaven).count() >= 4
-        if action == 'upgrade_city':
-            amount_ore = Resource.objects.filter(owner=self,
-                                                 name='ore').count() >= 3
-            amount_grain = Resource.objects.filter(owner=self,
-                                                   name='grain').count() >= 2
-            return amount_ore and amount_grain
-        needed_resources = NECESSARY_RESOURCES[action]
-        for resource in needed_resources:
-            resource_exists = Resource.objects.filter(owner=self,
-                                                      name=resource).exists()
-            if (not resource_exists):
-                return False
-        return True
-
-    def can_trade_bank(self):
-        for resource in RESOURCE_TYPE:
-            if self.has_necessary_resources('trade_bank', resource[0]):
-                return True
-        return False
-
-    def delete_resources(self, action, gaven=''):
+        A method to get the amount of each resource of the player
+        with only one query.
         """
-        A method to delete the  necessary resources for
-        do the desired action.
-        Args:
-        @action: the action of the player
-        @gave: optional, only used if the action is 'trade_bank'.
-               It's the type of resource that the player want to get.
-        """
-        if action == 'monopoly':
-            count = Resource.objects.filter(owner=self, name=gaven).count()
-            if count != 0:
-                Resource.objects.filter(owner=self, name=gaven).delete()
-            return count
-        else:
-            NECESSARY_RESOURCES = {'build_settlement': ['brick', 'lumber',
-                                                        'wool', 'grain'],
-                                   'upgrade_city': 3*['ore'] + 2*['grain'],
-                                   'build_road': ['brick', 'lumber'],
-                                   'trade_bank': [gaven
-                                                  for resource in range(4)],
-                                   'buy_card': ['ore', 'grain', 'wool']}
-            used_resources = NECESSARY_RESOURCES[action]
-            for resource in used_resources:
-                Resource.objects.filter(owner=self, name=resource)[0].delete()
-
-    def check_my_road(self, level, index):
-        """
-        Returns True if there is one of the vertices of the player's paths
-        matches the VertexPosition entered by it.
-        """
-        return Road.objects.filter(Q(owner=self, game=self.game,
-                                   level_1=level, index_1=index) |
-                                   Q(owner=self, game=self.game,
-                                   level_2=level, index_2=index)).exists()
-
-    def check_roads_continuation(self, level1, index1, level2, index2):
-        road_1 = Road.objects.filter(Q(owner=self, game=self.game,
-                                     level_1=level1, index_1=index1) |
-                                     Q(owner=self, game=self.game,
-                                     level_2=level1, index_2=index1)
-                                     ).exists()
-        road_2 = Road.objects.filter(Q(owner=self, game=self.game,
-                                     level_1=level2, index_1=index2) |
-                                     Q(owner=self, game=self.game,
-                                     level_2=level2, index_2=index2)
-                                     ).exists()
-        building_1 = Building.objects.filter(owner=self, game=self.game,
-                                             level=level1, index=index1
-                                             ).exists()
-        building_2 = Building.objects.filter(owner=self, game=self.game,
-                                             level=level2, index=index2
-                                             ).exists()
-        return road_1 or road_2 or building_1 or building_2
-
-    def get_my_roads_and_buildings(self):
-        """
-        A function that obtains two set of vertex positions of
-        the roads and buildings of a given player.
-        Args:
-        """
-        roads = Road.objects.filter(owner=self)
-        vertex_roads = set()
-        for road in roads:
-            vertex = (road.level_1, road.index_1)
-            vertex_roads.add(vertex)
-            vertex = (road.level_2, road.index_2)
-            vertex_roads.add(vertex)
-        buildings = Building.objects.filter(owner=self)
-        vertex_buildings = set()
-        for build in buildings:
-            vertex = (build.level, build.index)
-            vertex_buildings.add(vertex)
-        return (vertex_roads, vertex_buildings)
-
-    def posibles_settlements(self):
-        """
-        A function that obtains positions that a player might have
-        available to build settlements on the board.
-        Args:
-        """
-        (vertex_roads, vertex_buildings) = self.get_my_roads_and_buildings()
-        # I get the vertices of my own roads that are not occupied by
-        # my buildings
-        available_vertex = vertex_roads - vertex_buildings
-        potencial_buildings = list(available_vertex)
-        potencial_buildings = [[pos[0], pos[1]] for pos in potencial_buildings]
-        available_vertex = [[pos[0], pos[1]] for pos in available_vertex]
-        # For each vertices check that their neighbors are not occupied,
-        # if they are it can not be built (distance rule)
-        for vertex in available_vertex:
-            # Get the neighbors of a vertex position
-            neighbors = VertexInfo(vertex[0], vertex[1])
-            for neighbor in neighbors:
-                # If there a building in one of the neighbors then
-                # the vertex couldn't have a new building...
-                if Building.objects.filter(level=neighbor[0],
-                                           index=neighbor[1]).exists():
-                    potencial_buildings.remove(vertex)
-                    break
-        return potencial_buildings
-
-    def get_potencial_roads(self, available_vertex):
-        """
-        A function that receives a list of available vertices and
-        returns a list of positions (ROAD_POSITIONS) in which roads
-        can be constructed from the vertices given in the list
-        Args:
-        @avalaible_vertex: a list of vertex positions (objects)
-        """
-        potencial_roads = []
-        for vertex in available_vertex:
-            vertex = list(vertex)
-            # Get the neighbors of a vertex
-            neighbors = VertexInfo(vertex[0], vertex[1])
-            for neighbor in neighbors:
-                if not Road.objects.filter(Q(level_1=vertex[0],
-                                             index_1=vertex[1],
-                                             level_2=neighbor[0],
-                                             index_2=neighbor[1]) |
-                                           Q(level_2=vertex[0],
-                                             index_2=vertex[1],
-                                             level_1=neighbor[0],
-                                             index_1=neighbor[1])).exists():
-                    new_road = [vertex, neighbor]
-                    potencial_roads.append(new_road)
-        return potencial_roads
-
-    def has_settlements(self, level=None, index=None):
-        if level and index:
-            return Building.objects.filter(owner=self, name='settlement',
-                                           game=self.game,
-                                           level=level, index=index).exists()
-        else:
-            return Building.objects.filter(owner=self, name='settlement',
-                                           game=self.game).exists()
-
-    def posibles_upgrades(self):
-        potencial_cities = []
-        setllements = Building.objects.filter(owner=self, name='settlement',
-                                              game=self.game)
-        for settle in setllements:
-            vertex = [settle.level, settle.index]
-            potencial_cities.append(vertex)
-        return potencial_cities
-
-    def posible_roads(self):
-        """
-        A function that obtains positions that a player might have
-        available to build roads on the board.
-        Args:
-        """
-        (vertex_roads, vertex_buildings) = self.get_my_roads_and_buildings()
-        available_vertex = vertex_buildings.union(vertex_roads)
-        potencial_roads = self.get_potencial_roads(available_vertex)
-        return potencial_roads
-
-    def posibles_initial_roads(self):
-        building = Building.objects.filter(owner=self).last()
-        potencial_roads = []
-        vertex = [building.level, building.index]
-        neighbors = VertexInfo(vertex[0], vertex[1])
-        for neighbor in neighbors:
-            vertex_position = [neighbor[0], neighbor[1]]
-            new_road = [vertex, vertex_position]
-            potencial_roads.append(new_road)
-        return potencial_roads
-
-    def posibles_roads_card_road_building(self):
-        """
-        A function that obtains posistions that a player might have
-        available to build the two roads using the Card road_building
-        Args:
-        @player: a player of a started game.
-        """
-        potencial_roads = self.posible_roads()
-        new_positions = []
-        for road in potencial_roads:
-            new_positions.append(road[1])
-        new_potencial_roads = self.get_potencial_roads(new_positions)
-        total_roads = potencial_roads + new_potencial_roads
-        # Remove the repeat road
-        final_roads = total_roads
-        for road in total_roads:
-            invert_road = [road[1], road[0]]
-            if invert_road in final_roads:
-                final_roads.remove(invert_road)
-        return final_roads
-
-    def is_winner(self):
-        points = self.victory_points
-        card_vic_points = Card.objects.filter(game=self.game, owner=self,
-                                              name='victory_point'
-                                              ).count()
-        total = points + card_vic_points
-        if total < 10:
-            return False
-        user = User.objects.get(username=self.username)
-        self.game.winner = user
-        self.game.save()
-        return True
+        hand = Hand.objects.filter(owner=self).values_list('name', 'amount')
+        return dict(hand)
 
     def gain_points(self, amount):
         self.victory_points += amount
         self.save()
 
-    def select_card(self):
-        available_cards = [ ('road_building', 'ROAD_BUILDING'),
-                            ('victory_point', 'VICTORY_POINT'),
-                            ('knight', 'KNIGHT')]
-        deck = available_cards * 5
-        shuffle(deck)
-        card_name = choice(deck)
-        new_card = Card(owner=self, game=self.game, name=card_name[0])
-        new_card.save()
-
-    def has_card(self, type_card):
-        return Card.objects.filter(owner=self, name=type_card).exists()
-
-    def get_players_to_steal(self, level, index):
-        owners = set()
-        neighbors = HexagonInfo(level, index)
-        for neighbor in neighbors:
-            if Building.objects.filter(level=neighbor[0],
-                                       index=neighbor[1],
-                                       game=self.game).exists():
-                owner = Building.objects.get(level=neighbor[0],
-                                             index=neighbor[1],
-                                             game=self.game).owner
-                if owner.username != self.username:
-                    owners.add(owner.username.username)
-        return list(owners)
-
-    def use_card(self, card_type):
-        Card.objects.filter(owner=self, name=card_type)[0].delete()
-
-    def steal_to(self, choosen_player):
-        user_to_steal = User.objects.get(username=choosen_player)
-        player_to_steal = Player.objects.get(username=user_to_steal,
-                                             game=self.game)
-        resources_list = Resource.objects.filter(owner=player_to_steal)
-        if len(resources_list) != 0:
-            resource_to_steal = resources_list[randint(0,
-                                               len(resources_list)-1)]
-            resource_to_steal.owner = self
-            resource_to_steal.last_gained = True
-            resource_to_steal.save()
-
-    def set_not_last_gained(self):
-        """
-        A method to remove resources as obtained in the last turn.
-        Args:
-        owner: the player who owns the resources.
-        """
-        # Get the last gained of the owner
-        resources_last_gained = Resource.objects.filter(last_gained=True,
-                                                        owner=self)
-        # Set the resources to False in last_gained field
-        if len(resources_last_gained) != 0:
-            for resource in resources_last_gained:
-                resource.last_gained = False
-                resource.save()
-
 
 class Card(models.Model):
     '''
@@ -708,7 +278,11 @@ class Card(models.Model):
     '''
     owner = models.ForeignKey(Player, on_delete=models.CASCADE)
     game = models.ForeignKey(Game, on_delete=models.CASCADE)
-    name = models.CharField(max_length=50, choices=CARD_TYPE + RESOURCE_TYPE)
+    name = models.CharField(max_length=50, choices=CARD_TYPE)
+
+    class Meta:
+        indexes = [models.Index(fields=['owner', 'name'],
+                                name='card_owner_name')]
 
     def clean(self):
         '''
@@ -718,12 +292,115 @@ class Card(models.Model):
             raise ValidationError('Cannot be player of other game')
 
 
-class Resource(Card):
+class Hand(models.Model):
     """
-    Stores information about a resource of a player in a started game,
-    related to :model `Player` and :model `Game`
+    Stores the amount of one type of resource of a player in a started
+    game (one row per player and resource), related to :model `Player`
+    and :model `Game`. last_gained is how many of them were gained
+    in the last turn.
     """
-    last_gained = models.BooleanField(default=False)
+    owner = models.ForeignKey(Player, related_name='hand',
+                              on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    name = models.CharField(max_length=50, choices=RESOURCE_TYPE)
+    amount = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    last_gained = models.IntegerField(default=0,
+                                      validators=[MinValueValidator(0)])
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'name'],
+                                    name='One hand per resource and player'),
+            models.CheckConstraint(check=Q(amount__gte=0),
+                                   name='Hand amount not negative'),
+        ]
+        # The hands of (owner, name) use the index of the constraint
+        indexes = [models.Index(fields=['owner', 'last_gained'],
+                                name='hand_owner_last_gained')]
+
+    def clean(self):
+        if self.owner.game.id != self.game.id:
+            raise ValidationError('Cannot be player of other game')
+
+    @staticmethod
+    def get_rows(amounts):
+        """
+        A method to get the hands of a dict of amounts.
+        Args:
+        amounts: a dict {(player_id, resource_name): amount}.
+        """
+        rows = Q()
+        for owner, name in amounts:
+            rows |= Q(owner=owner, name=name)
+        return Hand.objects.filter(rows)
+
+    @staticmethod
+    def get_amounts_case(amounts):
+        """
+        A method to get a SQL expression with the amount of each
+        row of a dict of amounts (0 for the other rows).
+        """
+        whens = [When(owner=owner, name=name, then=Value(amount))
+                 for (owner, name), amount in amounts.items()]
+        return Case(*whens, default=Value(0),
+                    output_field=models.IntegerField())
+
+    @staticmethod
+    def add_resources(game_id, amounts, new_turn=False):
+        """
+        A method to add resources to the hands (as last gained) with
+        one atomic update. The missing rows are created.
+        Args:
+        game_id: the id of the game of the players.
+        amounts: a dict {(player_id, resource_name): amount}.
+        new_turn: if True, the new resources are the only last gained
+                  resources of the game.
+        """
+        if new_turn:
+            hands = Hand.objects.filter(game=game_id)
+            if len(amounts) == 0:
+                hands.filter(last_gained__gt=0).update(last_gained=0)
+                return
+            case = Hand.get_amounts_case(amounts)
+            hands.update(amount=F('amount') + case, last_gained=case)
+        else:
+            if len(amounts) == 0:
+                return
+            case = Hand.get_amounts_case(amounts)
+            updated = Hand.get_rows(amounts).update(
+                amount=F('amount') + case,
+                last_gained=F('last_gained') + case)
+            if updated == len(amounts):
+                return
+        existing = set(Hand.get_rows(amounts).values_list('owner', 'name'))
+        missing = {key: amount for key, amount in amounts.items()
+                   if key not in existing}
+        try:
+            with transaction.atomic():
+                Hand.objects.bulk_create(
+                    [Hand(owner_id=owner, game_id=game_id, name=name,
+                          amount=amount, last_gained=amount)
+                     for (owner, name), amount in missing.items()])
+        except IntegrityError:
+            # Other request created the rows, so now they can be updated
+            Hand.add_resources(game_id, missing)
+
+    @staticmethod
+    def remove_resources(amounts):
+        """
+        A method to remove resources of the hands with one atomic
+        update. The resources not gained in the last turn are removed
+        first.
+        Args:
+        amounts: a dict {(player_id, resource_name): amount}.
+        """
+        if len(amounts) == 0:
+            return
+        case = Hand.get_amounts_case(amounts)
+        Hand.get_rows(amounts).update(
+            amount=F('amount') - case,
+            last_gained=Least(F('last_gained'), F('amount') - case))
 
 
 class Building(models.Model):
@@ -746,7 +423,11 @@ class Building(models.Model):
                                                        MaxValueValidator(29)])
 
     class Meta:
-        unique_together = ['level', 'index', 'game']
+        # The game goes first, so the index of the constraint is used
+        # by the queries of the buildings of a game too
+        unique_together = ['game', 'level', 'index']
+        indexes = [models.Index(fields=['owner', 'name'],
+                                name='building_owner_name')]
 
     def clean(self):
         if (self.level == 0) and not (0 <= self.index <= 5):
@@ -782,13 +463,29 @@ class Road(models.Model):
                                               MaxValueValidator(29)])
     game = models.ForeignKey(Game, on_delete=models.CASCADE,
                              related_name="road_game")
+    # The id of the edge between the vertices (see aux.bitboard.edge_id),
+    # the same for both orders of them. It's set when the road is saved
+    edge = models.IntegerField(editable=False)
 
     class Meta:
+        # A road and its reverse have the same edge
         constraints = [
-            models.UniqueConstraint(fields=['level_1', 'index_1',
-                                            'level_2', 'index_2', 'game'],
-                                    name='One Road per vertex in game')
+            models.UniqueConstraint(fields=['game', 'edge'],
+                                    name='One Road per edge in game')
             ]
+        # The roads of a vertex are searched by both ends
+        indexes = [models.Index(fields=['game', 'level_1', 'index_1'],
+                                name='road_game_vertex_1'),
+                   models.Index(fields=['game', 'level_2', 'index_2'],
+                                name='road_game_vertex_2')]
+
+    def save(self, *args, **kwargs):
+        self.edge = edge_id((self.level_1, self.index_1),
+                            (self.level_2, self.index_2))
+        if self.edge is None:
+            raise ValidationError(
+                'The vertices of the road must be neighbors.')
+        super().save(*args, **kwargs)
 
     def clean(self):
         levels_indexs = [(self.level_1, self.index_1),
@@ -803,6 +500,9 @@ class Road(models.Model):
             if (level_index[0] == 2) and not (0 <= level_index[1] <= 29):
                 raise ValidationError(
                     'The index with level 2 must be between 0 and 29.')
+        if edge_id(*levels_indexs) is None:
+            raise ValidationError(
+                'The vertices of the road must be neighbors.')
         if self.owner.game.id != self.game.id:
             raise ValidationError('Cannot be player of other game')
 
@@ -842,83 +542,41 @@ class Current_Turn(models.Model):
                                  default=1)
     robber_moved = models.BooleanField(default=False)
 
-    def throw_dice(self):
-        """
-        A function to generate a thow of dice
-        (uniform discrete distribution).
-        """
-        return 1 * int(6 * random()) + 1
-
-    def throw_two_dices(self, dice1=0, dice2=0):
-        """
-        A function to get the throw of two dices
-        Params:
-        @dice1: the value of the dice1 (used only for testing).
-        @dice2: the value of the dice2 (used only for testing).
-        """
-        if (dice1 == 0) and (dice2 == 0):
-            self.dices1 = self.throw_dice()
-            self.dices2 = self.throw_dice()
-            self.save()
-            return self.get_dices()
-        else:
-            return (dice1, dice2)
-
     def get_dices(self):
         return (self.dices1, self.dices2)
 
-    def set_new_turn(self):
-        """
-        A method to set a new player in turn on a given
-        current turn of a started game.
-        Args:
-        @current_turn: a Current_Turn object of a started game.
-        @ player: a player to set as new in the turn.
-        """
-        new_player = self.get_next_player()
-        self.user = new_player.username
-        self.last_action = 'NON_BLOCKING_ACTION'
-        self.robber_moved = False
-        self.save()
 
-    def get_next_player(self):
-        """
-        A method to get the next player in the turn of a
-        started game.
-        Args:
-        @current_turn: a Current_Turn object of a started game.
-        @players: a queryset of the players of a started game.
-        """
-        player_in_turn = Player.objects.get(username=self.user,
-                                            game=self.game)
-        # Get the number of the actual turn
-        actual_turn = player_in_turn.turn
-        # Calculate the next turn in the game...
-        # In the stage 'FIRST_CONSTRUCTION' and 'FULL_PLAY' the order
-        # is the natural, and in the stage 'SECOND_CONSTRUCTION' the order
-        # is the inverse
-        game_stage = self.game_stage
-        if game_stage == 'FIRST_CONSTRUCTION':
-            if actual_turn != 4:
-                next_turn = actual_turn + 1
-            else:
-                next_turn = actual_turn
-                self.game_stage = 'SECOND_CONSTRUCTION'
-                self.save()
-        elif game_stage == 'SECOND_CONSTRUCTION':
-            if actual_turn != 1:
-                next_turn = actual_turn - 1
-            else:
-                next_turn = actual_turn
-                self.game_stage = 'FULL_PLAY'
-                self.game.throw_dices()
-                self.save()
-        else:
-            if actual_turn == 4:
-                next_turn = 1
-            else:
-                next_turn = actual_turn + 1
-        # Get the player with the next turn
-        next_player = Player.objects.get(turn=next_turn,
-                                         game=self.game)
-        return next_player
+class GameAction(models.Model):
+    """
+    Stores one accepted action of the player in turn of a started game
+    (the action log of the game), related to :model `Game` and
+    :model `auth.User`. data is the json of the payload of the action
+    and its random outcomes (see :mod: `catan.engine.log`).
+    """
+    game = models.ForeignKey(Game, related_name='actions',
+                             on_delete=models.CASCADE)
+    number = models.PositiveIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    action = models.CharField(max_length=50)
+    data = models.TextField()
+
+    class Meta:
+        unique_together = ['game', 'number']
+        ordering = ['game', 'number']
+
+
+class StateSnapshot(models.Model):
+    """
+    Stores the whole state of a started game after its action number
+    `number` (as json, see :mod: `catan.engine.log`), related to
+    :model `Game`. A game is rebuilt from its last snapshot and the
+    actions logged after it.
+    """
+    game = models.ForeignKey(Game, related_name='snapshots',
+                             on_delete=models.CASCADE)
+    number = models.PositiveIntegerField()
+    state = models.TextField()
+
+    class Meta:
+        unique_together = ['game', 'number']
+        ordering = ['game', 'number']
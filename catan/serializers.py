@@ -78,12 +78,6 @@ class CardSerializer(serializers.ModelSerializer):
         fields = ['name']
 
 
-class ResourceSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Resource
-        fields = ['name']
-
-
 class HexeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Hexe
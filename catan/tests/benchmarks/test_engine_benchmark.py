@@ -0,0 +1,86 @@
+import random
+import time
+import timeit
+import pytest
+from aux.bitboard import HEXES, vertex_id
+from aux.topology import HEXE_VERTICES
+from catan.engine.actions import posible_robber_positions
+from catan.engine.simulation import random_state, play_random_game
+
+
+GAMES = 20
+ACTIONS = 500
+
+
+def legacy_robber_positions(state, player):
+    """
+    The old payload: the players are scanned for each vertex of each
+    hexagon.
+    """
+    data = []
+    for hexe in HEXES:
+        if hexe == state.robber:
+            continue
+        players = []
+        for vertex in HEXE_VERTICES[hexe]:
+            bit = 1 << vertex_id(*vertex)
+            for owner in state.players:
+                if (owner.settlements | owner.cities) & bit and \
+                        owner is not player and \
+                        owner.username not in players:
+                    players.append(owner.username)
+        data.append({'position': {'level': hexe[0], 'index': hexe[1]},
+                     'players': players})
+    return data
+
+
+def play_games(rng):
+    """
+    Play GAMES random games of ACTIONS actions. Return the number of
+    actions played and the final states.
+    """
+    total = 0
+    states = []
+    for i in range(GAMES):
+        state = random_state(rng)
+        played, log = play_random_game(state, ACTIONS, rng)
+        total += played
+        states.append(state)
+    return (total, states)
+
+
+class TestEngineBenchmark:
+    def test_random_games(self):
+        total, states = play_games(random.Random(2020))
+        assert 'FULL_PLAY' in {state.turn.game_stage for state in states}
+        for state in states:
+            for player in state.players:
+                assert all(amount >= 0 for amount in player.hand.values())
+
+    @pytest.mark.benchmark
+    def test_actions_per_second(self):
+        begin = time.monotonic()
+        total, states = play_games(random.Random(2020))
+        assert total / (time.monotonic() - begin) > 1000
+
+    def test_robber_payload(self):
+        rng = random.Random(2020)
+        state = random_state(rng)
+        play_random_game(state, ACTIONS, rng)
+        player = state.players[0]
+        assert posible_robber_positions(state, player) == \
+            legacy_robber_positions(state, player)
+
+    @pytest.mark.benchmark
+    def test_robber_payload_time(self):
+        rng = random.Random(2020)
+        state = random_state(rng)
+        play_random_game(state, ACTIONS, rng)
+        player = state.players[0]
+        legacy = min(timeit.repeat(
+            lambda: legacy_robber_positions(state, player),
+            number=100, repeat=3))
+        indexed = min(timeit.repeat(
+            lambda: posible_robber_positions(state, player),
+            number=100, repeat=3))
+        assert indexed < legacy
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+import pytest
+from django.contrib.auth.models import User
+from django.test import override_settings
+from mixer.backend.django import mixer
+from asgiref.testing import ApplicationCommunicator
+from catan.events import GameHub, HUB
+from catan.views.events_views import GameEventStream, make_stream_token
+
+
+SUBSCRIBERS = 1000
+STREAMS = 300
+EVENTS = 20
+
+
+def not_found_application(scope, receive, send):
+    raise AssertionError('The request must not go to Django')
+
+
+async def hub_fan_out(hub, subscribers, events):
+    """
+    Subscribe to one game, publish the events from other thread (like
+    the views do) and wait until every subscriber has all of them.
+    """
+    queues = [hub.subscribe(1) for i in range(subscribers)]
+
+    async def consume(subscriber):
+        for i in range(events):
+            await subscriber.get()
+
+    consumers = [asyncio.ensure_future(consume(subscriber))
+                 for subscriber in queues]
+    begin = time.monotonic()
+    publisher = threading.Thread(
+        target=lambda: [hub.publish(1, 'dice_rolled', {'dices': [3, 4]})
+                        for i in range(events)])
+    publisher.start()
+    await asyncio.wait_for(asyncio.gather(*consumers), 30)
+    elapsed = time.monotonic() - begin
+    publisher.join()
+    assert not any(subscriber.lagging for subscriber in queues)
+    return elapsed
+
+
+class TestEventsBenchmark:
+    def test_hub_fan_out(self):
+        asyncio.run(hub_fan_out(GameHub(), SUBSCRIBERS, EVENTS))
+
+    @pytest.mark.benchmark
+    def test_hub_fan_out_time(self):
+        assert asyncio.run(hub_fan_out(GameHub(), SUBSCRIBERS, EVENTS)) < 10
+
+
+def get_scope(pk, token):
+    path = '/games/%s/events/' % pk
+    return {'type': 'http', 'method': 'GET', 'path': path,
+            'raw_path': path.encode(), 'root_path': '', 'scheme': 'http',
+            'query_string': ('token=%s' % token).encode(),
+            'http_version': '1.1', 'server': ('testserver', 80),
+            'client': ('127.0.0.1', 5000),
+            'headers': [(b'host', b'testserver')]}
+
+
+async def stream_fan_out(pk, token, streams, events):
+    """
+    Open the SSE streams of one game, publish the events and wait until
+    every stream has sent all of them.
+    """
+    application = GameEventStream(not_found_application)
+    communicators = []
+    for i in range(streams):
+        communicator = ApplicationCommunicator(application,
+                                               get_scope(pk, token))
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        communicators.append(communicator)
+    for communicator in communicators:
+        start = await communicator.receive_output(10)
+        assert start['status'] == 200
+        await communicator.receive_output(10)
+    assert HUB.subscribers_count(pk) == streams
+    begin = time.monotonic()
+    publisher = threading.Thread(
+        target=lambda: [HUB.publish(pk, 'dice_rolled', {'dices': [3, 4]})
+                        for i in range(events)])
+    publisher.start()
+
+    async def read(communicator):
+        for i in range(events):
+            message = await communicator.receive_output(10)
+            assert message['body'].startswith(b'id: ')
+
+    await asyncio.gather(*[read(communicator)
+                           for communicator in communicators])
+    elapsed = time.monotonic() - begin
+    publisher.join()
+    for communicator in communicators:
+        await communicator.send_input({'type': 'http.disconnect'})
+    for communicator in communicators:
+        await communicator.wait(10)
+    assert HUB.subscribers_count(pk) == 0
+    return elapsed
+
+
+def spectated_game():
+    """
+    A game and a stream token of a spectator.
+    """
+    user = mixer.blend(User, username='Spectator')
+    board = mixer.blend('catan.Board', name='Colonos')
+    hexe = mixer.blend('catan.Hexe', level=0, index=0, board=board)
+    game = mixer.blend('catan.Game', name='juego1', board=board, robber=hexe)
+    return (game.id, make_stream_token(game.id, user.id))
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(EVENTS_KEEPALIVE=60)
+def test_stream_fan_out():
+    pk, token = spectated_game()
+    asyncio.run(stream_fan_out(pk, token, STREAMS, EVENTS))
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+@override_settings(EVENTS_KEEPALIVE=60)
+def test_stream_fan_out_time():
+    pk, token = spectated_game()
+    assert asyncio.run(stream_fan_out(pk, token, STREAMS, EVENTS)) < 10
@@ -0,0 +1,119 @@
+"""
+The longest road of the worst road networks of a player (15 roads, the
+most that a player can build, with as many cycles and branches as the
+board allows), built road by road. After each road the length is
+searched again from every vertex of the whole network, as it was done
+before, and with RoadLengths, that only searches the part of the network
+with the new road.
+"""
+import timeit
+import pytest
+from aux.bitboard import (EDGE_VERTICES_MASK, edge_id, iter_bits,
+                          edges_vertices_mask, trail_from, vertices_mask,
+                          RoadLengths)
+from aux.topology import HEXE_VERTICES, VERTEX_HEXES
+
+
+MAX_ROADS = 15
+
+
+def hexagon_roads(*hexes):
+    """
+    The mask of the sides of some hexagons.
+    """
+    mask = 0
+    for hexe in hexes:
+        vertices = HEXE_VERTICES[hexe]
+        for i, vertex in enumerate(vertices):
+            mask |= 1 << edge_id(vertex, vertices[(i + 1) % len(vertices)])
+    return mask
+
+
+def path_roads(*vertices):
+    mask = 0
+    for vertex_1, vertex_2 in zip(vertices, vertices[1:]):
+        mask |= 1 << edge_id(vertex_1, vertex_2)
+    return mask
+
+
+def build_order(roads):
+    """
+    The roads of a network in an order that a player can build them:
+    each one touches the roads built before, if its part has any.
+    """
+    order = []
+    built = 0
+    while roads:
+        vertices = edges_vertices_mask(built)
+        touching = [eid for eid in iter_bits(roads)
+                    if EDGE_VERTICES_MASK[eid] & vertices]
+        eid = touching[0] if touching else min(iter_bits(roads))
+        order.append(eid)
+        built |= 1 << eid
+        roads &= ~(1 << eid)
+    return order
+
+
+def full_search(roads, blockers=0):
+    """
+    The old search: the longest trail from every vertex of all the
+    roads, without splitting them in parts.
+    """
+    return max((trail_from(vid, roads, blockers)
+                for vid in iter_bits(edges_vertices_mask(roads))), default=0)
+
+
+NETWORKS = {
+    # The three hexagons around a vertex, 15 roads with 3 cycles
+    'three_hexagons': (hexagon_roads(*VERTEX_HEXES[(0, 0)]), 0),
+    # Two hexagons and a separated path
+    'two_parts': (hexagon_roads((0, 0), (1, 0)) |
+                  path_roads(*[(2, i) for i in range(20, 25)]), 0),
+    # The three hexagons cut by the buildings of the other players
+    'blocked': (hexagon_roads(*VERTEX_HEXES[(0, 0)]),
+                vertices_mask([(0, 0), (1, 3)])),
+}
+
+
+def build_network(roads, blockers, search):
+    """
+    The lengths after each new road of a network.
+    """
+    built = 0
+    lengths = []
+    for eid in build_order(roads):
+        built |= 1 << eid
+        lengths.append(search(built, blockers))
+    return lengths
+
+
+class TestLongestRoadBenchmark:
+    def test_worst_networks(self):
+        for name, (roads, blockers) in NETWORKS.items():
+            assert bin(roads).count('1') == MAX_ROADS
+            full = build_network(roads, blockers, full_search)
+            lengths = RoadLengths()
+            assert build_network(roads, blockers, lengths.get) == full
+
+    @pytest.mark.benchmark
+    def test_worst_networks_time(self):
+        total_legacy = 0
+        total_incremental = 0
+        for name, (roads, blockers) in NETWORKS.items():
+            total_legacy += min(timeit.repeat(
+                lambda: build_network(roads, blockers, full_search),
+                number=3, repeat=3))
+            total_incremental += min(timeit.repeat(
+                lambda: build_network(roads, blockers, RoadLengths().get),
+                number=3, repeat=3))
+        assert total_incremental < total_legacy
+
+    def test_blocking_settlement(self):
+        roads, blockers = NETWORKS['two_parts']
+        lengths = RoadLengths()
+        assert lengths.get(roads) == full_search(roads)
+        searched = len(lengths.lengths)
+        # A settlement of other player on the path only searches the path
+        blocker = vertices_mask([(2, 22)])
+        assert lengths.get(roads, blocker) == full_search(roads, blocker)
+        assert len(lengths.lengths) == searched + 2
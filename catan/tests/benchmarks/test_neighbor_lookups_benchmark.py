@@ -0,0 +1,91 @@
+"""
+The players to steal around a hexagon, with many games in the database:
+the old lookup (an exists() and a get() for each vertex of the hexagon)
+against the engine, that loads the pieces of the game once and indexes
+its buildings by vertex. The queries of the engine don't depend on the
+other games nor on the hexagons.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from aux.bitboard import VERTICES
+from aux.json_load import HexagonInfo
+from aux.generateBoard import generateBoard
+from catan.models import Game, Player, Building, Hexe, HEXE_POSITIONS
+from catan.engine.persistence import load_game
+from catan.engine.rules import get_players_to_steal
+
+
+GAMES = 200
+
+
+def legacy_players_to_steal(player, level, index):
+    """
+    The old lookup: two queries for each vertex with a building.
+    """
+    owners = set()
+    for neighbor in HexagonInfo(level, index):
+        if Building.objects.filter(level=neighbor[0], index=neighbor[1],
+                                   game=player.game).exists():
+            owner = Building.objects.get(level=neighbor[0],
+                                         index=neighbor[1],
+                                         game=player.game).owner
+            if owner.username != player.username:
+                owners.add(owner.username.username)
+    return list(owners)
+
+
+def all_hexes(player):
+    return [sorted(legacy_players_to_steal(player, hexe[0], hexe[1]))
+            for hexe in HEXE_POSITIONS]
+
+
+def engine_all_hexes(player):
+    state = load_game(player.game_id)
+    player = state.get_player(player.id)
+    return [sorted(get_players_to_steal(state, player, hexe[0], hexe[1]))
+            for hexe in HEXE_POSITIONS]
+
+
+@pytest.fixture
+def games(db):
+    """
+    GAMES games of four players, with three buildings per player.
+    """
+    board = generateBoard('Colonos')
+    robber = Hexe.objects.filter(board=board, terrain='desert').first()
+    users = [User.objects.create(username=name)
+             for name in ['Nico', 'Pablo', 'Carlos', 'Ana']]
+    games = Game.objects.bulk_create(
+        [Game(name='game%d' % i, board=board, robber=robber)
+         for i in range(GAMES)])
+    if games[0].id is None:
+        games = list(Game.objects.order_by('id'))
+    players = Player.objects.bulk_create(
+        [Player(username=user, game=game, turn=turn + 1,
+                colour=Player.COLOUR[turn][0])
+         for game in games for turn, user in enumerate(users)])
+    if players[0].id is None:
+        players = list(Player.objects.order_by('id'))
+    buildings = []
+    for number, player in enumerate(players):
+        # Each game has the same buildings in other order
+        first = (number + number // 4) % 4
+        for level, index in VERTICES[first * 12:first * 12 + 12:4]:
+            buildings.append(Building(game_id=player.game_id, owner=player,
+                                      name='settlement',
+                                      level=level, index=index))
+    Building.objects.bulk_create(buildings)
+    return games
+
+
+def test_players_to_steal(games):
+    player = Player.objects.get(game=games[-1], turn=1)
+    with CaptureQueriesContext(connection) as legacy_queries:
+        legacy = all_hexes(player)
+    with CaptureQueriesContext(connection) as queries:
+        assert engine_all_hexes(player) == legacy
+    # The load of the game, whatever the number of games and hexagons
+    assert len(queries) == 7
+    assert len(queries) * 10 < len(legacy_queries)
@@ -0,0 +1,157 @@
+"""
+The query budget of the endpoints: each url of catan/urls.py is called
+on a game in the middle of the play (four players with buildings,
+roads, resources and cards, and other games and rooms around it) and
+the number of queries can't be more than its budget, so a view that
+makes one query per player or per game fails here.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from aux.bitboard import VERTICES, EDGE_LIST, edge_id
+from aux.generateBoard import generateBoard
+from catan.models import (Game, Player, Building, Road, Card, Hand,
+                          Current_Turn, Hexe, Room)
+from catan.urls import urlpatterns
+
+
+GAMES = 10
+ROOMS = 10
+USERNAMES = ['Nico', 'Pablo', 'Carlos', 'Ana']
+
+
+def build_game(board, users, name):
+    """
+    A method to create a game in the full play where each player has
+    three settlements, a city, eight roads, resources and cards.
+    """
+    robber = Hexe.objects.filter(board=board, terrain='desert').first()
+    game = Game.objects.create(name=name, board=board, robber=robber)
+    players = [Player.objects.create(username=user, game=game, turn=turn + 1,
+                                     colour=Player.COLOUR[turn][0],
+                                     victory_points=5)
+               for turn, user in enumerate(users)]
+    Current_Turn.objects.create(game=game, user=users[0],
+                                game_stage='FULL_PLAY', dices1=3, dices2=2)
+    buildings = []
+    roads = []
+    cards = []
+    hands = []
+    for number, player in enumerate(players):
+        for i, vertex in enumerate(VERTICES[number * 12:number * 12 + 8:2]):
+            buildings.append(Building(
+                game=game, owner=player, level=vertex[0], index=vertex[1],
+                name='city' if i == 0 else 'settlement'))
+        for vertex_1, vertex_2 in EDGE_LIST[number * 16:number * 16 + 8]:
+            roads.append(Road(game=game, owner=player,
+                              level_1=vertex_1[0], index_1=vertex_1[1],
+                              level_2=vertex_2[0], index_2=vertex_2[1],
+                              edge=edge_id(vertex_1, vertex_2)))
+        for name in ['knight', 'road_building', 'victory_point']:
+            cards.append(Card(game=game, owner=player, name=name))
+        for name in ['brick', 'lumber', 'wool', 'grain', 'ore']:
+            hands.append(Hand(game=game, owner=player, name=name, amount=4,
+                              last_gained=1))
+    Building.objects.bulk_create(buildings)
+    Road.objects.bulk_create(roads)
+    Card.objects.bulk_create(cards)
+    Hand.objects.bulk_create(hands)
+    return game
+
+
+@pytest.fixture
+def world(db, settings):
+    """
+    The games, the rooms and the users of the endpoints.
+    """
+    # The time of the login is not the time of hashing the password
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher']
+    board = generateBoard('Colonos')
+    users = [User.objects.create_user(username=name, password='secret')
+             for name in USERNAMES + ['Lucia']]
+    games = [build_game(board, users[:4], 'game%d' % i)
+             for i in range(GAMES)]
+    rooms = []
+    for i in range(ROOMS):
+        room = Room.objects.create(name='room%d' % i, owner=users[0],
+                                   board_id=board.id)
+        room.players.set(users[:3] if i else users[:4])
+        rooms.append(room)
+    return {'board': board, 'users': users, 'game': games[0],
+            'rooms': rooms}
+
+
+def in_turn(world):
+    return {'pk': world['game'].id}
+
+
+def first_room(world):
+    return {'pk': world['rooms'][0].id}
+
+
+def second_room(world):
+    return {'pk': world['rooms'][1].id}
+
+
+def refresh(world):
+    return {'refresh': str(RefreshToken.for_user(world['users'][0]))}
+
+
+# (case, method, url name, kwargs, data, user, status, budget)
+CASES = [
+    ('list_rooms', 'get', 'list_rooms', None, None, 0, 200, 2),
+    ('create_room', 'post', 'list_rooms', None,
+     lambda world: {'name': 'new', 'owner': 'Nico', 'players': [],
+                    'board_id': world['board'].id}, 0, 201, 8),
+    ('room', 'get', 'join_room', second_room, None, 0, 200, 3),
+    ('join_room', 'put', 'join_room', second_room, None, 4, 204, 15),
+    ('start_game', 'patch', 'join_room', first_room, None, 0, 204, 15),
+    ('delete_room', 'delete', 'join_room', second_room, None, 0, 204,
+     4),
+    ('login', 'post', 'tokenObtainPair', None,
+     lambda world: {'user': 'Nico', 'pass': 'secret'}, None, 201, 2),
+    ('refresh_token', 'post', 'refreshToken', None, refresh, None, 200,
+     0),
+    ('register', 'post', 'register', None,
+     lambda world: {'user': 'Juan', 'pass': 'secret'}, None, 200, 2),
+    ('actions', 'get', 'PlayerActions', in_turn, None, 0, 200, 9),
+    ('actions_not_in_turn', 'get', 'PlayerActions', in_turn, None, 1, 200,
+     3),
+    ('bank_trade', 'post', 'PlayerActions', in_turn,
+     lambda world: {'type': 'bank_trade',
+                    'payload': {'give': 'ore', 'receive': 'brick'}},
+     0, 200, 28),
+    ('player', 'get', 'PlayerInfo', in_turn, None, 0, 200, 5),
+    ('snapshot', 'get', 'GameSnapshot', in_turn, None, 0, 200, 9),
+    ('snapshot_without_board', 'get', 'GameSnapshot', in_turn,
+     lambda world: {'board': 'false'}, 0, 200, 8),
+    ('events_token', 'get', 'EventsToken', in_turn, None, 0, 200, 1),
+    ('game', 'get', 'GameInfo', in_turn, None, 0, 200, 7),
+    ('games', 'get', 'Games', None, None, 0, 200, 1),
+    ('boards', 'get', 'Boards', None, None, 0, 200, 1),
+    ('board', 'get', 'BoardInfo', in_turn, None, 0, 200, 2),
+]
+
+
+def test_all_urls_have_budget():
+    names = {pattern.name for pattern in urlpatterns}
+    assert names == {case[2] for case in CASES}
+
+
+@pytest.mark.parametrize('case', CASES, ids=[case[0] for case in CASES])
+def test_query_budget(world, case):
+    name, method, url_name, kwargs, data, user, code, budget = case
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user=world['users'][user])
+    path = reverse(url_name, kwargs=kwargs(world) if kwargs else None)
+    data = data(world) if data else None
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(path, data, format='json')
+    assert response.status_code == code
+    assert len(queries) <= budget
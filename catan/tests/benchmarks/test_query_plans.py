@@ -0,0 +1,86 @@
+"""
+The plans of the hot queries of the games: each one must be answered
+with an index of its table that has all the filtered columns (see the
+indexes of catan/models.py), never scanning the whole table. The plans
+are read with EXPLAIN, so this runs on SQLite and on Postgres. On
+Postgres the sequential scans are turned off, because with the few rows
+of a test the planner prefers them even if there is an index.
+"""
+import re
+import pytest
+from django.db import connection
+from catan.models import Hand, Card, Building, Road, Hexe
+
+
+# (case, table, columns of the index, queryset)
+HOT_QUERIES = [
+    ('hand_of_resource', 'catan_hand', ['owner_id', 'name'],
+     lambda: Hand.objects.filter(owner=1, name='ore')),
+    ('hand_last_gained', 'catan_hand', ['owner_id', 'last_gained'],
+     lambda: Hand.objects.filter(owner=1, last_gained__gt=0)),
+    ('cards_of_type', 'catan_card', ['owner_id', 'name'],
+     lambda: Card.objects.filter(owner=1, name='knight')),
+    ('building_in_vertex', 'catan_building', ['game_id', 'level', 'index'],
+     lambda: Building.objects.filter(game=1, level=1, index=2)),
+    ('settlements_of_player', 'catan_building', ['owner_id', 'name'],
+     lambda: Building.objects.filter(owner=1, name='settlement')),
+    ('roads_from_vertex', 'catan_road', ['game_id', 'level_1', 'index_1'],
+     lambda: Road.objects.filter(game=1, level_1=1, index_1=2)),
+    ('roads_to_vertex', 'catan_road', ['game_id', 'level_2', 'index_2'],
+     lambda: Road.objects.filter(game=1, level_2=1, index_2=2)),
+    ('road_of_edge', 'catan_road', ['game_id', 'edge'],
+     lambda: Road.objects.filter(game=1, edge=10)),
+    ('producers_of_token', 'catan_hexe', ['board_id', 'token'],
+     lambda: Hexe.objects.filter(board=1, token=8)),
+]
+
+
+def index_columns(plan):
+    """
+    A method to get the columns searched with an index in a plan.
+    Args:
+    plan: the output of EXPLAIN.
+    """
+    if connection.vendor == 'postgresql':
+        conditions = re.findall(r'Index Cond: (.*)', plan)
+    else:
+        conditions = re.findall(r'SEARCH .* USING .*INDEX .*\((.*)\)', plan)
+    # The columns of Postgres can be cast, as in ((name)::text = 'ore')
+    return set(re.findall(r'"?(\w+)"?\)?(?:::[\w ]+)? ?[=<>]',
+                          ' '.join(conditions)))
+
+
+def is_full_scan(plan, table):
+    """
+    A method to check if a plan reads all the rows of a table.
+    Args:
+    plan: the output of EXPLAIN.
+    table: the name of the table.
+    """
+    if connection.vendor == 'postgresql':
+        return re.search(r'Seq Scan on "?%s"?\b' % table, plan) is not None
+    # SQLite searches with an index and scans without it (or with an
+    # index that doesn't match the filter)
+    return re.search(r'\bSCAN (TABLE )?%s\b' % table, plan) is not None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('case', HOT_QUERIES,
+                         ids=[case[0] for case in HOT_QUERIES])
+def test_hot_query_uses_index(case):
+    name, table, columns, queryset = case
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    plan = queryset().explain()
+    assert not is_full_scan(plan, table)
+    assert set(columns) <= index_columns(plan)
+
+
+@pytest.mark.django_db
+def test_missing_index_is_detected():
+    # The filters without an index of their own must fail the test above
+    plan = Hand.objects.filter(amount=3).explain()
+    assert is_full_scan(plan, 'catan_hand')
+    plan = Hand.objects.filter(owner=1, amount=3).explain()
+    assert 'amount' not in index_columns(plan)
@@ -0,0 +1,54 @@
+import json
+import random
+import time
+import pytest
+from catan.engine.log import dump_state, load_state, replay
+from catan.engine.simulation import random_state, play_random_game
+
+
+GAMES = 20
+ACTIONS = 500
+
+
+def play_games(rng):
+    """
+    Play GAMES random games of ACTIONS actions. Return the final state,
+    the first snapshot and the log (saved as json) of each game.
+    """
+    games = []
+    for i in range(GAMES):
+        state = random_state(rng)
+        snapshot = json.dumps(dump_state(state))
+        played, log = play_random_game(state, ACTIONS, rng)
+        games.append((state, snapshot, json.loads(json.dumps(log))))
+    return games
+
+
+def replay_games(games):
+    """
+    Replay the logs of the games over their first snapshot. Return the
+    number of actions replayed and the replayed states.
+    """
+    total = 0
+    states = []
+    for state, snapshot, log in games:
+        replayed = load_state(json.loads(snapshot), state.id,
+                              state.board_id, state.hexes)
+        total += replay(replayed, log)
+        states.append(replayed)
+    return (total, states)
+
+
+class TestReplayBenchmark:
+    def test_replay(self):
+        games = play_games(random.Random(2021))
+        total, states = replay_games(games)
+        for (state, snapshot, log), replayed in zip(games, states):
+            assert dump_state(replayed) == dump_state(state)
+
+    @pytest.mark.benchmark
+    def test_actions_per_second(self):
+        games = play_games(random.Random(2021))
+        begin = time.monotonic()
+        total, states = replay_games(games)
+        assert total / (time.monotonic() - begin) > 5000
@@ -0,0 +1,61 @@
+import json
+import os
+import timeit
+import pytest
+import aux
+from aux.json_load import HexagonInfo, VertexInfo
+from catan.models import generateHexesPositions, generateVertexPositions
+
+
+MYDIR = os.path.dirname(aux.__file__)
+
+
+def legacy_hexagon_info(level, index):
+    """
+    The old lookup: open, parse and scan the file in each call.
+    """
+    with open(os.path.join(MYDIR, 'hexe_neighbors.json')) as file:
+        data = json.load(file)
+        for aux_data in data['data']:
+            hexagon = aux_data['hexagono']
+            if level == hexagon[0] and index == hexagon[1]:
+                return aux_data['vecinos']
+
+
+def legacy_vertex_info(level, index):
+    with open(os.path.join(MYDIR, 'vertex_neighbors.json')) as file:
+        data = json.load(file)
+        for aux_data in data['data']:
+            vertex = aux_data['vertice']
+            if level == vertex[0] and index == vertex[1]:
+                return aux_data['vecinos']
+
+
+def actions_poll(hexagon_info, vertex_info):
+    """
+    The lookups of one actions poll in the worst case: the robber
+    positions (one lookup per hexagon) and the settlements and roads
+    (one lookup per vertex).
+    """
+    for hexe in generateHexesPositions():
+        hexagon_info(hexe[0], hexe[1])
+    for vertex in generateVertexPositions():
+        vertex_info(vertex[0], vertex[1])
+
+
+class TestTopologyBenchmark:
+    def test_same_results(self):
+        for hexe in generateHexesPositions():
+            assert HexagonInfo(*hexe) == legacy_hexagon_info(*hexe)
+        for vertex in generateVertexPositions():
+            assert VertexInfo(*vertex) == legacy_vertex_info(*vertex)
+
+    @pytest.mark.benchmark
+    def test_per_request_savings(self):
+        legacy = min(timeit.repeat(
+            lambda: actions_poll(legacy_hexagon_info, legacy_vertex_info),
+            number=5, repeat=3))
+        indexed = min(timeit.repeat(
+            lambda: actions_poll(HexagonInfo, VertexInfo),
+            number=5, repeat=3))
+        assert indexed * 10 < legacy
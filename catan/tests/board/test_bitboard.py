@@ -0,0 +1,107 @@
+import pytest
+from aux.bitboard import (ALL_EDGES, ALL_VERTICES, EDGE_LIST, HEXES,
+                          HEXE_VERTICES_MASK, NEIGHBOR_MASK, VERTICES,
+                          VERTEX_EDGES_MASK, edge_id, edge_positions,
+                          hexe_id, hexe_position, iter_bits,
+                          mask_to_vertices, vertex_id, vertex_position,
+                          unique_roads, vertices_mask, neighbors_mask,
+                          road_components, longest_trail, RoadLengths,
+                          BlockedVertices)
+from aux.topology import VERTEX_NEIGHBORS
+
+
+class TestBitboard:
+    def test_ids(self):
+        assert len(VERTICES) == 54
+        assert len(EDGE_LIST) == 72
+        assert len(HEXES) == 19
+        assert ALL_VERTICES.bit_length() == 54
+        assert ALL_EDGES.bit_length() == 72
+        assert vertex_id(0, 0) == 0
+        assert vertex_id(2, 29) == 53
+        assert vertex_id(3, 0) is None
+        assert hexe_id(2, 11) == 18
+        assert hexe_position(18) == (2, 11)
+
+    def test_converters(self):
+        for vid in range(len(VERTICES)):
+            assert vertex_id(*vertex_position(vid)) == vid
+        for eid in range(len(EDGE_LIST)):
+            assert edge_id(*edge_positions(eid)) == eid
+        assert edge_id((2, 1), (2, 0)) == edge_id((2, 0), (2, 1))
+        assert edge_id((2, 18), (2, 20)) is None
+        mask = vertices_mask([[2, 29], [0, 1], (1, 17)])
+        assert mask_to_vertices(mask) == [[0, 1], [1, 17], [2, 29]]
+        assert list(iter_bits(0b10110)) == [1, 2, 4]
+
+    def test_masks(self):
+        for vertex, neighbors in VERTEX_NEIGHBORS.items():
+            vid = vertex_id(*vertex)
+            assert NEIGHBOR_MASK[vid] == vertices_mask(neighbors)
+            assert bin(VERTEX_EDGES_MASK[vid]).count('1') == len(neighbors)
+        assert mask_to_vertices(HEXE_VERTICES_MASK[hexe_id(0, 0)]) == \
+            [[0, 0], [0, 1], [0, 2], [0, 3], [0, 4], [0, 5]]
+
+    def test_blocked_vertices(self):
+        settlement = vertices_mask([(2, 26)])
+        buildings = settlement | vertices_mask([(0, 0)])
+        blocked = BlockedVertices()
+        assert blocked.get(settlement) == \
+            settlement | neighbors_mask(settlement)
+        assert blocked.get(buildings) == buildings | neighbors_mask(buildings)
+        assert blocked.known == (buildings,
+                                 buildings | neighbors_mask(buildings))
+        # Without the settlement, the vertices are computed again
+        assert blocked.get(vertices_mask([(0, 0)])) == \
+            vertices_mask([(0, 0)]) | NEIGHBOR_MASK[vertex_id(0, 0)]
+
+    def test_unique_roads(self):
+        roads = [[[1, 0], [1, 1]], [[1, 1], [1, 2]], [[1, 1], [1, 0]],
+                 [[1, 2], [1, 1]], [[1, 2], [1, 3]]]
+        assert unique_roads(roads) == [[[1, 0], [1, 1]], [[1, 1], [1, 2]],
+                                       [[1, 2], [1, 3]]]
+
+
+def roads_mask(*vertices):
+    """
+    The mask of the roads of a path of vertex positions.
+    """
+    mask = 0
+    for vertex_1, vertex_2 in zip(vertices, vertices[1:]):
+        mask |= 1 << edge_id(vertex_1, vertex_2)
+    return mask
+
+
+class TestLongestRoad:
+    def test_path(self):
+        path = roads_mask(*[(1, i) for i in range(6)])
+        assert road_components(path) == [path]
+        assert longest_trail(path) == 5
+        # A building of other player cuts the road, the trail ends there
+        blocker = vertices_mask([(1, 3)])
+        assert len(road_components(path, blocker)) == 2
+        assert RoadLengths().get(path, blocker) == 3
+
+    def test_cycles(self):
+        hexe = roads_mask(*[(0, i) for i in range(6)] + [(0, 0)])
+        assert longest_trail(hexe) == 6
+        tail = roads_mask((0, 0), (1, 0), (1, 17))
+        assert longest_trail(hexe | tail) == 8
+        # Two hexagons with a common side: all the roads in one trail
+        other = roads_mask((0, 1), (1, 3), (1, 2), (1, 1), (1, 0), (0, 0))
+        assert longest_trail(hexe | other) == 11
+        # The trail can't go through the blocker
+        blocker = vertices_mask([(0, 0)])
+        assert RoadLengths().get(hexe | other, blocker) == 10
+
+    def test_only_changed_parts(self):
+        lengths = RoadLengths()
+        first = roads_mask((1, 0), (1, 1), (1, 2))
+        second = roads_mask((2, 10), (2, 11))
+        assert lengths.get(first | second) == 2
+        assert len(lengths.lengths) == 2
+        longer = first | roads_mask((1, 2), (1, 3))
+        assert lengths.get(longer | second) == 3
+        # Only the part with the new road was searched
+        assert len(lengths.lengths) == 3
+        assert lengths.get(0) == 0
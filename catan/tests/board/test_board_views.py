@@ -3,7 +3,7 @@ from mixer.backend.django import mixer
 from django.contrib.auth.models import User
 from django.test import RequestFactory, TestCase
 from catan.models import Board, Game
-from catan.views.board_views import BoardInfo, BoardList
+from catan.views.board_views import BoardInfo, BoardList, BoardCache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import force_authenticate
@@ -48,3 +48,83 @@ class TestViewsBoards(TestCase):
                          {'position': {'level': 2, 'index': 10},
                          'terrain': 'wood', 'token': 8}]
         assert expected_data == response.data['hexes']
+
+    def get_board(self, **headers):
+        path = reverse('BoardInfo', kwargs={'pk': self.game.id})
+        request = RequestFactory().get(path, **headers)
+        force_authenticate(request, user=self.user, token=self.token)
+        return BoardInfo.as_view()(request, pk=self.game.id)
+
+    def get_boards(self, **headers):
+        request = RequestFactory().get(reverse('Boards'), **headers)
+        force_authenticate(request, user=self.user, token=self.token)
+        return BoardList.as_view()(request)
+
+    def test_board_info_cache_headers(self):
+        self.game = mixer.blend('catan.Game', board=self.board_2,
+                                robber=self.hexe_1)
+        response = self.get_board()
+        assert response['ETag'].startswith('"')
+        assert 'immutable' in response['Cache-Control']
+        assert 'max-age=31536000' in response['Cache-Control']
+
+    def test_board_info_not_modified(self):
+        self.game = mixer.blend('catan.Game', board=self.board_2,
+                                robber=self.hexe_1)
+        etag = self.get_board()['ETag']
+        response = self.get_board(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+    def test_board_info_cached(self):
+        self.game = mixer.blend('catan.Game', board=self.board_2,
+                                robber=self.hexe_1)
+        self.get_board()
+        # Only the board of the game is read
+        with self.assertNumQueries(1):
+            response = self.get_board()
+        assert len(response.data['hexes']) == 2
+
+    def test_board_info_changed_hexe(self):
+        self.game = mixer.blend('catan.Game', board=self.board_2,
+                                robber=self.hexe_1)
+        etag = self.get_board()['ETag']
+        self.hexe_2.token = 6
+        self.hexe_2.save()
+        response = self.get_board(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert response.data['hexes'][1]['token'] == 6
+
+    def test_board_info_game_not_exists(self):
+        path = reverse('BoardInfo', kwargs={'pk': 100})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=self.user, token=self.token)
+        assert BoardInfo.as_view()(request, pk=100).status_code == 404
+
+    def test_board_list_not_modified(self):
+        etag = self.get_boards()['ETag']
+        with self.assertNumQueries(1):
+            response = self.get_boards(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert 'no-cache' in response['Cache-Control']
+        mixer.blend('catan.Board', name='board_3')
+        response = self.get_boards(HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert len(response.data) == 3
+
+    def test_board_list_created_outside(self):
+        self.get_boards()
+        # A board of other process, without the signals of this one
+        Board.objects.bulk_create([Board(name='board_3')])
+        response = self.get_boards()
+        assert [board['name'] for board in response.data][-1] == 'board_3'
+
+    def test_cache_size(self):
+        cache = BoardCache(max_boards=1)
+        cache.get(self.board_1.id)
+        etag, data = cache.get(self.board_2.id)
+        assert list(cache.boards) == [self.board_2.id]
+        assert len(data['hexes']) == 2
@@ -0,0 +1,46 @@
+import pytest
+from aux.json_load import HexagonInfo, VertexInfo
+from aux.topology import (EDGES, HEXE_VERTICES, VERTEX_HEXES,
+                          VERTEX_NEIGHBORS, hexe_vertices, is_edge,
+                          make_edge, vertex_hexes, vertex_neighbors)
+from catan.models import generateHexesPositions, generateVertexPositions
+
+
+class TestTopology:
+    def test_sizes(self):
+        assert len(VERTEX_NEIGHBORS) == 54
+        assert len(HEXE_VERTICES) == 19
+        assert len(VERTEX_HEXES) == 54
+        assert len(EDGES) == 72
+
+    def test_all_positions_indexed(self):
+        for vertex in generateVertexPositions():
+            assert tuple(vertex) in VERTEX_NEIGHBORS
+        for hexe in generateHexesPositions():
+            assert tuple(hexe) in HEXE_VERTICES
+
+    def test_lookups(self):
+        assert vertex_neighbors(1, 16) == ((2, 26), (1, 17), (1, 15))
+        assert hexe_vertices(0, 0) == ((0, 0), (0, 1), (0, 2),
+                                       (0, 3), (0, 4), (0, 5))
+        assert vertex_hexes(0, 0) == ((0, 0), (1, 0), (1, 5))
+        assert vertex_neighbors(3, 0) == ()
+        assert hexe_vertices(2, 12) == ()
+
+    def test_edges(self):
+        assert is_edge((2, 0), (2, 1))
+        assert is_edge([2, 1], [2, 0])
+        assert not is_edge((2, 18), (2, 20))
+        assert make_edge((2, 1), (0, 3)) == ((0, 3), (2, 1))
+
+    def test_list_shaped_compatibility(self):
+        neighbors = VertexInfo(1, 16)
+        assert neighbors == [[2, 26], [1, 17], [1, 15]]
+        # The returned list is a copy, changing it does not change
+        # the index...
+        neighbors.remove([1, 17])
+        assert VertexInfo(1, 16) == [[2, 26], [1, 17], [1, 15]]
+        assert HexagonInfo(0, 0) == [[0, 0], [0, 1], [0, 2],
+                                     [0, 3], [0, 4], [0, 5]]
+        assert VertexInfo(3, 0) is None
+        assert HexagonInfo(3, 0) is None
@@ -3,6 +3,8 @@ from catan.models import *
 from mixer.backend.django import mixer
 from django.contrib.auth.models import User
 from mixer.backend.django import mixer
+from catan.engine.persistence import load_game
+from catan.engine.actions import posible_settlements
 
 
 @pytest.mark.django_db
@@ -75,3 +77,32 @@ class TestModels:
         except ValidationError as e:
             error = 'The index with level 2 must be between 0 and 29.'
             assert error in e.message_dict['__all__']
+
+    def get_settlements(self, game, player):
+        state = load_game(game.id)
+        return posible_settlements(state, state.get_player(player.id))
+
+    def test_posibles_settlements_only_own_game(self):
+        user_1 = mixer.blend(User, username='user1', password='hola1234')
+        user_2 = mixer.blend(User, username='user2', password='hola1234')
+        board = mixer.blend('catan.Board', name='board_1')
+        hexe = mixer.blend('catan.Hexe', token=2, terrain='desert',
+                           board=board)
+        game_1 = mixer.blend('catan.Game', name="Game1", board=board,
+                             robber=hexe)
+        game_2 = mixer.blend('catan.Game', name="Game2", board=board,
+                             robber=hexe)
+        player1 = mixer.blend('catan.Player', turn=1, username=user_1,
+                              game=game_1, colour="blue")
+        player2 = mixer.blend('catan.Player', turn=1, username=user_2,
+                              game=game_2, colour="blue")
+        Road.objects.create(owner=player1, game=game_1, level_1=1,
+                            index_1=16, level_2=1, index_2=17)
+        # A building of other game next to the road...
+        Building.objects.create(name="settlement", game=game_2,
+                                owner=player2, level=2, index=26)
+        assert self.get_settlements(game_1, player1) == [[1, 16], [1, 17]]
+        # A building of the same game...
+        Building.objects.create(name="settlement", game=game_1,
+                                owner=player1, level=2, index=26)
+        assert self.get_settlements(game_1, player1) == [[1, 17]]
@@ -37,16 +37,16 @@ class TestViews(TestCase):
                                 level_1=1, level_2=2,
                                 index_1=16, index_2=26,
                                 game=self.game)
-        self.brick = mixer.blend('catan.Resource', owner=self.player,
+        self.brick = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                  game=self.game,
                                  name="brick")
-        self.lumber = mixer.blend('catan.Resource', owner=self.player,
+        self.lumber = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                   game=self.game,
                                   name="lumber")
-        self.wool = mixer.blend('catan.Resource', owner=self.player,
+        self.wool = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                 game=self.game,
                                 name="wool")
-        self.grain = mixer.blend('catan.Resource', owner=self.player,
+        self.grain = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                  game=self.game,
                                  name="grain")
 
@@ -67,18 +67,8 @@ class TestViews(TestCase):
         return response_player
 
     def resources_for_city(self):
-        mixer.blend('catan.Resource', owner=self.player,
-                    game=self.game,
-                    name="grain")
-        mixer.blend('catan.Resource', owner=self.player,
-                    game=self.game,
-                    name="ore")
-        mixer.blend('catan.Resource', owner=self.player,
-                    game=self.game,
-                    name="ore")
-        mixer.blend('catan.Resource', owner=self.player,
-                    game=self.game,
-                    name="ore")
+        self.player.gain_resources('grain', 1)
+        self.player.gain_resources('ore', 3)
 
     def delete_resources_settl(self):
         self.grain.delete()
@@ -439,8 +429,6 @@ class TestViews(TestCase):
                     level_1=1, index_1=17, level_2=2, index_2=29)
         mixer.blend('catan.Road', owner=self.player, game=self.game,
                     level_1=1, index_1=16, level_2=1, index_2=17)
-        mixer.blend('catan.Road', owner=self.player, game=self.game,
-                    level_1=2, index_1=26, level_2=1, index_2=16)
         mixer.blend('catan.Building', owner=self.player, game=self.game,
                     level=2, index=26)
         path = reverse('PlayerActions', kwargs={'pk': 1})
@@ -456,12 +444,12 @@ class TestViews(TestCase):
             'type': 'build_road',
             'payload':
                     [
-                        [{'level': 2, 'index': 29}, {'level': 2, 'index': 28}],
-                        [{'level': 2, 'index': 29}, {'level': 2, 'index': 0}],
                         [{'level': 1, 'index': 16}, {'level': 1, 'index': 15}],
                         [{'level': 1, 'index': 17}, {'level': 1, 'index': 0}],
                         [{'level': 2, 'index': 26}, {'level': 2, 'index': 27}],
-                        [{'level': 2, 'index': 26}, {'level': 2, 'index': 25}]
+                        [{'level': 2, 'index': 26}, {'level': 2, 'index': 25}],
+                        [{'level': 2, 'index': 29}, {'level': 2, 'index': 28}],
+                        [{'level': 2, 'index': 29}, {'level': 2, 'index': 0}]
                     ]
         }
         assert response.data[1] == expected_data_roads
@@ -475,8 +463,6 @@ class TestViews(TestCase):
                     level_1=1, index_1=17, level_2=2, index_2=29)
         mixer.blend('catan.Road', owner=self.player, game=self.game,
                     level_1=1, index_1=16, level_2=1, index_2=17)
-        mixer.blend('catan.Road', owner=self.player, game=self.game,
-                    level_1=2, index_1=26, level_2=1, index_2=16)
         mixer.blend('catan.Building', owner=self.player, game=self.game,
                     level=2, index=26, name='settlement')
         mixer.blend('catan.Building', owner=self.player, game=self.game,
@@ -490,12 +476,12 @@ class TestViews(TestCase):
             'type': 'build_road',
             'payload':
                 [
-                    [{'level': 2, 'index': 29}, {'level': 2, 'index': 28}],
-                    [{'level': 2, 'index': 29}, {'level': 2, 'index': 0}],
                     [{'level': 1, 'index': 16}, {'level': 1, 'index': 15}],
                     [{'level': 1, 'index': 17}, {'level': 1, 'index': 0}],
                     [{'level': 2, 'index': 26}, {'level': 2, 'index': 27}],
-                    [{'level': 2, 'index': 26}, {'level': 2, 'index': 25}]
+                    [{'level': 2, 'index': 26}, {'level': 2, 'index': 25}],
+                    [{'level': 2, 'index': 29}, {'level': 2, 'index': 28}],
+                    [{'level': 2, 'index': 29}, {'level': 2, 'index': 0}]
                 ]
         }
         assert expected_data == response.data[1]
@@ -0,0 +1,93 @@
+import pytest
+from catan.models import *
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from mixer.backend.django import mixer
+
+
+@pytest.mark.django_db
+class TestModels:
+    def create_players(self):
+        hexe = mixer.blend('catan.Hexe', level=1, index=2,
+                           terrain='ore', token=6)
+        board = mixer.blend('catan.Board', name='Colonos')
+        self.game = mixer.blend('catan.Game', name='Juego', board=board,
+                                robber=hexe)
+        user1 = mixer.blend(User, username='Nico')
+        user2 = mixer.blend(User, username='Pablo')
+        self.player1 = mixer.blend('catan.Player', username=user1,
+                                   game=self.game, colour='Red', turn=1)
+        self.player2 = mixer.blend('catan.Player', username=user2,
+                                   game=self.game, colour='Blue', turn=2)
+
+    def test_one_row_per_resource(self):
+        self.create_players()
+        self.player1.gain_resources('ore', 2)
+        self.player1.gain_resources('ore', 3)
+        self.player1.gain_resources('wool', 1)
+        hand = Hand.objects.filter(owner=self.player1)
+        assert hand.count() == 2
+        assert self.player1.get_hand() == {'ore': 5, 'wool': 1}
+        assert hand.get(name='ore').last_gained == 5
+
+    def test_remove_resources(self):
+        self.create_players()
+        self.player1.gain_resources('ore', 2)
+        Hand.objects.filter(owner=self.player1).update(last_gained=0)
+        self.player1.gain_resources('ore', 2)
+        self.player1.gain_resources('grain', 2)
+        Hand.remove_resources({(self.player1.id, 'ore'): 3,
+                               (self.player1.id, 'grain'): 2})
+        assert self.player1.get_hand() == {'ore': 1, 'grain': 0}
+        # The old resources are used first
+        assert Hand.objects.get(owner=self.player1,
+                                name='ore').last_gained == 1
+
+    def test_not_negative(self):
+        self.create_players()
+        self.player1.gain_resources('ore', 1)
+        with pytest.raises(IntegrityError):
+            with transaction.atomic():
+                Hand.remove_resources({(self.player1.id, 'ore'): 2})
+        assert self.player1.get_hand() == {'ore': 1}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestHandMigration:
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def test_resources_to_hands(self):
+        apps = self.migrate(('catan', '0001_initial'))
+        User = apps.get_model('auth', 'User')
+        Board = apps.get_model('catan', 'Board')
+        Hexe = apps.get_model('catan', 'Hexe')
+        Game = apps.get_model('catan', 'Game')
+        Player = apps.get_model('catan', 'Player')
+        Card = apps.get_model('catan', 'Card')
+        Resource = apps.get_model('catan', 'Resource')
+        board = Board.objects.create(name='Colonos')
+        hexe = Hexe.objects.create(board=board, terrain='desert')
+        game = Game.objects.create(name='Juego', board=board, robber=hexe)
+        user = User.objects.create(username='Nico')
+        player = Player.objects.create(turn=1, username=user, game=game,
+                                       colour='Red')
+        for name, last_gained in [('wool', False), ('ore', True),
+                                  ('wool', True), ('wool', False)]:
+            Resource.objects.create(owner=player, game=game, name=name,
+                                    last_gained=last_gained)
+        Card.objects.create(owner=player, game=game, name='knight')
+        apps = self.migrate(('catan', '0004_delete_resource'))
+        Hand = apps.get_model('catan', 'Hand')
+        Card = apps.get_model('catan', 'Card')
+        hands = Hand.objects.filter(owner=player.id).order_by('id')
+        assert list(hands.values_list('name', 'amount', 'last_gained')) == \
+            [('wool', 3, 1), ('ore', 1, 1)]
+        assert list(Card.objects.values_list('name', flat=True)) == \
+            ['knight']
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes(
+            'catan')[0])
@@ -0,0 +1,30 @@
+import os
+import pytest
+from catan.views.players_views import LEGAL_ACTIONS
+from catan.engine.write_behind import ACTIVE_GAMES
+from catan.views.board_views import BOARD_CACHE
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    The benchmarks that assert on the time depend on the machine, so
+    they are only run when RUN_BENCHMARKS is set.
+    """
+    if os.environ.get('RUN_BENCHMARKS'):
+        return
+    skip = pytest.mark.skip(reason='set RUN_BENCHMARKS=1 to run it')
+    for item in items:
+        if item.get_closest_marker('benchmark') is not None:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def clear_legal_actions():
+    """
+    The ids and the versions of the games are repeated in the tests,
+    so the cached actions, the games in memory and the cached boards
+    of a test must not be used in other one.
+    """
+    LEGAL_ACTIONS.clear()
+    ACTIVE_GAMES.clear()
+    BOARD_CACHE.clear()
@@ -0,0 +1,183 @@
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.engine import *
+from catan.engine.actions import (posible_roads, posible_settlements,
+                                  posibles_roads_card_road_building)
+from catan.engine.persistence import load_game, save_game
+from catan.engine.log import dump_state, load_state, SnapshotError
+from aux.generateBoard import generateBoardTest
+import pytest
+
+
+def changes(context):
+    """
+    The queries that write in the database (not the savepoints).
+    """
+    return [query['sql'] for query in context.captured_queries
+            if 'SAVEPOINT' not in query['sql']]
+
+
+@pytest.mark.django_db
+class TestEnginePersistence(TestCase):
+
+    def setUp(self):
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.game = Game.objects.create(name='Juego', board=self.board,
+                                        robber=self.robber)
+        self.user1 = mixer.blend(User, username='Nico')
+        self.user2 = mixer.blend(User, username='Pablo')
+        self.player1 = Player.objects.create(username=self.user1,
+                                             game=self.game, colour='Blue',
+                                             turn=1, victory_points=2)
+        self.player2 = Player.objects.create(username=self.user2,
+                                             game=self.game, colour='Red',
+                                             turn=2, victory_points=2)
+        Current_Turn.objects.create(game=self.game, user=self.user1,
+                                    game_stage='FULL_PLAY',
+                                    dices1=3, dices2=2)
+        Building.objects.create(game=self.game, owner=self.player1,
+                                name='settlement', level=1, index=0)
+        Building.objects.create(game=self.game, owner=self.player1,
+                                name='settlement', level=2, index=0)
+        Building.objects.create(game=self.game, owner=self.player2,
+                                name='city', level=1, index=6)
+        Road.objects.create(game=self.game, owner=self.player1,
+                            level_1=1, index_1=0, level_2=1, index_2=1)
+        Road.objects.create(game=self.game, owner=self.player1,
+                            level_1=1, index_1=2, level_2=1, index_2=1)
+        for name in ['brick', 'lumber', 'wool', 'grain', 'ore']:
+            self.player1.gain_resources(name, 4)
+        self.player2.gain_resources('ore', 2)
+        Card.objects.create(owner=self.player1, game=self.game,
+                            name='road_building')
+
+    def test_load(self):
+        with CaptureQueriesContext(connection) as context:
+            state = load_game(self.game.id)
+        assert len(context.captured_queries) == 7
+        nico, pablo = state.players
+        assert nico.username == 'Nico'
+        assert state.robber == (0, 0)
+        assert len(state.hexes) == 10
+        assert nico.hand == {'brick': 4, 'lumber': 4, 'wool': 4,
+                             'grain': 4, 'ore': 4}
+        assert nico.cards == ['road_building']
+        assert nico.settlement_positions() == [[1, 0], [2, 0]]
+        assert pablo.cities != 0
+        assert state.turn.dices == (3, 2)
+        assert state.player_in_turn() is nico
+
+    def test_positions(self):
+        state = load_game(self.game.id)
+        nico = state.players[0]
+        roads = [[[1, 0], [1, 17]], [[1, 0], [0, 0]], [[1, 1], [2, 1]],
+                 [[1, 2], [2, 4]], [[1, 2], [1, 3]], [[2, 0], [2, 29]],
+                 [[2, 0], [2, 1]]]
+        assert posible_roads(state, nico) == roads
+        # (1, 1) is next to the settlement (1, 0)
+        assert posible_settlements(state, nico) == [[1, 2]]
+        assert posibles_roads_card_road_building(state, nico) == roads + [
+            [[1, 17], [1, 16]], [[1, 17], [2, 29]], [[0, 0], [0, 5]],
+            [[0, 0], [0, 1]], [[2, 1], [2, 2]], [[2, 4], [2, 3]],
+            [[2, 4], [2, 5]], [[1, 3], [0, 1]], [[1, 3], [1, 4]],
+            [[2, 29], [2, 28]]]
+        assert nico.settlement_positions() == [[1, 0], [2, 0]]
+
+    def test_save(self):
+        Game.objects.filter(id=self.game.id).update(deck='vkkr')
+        state = load_game(self.game.id)
+        nico = state.players[0]
+        build_road(state, nico, (1, 2), (1, 3))
+        build_settlement(state, nico, 1, 3)
+        upgrade_city(state, nico, 1, 0)
+        play_road_building_card(state, nico, [(1, 3), (1, 4)],
+                                [(1, 4), (1, 5)])
+        buy_card(state, nico)
+        state.turn.dices = (3, 4)
+        move_robber(state, nico, 1, 5, 'Pablo')
+        with CaptureQueriesContext(connection) as context:
+            save_game(state)
+        assert len(changes(context)) <= 12
+        assert Building.objects.get(game=self.game, level=1,
+                                    index=3).owner == self.player1
+        assert Building.objects.get(game=self.game, level=1,
+                                    index=0).name == 'city'
+        assert Road.objects.filter(owner=self.player1).count() == 5
+        assert list(Card.objects.filter(owner=self.player1).values_list(
+            'name', flat=True)) == nico.cards
+        assert nico.cards == ['victory_point']
+        game = Game.objects.get(id=self.game.id)
+        assert (game.robber.level, game.robber.index) == (1, 5)
+        assert game.deck_top == 1
+        assert game.current_turn.robber_moved
+        player1 = Player.objects.get(id=self.player1.id)
+        assert player1.victory_points == 4
+        assert player1.get_hand() == nico.hand
+        assert dict(Hand.objects.filter(owner=self.player2).values_list(
+            'name', 'amount')) == state.players[1].hand
+        loaded = load_game(self.game.id)
+        assert legal_actions(loaded, loaded.players[0]) == \
+            legal_actions(state, nico)
+
+    def test_save_new_hands(self):
+        state = load_game(self.game.id)
+        pablo = state.players[1]
+        state.turn.user_id = pablo.user_id
+        pablo.hand['ore'] = 4
+        bank_trade(state, pablo, 'ore', 'wool')
+        save_game(state)
+        assert Hand.objects.get(owner=self.player2, name='wool').amount == 1
+        assert Hand.objects.get(owner=self.player2, name='ore').amount == 0
+        assert Current_Turn.objects.get(game=self.game).user == self.user2
+
+    def test_save_awards(self):
+        state = load_game(self.game.id)
+        nico = state.players[0]
+        build_road(state, nico, (1, 2), (1, 3))
+        build_road(state, nico, (1, 3), (1, 4))
+        assert state.longest_road_id is None
+        play_road_building_card(state, nico, [(1, 4), (1, 5)],
+                                [(1, 5), (1, 6)])
+        nico.knights = 2
+        nico.cards.append('knight')
+        move_robber(state, nico, 1, 5, 'Pablo', knight=True)
+        save_game(state)
+        game = Game.objects.get(id=self.game.id)
+        assert game.longest_road == self.player1
+        assert game.largest_army == self.player1
+        assert Player.objects.get(id=self.player1.id).knights == 3
+        loaded = load_game(self.game.id)
+        assert (loaded.longest_road_id, loaded.largest_army_id) == \
+            (self.player1.id, self.player1.id)
+        assert loaded.players[0].knights == 3
+        data = dump_state(loaded)
+        rebuilt = load_state(data, game.id, game.board_id, loaded.hexes)
+        assert dump_state(rebuilt) == data
+
+    def test_load_malformed_snapshot(self):
+        state = load_game(self.game.id)
+        for key, value in [('deck', None), ('deck_top', 30),
+                           ('players', [{'id': 1}])]:
+            data = dump_state(state)
+            data[key] = value
+            with pytest.raises(SnapshotError):
+                load_state(data, state.id, state.board_id, state.hexes)
+        data = dump_state(state)
+        del data['largest_army']
+        with pytest.raises(SnapshotError):
+            load_state(data, state.id, state.board_id, state.hexes)
+
+    def test_save_without_changes(self):
+        state = load_game(self.game.id)
+        with CaptureQueriesContext(connection) as context:
+            save_game(state)
+        assert changes(context) == []
+
+    def test_game_not_exists(self):
+        with pytest.raises(Game.DoesNotExist):
+            load_game(100)
@@ -0,0 +1,378 @@
+import random
+import pytest
+from aux.bitboard import HEXES, vertex_id, edge_id
+from catan.engine import *
+from catan.engine import rules
+from catan.engine.rules import get_yields, get_players_to_steal
+
+
+TERRAINS = ['brick', 'wool', 'grain', 'ore', 'lumber']
+TOKENS = [2, 3, 4, 5, 6, 8, 9, 10, 11, 12]
+
+
+def new_state(game_stage='FULL_PLAY', players=4):
+    """
+    A game in memory with a full board: the desert in the center and
+    the other hexes with the terrains and the tokens in order.
+    """
+    hexes = {HEXES[0]: HexeState(1, 'desert', 0)}
+    for i, position in enumerate(HEXES[1:]):
+        hexes[position] = HexeState(i + 2, TERRAINS[i % 5],
+                                    TOKENS[i % 10])
+    names = ['Nico', 'Pablo', 'Carlos', 'Ana']
+    game_players = [PlayerState(turn, turn + 10, names[turn - 1], turn)
+                    for turn in range(1, players + 1)]
+    turn = TurnState(11, game_stage, dices=(3, 3))
+    return GameState(1, 1, hexes, HEXES[0], game_players, turn,
+                     deck=rules.new_deck(random.Random(0)))
+
+
+def give(player, **resources):
+    for name, amount in resources.items():
+        player.hand[name] = player.hand.get(name, 0) + amount
+
+
+def build(player, level, index, name='settlement'):
+    player.add_building(vertex_id(level, index), name)
+
+
+def road(player, vertex_1, vertex_2):
+    player.roads |= 1 << edge_id(vertex_1, vertex_2)
+
+
+class TestConstruction:
+    def test_construction_stages(self):
+        state = new_state('FIRST_CONSTRUCTION', players=2)
+        nico, pablo = state.players
+        actions = legal_actions(state, nico)
+        assert [action['type'] for action in actions] == ['build_settlement']
+        assert len(actions[0]['payload']) == 54
+        assert legal_actions(state, pablo) == []
+        build_settlement(state, nico, 0, 0)
+        assert state.turn.last_action == 'BUILD_SETTLEMENT'
+        with pytest.raises(RuleError) as error:
+            build_road(state, nico, (1, 5), (1, 6))
+        assert error.value.detail == "You must build since your last building"
+        build_road(state, nico, (0, 0), (0, 1))
+        assert legal_actions(state, nico) == [{'type': 'end_turn'}]
+        end_turn(state)
+        assert state.turn.user_id == pablo.user_id
+        actions = legal_actions(state, pablo)
+        # The vertex and its neighbors are not available
+        assert len(actions[0]['payload']) == 50
+        build_settlement(state, pablo, 2, 10)
+        build_road(state, pablo, (2, 10), (2, 11))
+        end_turn(state)
+        # The last player builds again in the second construction
+        assert state.turn.game_stage == 'SECOND_CONSTRUCTION'
+        assert state.turn.user_id == pablo.user_id
+        build_settlement(state, pablo, 1, 9)
+        assert pablo.resources_count() == 3
+        assert pablo.last_gained == pablo.hand
+        build_road(state, pablo, (1, 9), (1, 10))
+        end_turn(state, random.Random(1))
+        assert state.turn.user_id == nico.user_id
+        build_settlement(state, nico, 2, 0)
+        build_road(state, nico, (2, 0), (2, 1))
+        end_turn(state, random.Random(1))
+        assert state.turn.game_stage == 'FULL_PLAY'
+        assert state.turn.user_id == nico.user_id
+        assert nico.victory_points == 2
+
+    def test_end_turn_without_road(self):
+        state = new_state('FIRST_CONSTRUCTION')
+        build_settlement(state, state.players[0], 0, 0)
+        with pytest.raises(RuleError) as error:
+            end_turn(state)
+        assert error.value.detail == "You must build your first constructions"
+
+    def test_blocked_vertices(self):
+        state = new_state('FIRST_CONSTRUCTION', players=2)
+        nico, pablo = state.players
+        assert state.blocked == 0
+        build(nico, 0, 0)
+        blocked = state.blocked
+        assert bin(blocked).count('1') == 4
+        copy = state.copy()
+        build(pablo, 2, 10)
+        assert bin(state.blocked).count('1') == 7
+        # The copy doesn't see the buildings of the state
+        assert copy.blocked == blocked
+        other = state.copy()
+        # A removed building is computed again
+        pablo.settlements = 0
+        assert state.blocked == blocked
+        assert bin(other.blocked).count('1') == 7
+
+
+class TestBuild:
+    def setup_method(self):
+        self.state = new_state()
+        self.player = self.state.players[0]
+        build(self.player, 1, 0)
+        road(self.player, (1, 0), (1, 1))
+        road(self.player, (1, 1), (1, 2))
+
+    def test_settlement(self):
+        give(self.player, brick=1, lumber=1, wool=1, grain=1)
+        with pytest.raises(RuleError) as error:
+            build_settlement(self.state, self.player, 1, 1)
+        assert error.value.detail == "Invalid position"
+        assert build_settlement(self.state, self.player, 1, 2) is False
+        assert self.player.resources_count() == 0
+        assert self.player.victory_points == 1
+        with pytest.raises(RuleError) as error:
+            build_settlement(self.state, self.player, 1, 2)
+        assert error.value.detail == "Busy position"
+
+    def test_settlement_without_resources(self):
+        with pytest.raises(RuleError) as error:
+            build_settlement(self.state, self.player, 1, 2)
+        assert error.value.detail == "It does not have" + \
+            "the necessary resources"
+        assert self.player.settlements == 1 << vertex_id(1, 0)
+
+    def test_road(self):
+        give(self.player, brick=2, lumber=2)
+        build_road(self.state, self.player, (1, 2), (1, 3))
+        with pytest.raises(RuleError) as error:
+            build_road(self.state, self.player, (2, 10), (2, 11))
+        assert error.value.detail == "You must have something built"
+        with pytest.raises(RuleError) as error:
+            build_road(self.state, self.player, (1, 3), (1, 2))
+        assert error.value.detail == "Busy position, reserved"
+        assert self.player.hand == {'brick': 1, 'lumber': 1}
+
+    def test_city(self):
+        give(self.player, ore=3, grain=2)
+        self.player.victory_points = 9
+        assert upgrade_city(self.state, self.player, 1, 0) is True
+        assert self.state.winner_id == self.player.user_id
+        assert self.player.cities == 1 << vertex_id(1, 0)
+        assert self.player.settlements == 0
+        with pytest.raises(RuleError) as error:
+            upgrade_city(self.state, self.player, 1, 0)
+        assert error.value.detail == "Must upgrade an existent settlement"
+
+    def test_road_building_card(self):
+        self.player.cards.append('road_building')
+        with pytest.raises(RuleError):
+            play_road_building_card(self.state, self.player,
+                                    [(1, 2), (1, 3)], [(2, 20), (2, 21)])
+        # The first road is removed
+        assert self.player.roads == (1 << edge_id((1, 0), (1, 1))) | \
+            (1 << edge_id((1, 1), (1, 2)))
+        play_road_building_card(self.state, self.player,
+                                [(1, 2), (1, 3)], [(1, 3), (1, 4)])
+        assert self.player.cards == []
+        assert self.player.hand == {}
+
+
+class TestLongestRoad:
+    def setup_method(self):
+        self.state = new_state()
+        self.nico, self.pablo = self.state.players[0:2]
+        build(self.nico, 1, 0)
+        for i in range(4):
+            road(self.nico, (1, i), (1, i + 1))
+        build(self.pablo, 2, 10)
+        for i in range(10, 15):
+            road(self.pablo, (2, i), (2, i + 1))
+        give(self.nico, brick=2, lumber=2)
+
+    def test_longest_road(self):
+        assert build_road(self.state, self.nico, (1, 4), (1, 5)) is False
+        # Pablo had 5 roads too, but nobody had the longest road
+        assert self.state.longest_road_id is None
+        self.state.longest_road_id = self.pablo.id
+        build_road(self.state, self.nico, (1, 5), (1, 6))
+        assert self.state.longest_road_id == self.nico.id
+        assert rules.road_length(self.state, self.nico) == 6
+
+    def test_cut_road(self):
+        build_road(self.state, self.nico, (1, 4), (1, 5))
+        build_road(self.state, self.nico, (1, 5), (1, 6))
+        assert self.state.longest_road_id == self.nico.id
+        # A settlement of Pablo cuts the road of Nico in two
+        road(self.pablo, (1, 2), (2, 4))
+        self.state.turn.user_id = self.pablo.user_id
+        give(self.pablo, brick=1, lumber=1, wool=1, grain=1)
+        build_settlement(self.state, self.pablo, 1, 2)
+        assert rules.road_length(self.state, self.nico) == 4
+        assert self.state.longest_road_id == self.pablo.id
+
+    def test_winner(self):
+        self.nico.victory_points = 8
+        self.nico.cards.append('road_building')
+        assert play_road_building_card(self.state, self.nico,
+                                       [(1, 4), (1, 5)],
+                                       [(1, 5), (1, 6)]) is True
+        assert self.state.winner_id == self.nico.user_id
+
+
+class TestDices:
+    def setup_method(self):
+        self.state = new_state()
+        self.nico, self.pablo = self.state.players[0:2]
+        # (1, 0) touches the hexes (0, 0), (1, 0) and (1, 5)
+        build(self.nico, 1, 0, 'city')
+        build(self.pablo, 1, 3)
+
+    def test_yields(self):
+        token = self.state.hexes[(1, 0)].token
+        terrain = self.state.hexes[(1, 0)].terrain
+        assert get_yields(self.state, token) == {(1, terrain): 2,
+                                                 (2, terrain): 1}
+        give(self.nico, ore=1)
+        self.nico.last_gained['ore'] = 1
+        throw_dices(self.state, dices=(token - 1, 1))
+        assert self.nico.hand == {terrain: 2, 'ore': 1}
+        assert self.nico.last_gained == {terrain: 2, 'ore': 0}
+        # The robber's hexe doesn't produce
+        self.state.robber = (1, 0)
+        assert get_yields(self.state, token) == {}
+
+    def test_seven(self):
+        give(self.nico, brick=5, ore=4)
+        give(self.pablo, wool=7)
+        assert throw_dices(self.state, random.Random(3), (3, 4)) == {}
+        assert self.nico.resources_count() == 5
+        assert self.pablo.resources_count() == 7
+        actions = legal_actions(self.state, self.nico)
+        assert [action['type'] for action in actions] == ['move_robber']
+        with pytest.raises(RuleError) as error:
+            end_turn(self.state)
+        assert error.value.detail == "You have to move the thief"
+
+
+class TestRobberAndCards:
+    def setup_method(self):
+        self.state = new_state()
+        self.nico, self.pablo = self.state.players[0:2]
+        build(self.pablo, 1, 3)
+        give(self.pablo, wool=1)
+        self.state.turn.dices = (3, 4)
+
+    def test_move_robber(self):
+        payload = legal_actions(self.state, self.nico)[0]['payload']
+        assert {'position': {'level': 1, 'index': 0},
+                'players': ['Pablo']} in payload
+        assert len(payload) == 18
+        with pytest.raises(RuleError) as error:
+            move_robber(self.state, self.nico, 1, 0, 'Carlos')
+        assert error.value.detail == \
+            "You have to choose a player that has buildings"
+        assert move_robber(self.state, self.nico, 1, 0, 'Pablo') == 'Pablo'
+        assert self.nico.hand == {'wool': 1}
+        assert self.pablo.hand == {'wool': 0}
+        assert self.state.robber == (1, 0)
+        assert self.state.turn.robber_moved
+
+    def test_hexe_owners(self):
+        owners = self.state.get_hexe_owners()
+        assert owners[(1, 0)] == ('Pablo',)
+        assert (2, 0) not in owners
+        build(self.nico, 1, 2)
+        owners = self.state.get_hexe_owners()
+        assert owners[(1, 0)] == ('Pablo', 'Nico')
+        assert get_players_to_steal(self.state, self.nico, 1, 0) == ['Pablo']
+        # A copy keeps its own owners
+        copy = self.state.copy()
+        build(copy.players[2], 2, 0)
+        assert (2, 0) in copy.get_hexe_owners()
+        assert (2, 0) not in self.state.get_hexe_owners()
+        # A removed building is computed again
+        self.nico.settlements = 0
+        assert self.state.get_hexe_owners()[(1, 0)] == ('Pablo',)
+
+    def test_knight(self):
+        self.state.turn.dices = (3, 3)
+        with pytest.raises(RuleError):
+            move_robber(self.state, self.nico, 1, 0, 'Pablo', knight=True)
+        self.nico.cards.append('knight')
+        move_robber(self.state, self.nico, 2, 0, 'Pablo', knight=True)
+        assert self.nico.cards == []
+
+    def test_buy_card(self):
+        give(self.nico, ore=1, grain=1, wool=1)
+        buy_card(self.state, self.nico)
+        assert self.nico.cards == [rules.deck_card(self.state.deck, 0)]
+        assert self.state.deck_top == 1
+        with pytest.raises(RuleError):
+            buy_card(self.state, self.nico)
+
+    def test_deck(self):
+        deck = rules.new_deck(random.Random(2020))
+        assert len(deck) == rules.DECK_SIZE == 25
+        assert sorted(rules.deck_card(deck, i) for i in range(25)) == \
+            sorted(name for name, amount in
+                   rules.DEVELOPMENT_CARDS.items() for i in range(amount))
+        assert [deck.count(letter) for letter in 'kvrym'] == [14, 5, 2, 2, 2]
+        # The same seed shuffles the same deck
+        assert rules.new_deck(random.Random(2020)) == deck
+        give(self.nico, ore=26, grain=26, wool=26)
+        for i in range(25):
+            buy_card(self.state, self.nico)
+        assert ''.join(rules.CARD_LETTERS[name]
+                       for name in self.nico.cards) == self.state.deck
+        assert {'type': 'buy_card'} not in legal_actions(self.state,
+                                                         self.nico)
+        with pytest.raises(RuleError) as error:
+            buy_card(self.state, self.nico)
+        assert error.value.detail == "There are no more cards"
+
+    def test_trade_and_monopoly(self):
+        give(self.nico, brick=4)
+        bank_trade(self.state, self.nico, 'brick', 'wool')
+        assert self.nico.hand == {'brick': 0, 'wool': 1}
+        self.nico.cards.append('monopoly')
+        play_monopoly_card(self.state, self.nico, 'wool')
+        assert self.nico.hand['wool'] == 2
+        assert self.pablo.hand['wool'] == 0
+        self.nico.cards.append('year_of_plenty')
+        play_year_of_plenty(self.state, self.nico, ['ore', 'ore'])
+        assert self.nico.hand['ore'] == 2
+
+    def test_apply_action(self):
+        data = {'type': 'move_robber',
+                'payload': {'position': {'level': 1, 'index': 0},
+                            'player': 'Pablo'}}
+        with pytest.raises(RuleError) as error:
+            apply_action(self.state, self.pablo, data)
+        assert error.value.detail == "Not in turn"
+        assert apply_action(self.state, self.nico, data) == 'Pablo'
+        with pytest.raises(RuleError) as error:
+            apply_action(self.state, self.nico, {'type': 'fly'})
+        assert error.value.detail == 'Please select a valid action'
+
+    def test_largest_army(self):
+        self.nico.cards.extend(['knight'] * 3)
+        self.pablo.knights = 3
+        for position in [(1, 0), (2, 0), (1, 0)]:
+            move_robber(self.state, self.nico, *position, 'Pablo',
+                        knight=True)
+            self.state.turn.robber_moved = False
+        assert self.nico.knights == 3
+        # Pablo keeps the largest army in a tie
+        assert self.state.largest_army_id == self.pablo.id
+        self.nico.cards.append('knight')
+        self.nico.victory_points = 7
+        move_robber(self.state, self.nico, 2, 0, 'Pablo', knight=True)
+        assert self.state.largest_army_id == self.nico.id
+        # The largest army gives the points to win
+        assert self.state.winner_id is None
+        self.nico.cards.extend(['knight', 'victory_point'])
+        data = {'type': 'play_knight_card',
+                'payload': {'position': {'level': 1, 'index': 0},
+                            'player': 'Pablo'}}
+        result = apply_action(self.state, self.nico, data)
+        assert result == 'Pablo'
+        assert self.state.winner_id == self.nico.user_id
+        assert has_won(self.state, self.nico, data, result)
+
+    def test_copy(self):
+        copy = self.state.copy()
+        build(copy.players[0], 2, 0)
+        give(copy.players[1], ore=1)
+        assert self.nico.buildings == []
+        assert self.pablo.hand == {'wool': 1}
@@ -0,0 +1,168 @@
+from unittest import mock
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.players_views import PlayerActions, PlayerInfo
+from catan.views.game_views import GameInfo
+from catan.views.snapshot_views import GameSnapshot
+from catan.engine.log import dump_state
+from catan.engine.persistence import load_game, rebuild_game, archive_game
+from aux.generateBoard import generateBoardTest
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import json
+import pytest
+
+
+@pytest.mark.django_db
+class TestActionLog(TestCase):
+
+    def setUp(self):
+        self.token = AccessToken()
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.game = Game.objects.create(name='Juego', board=self.board,
+                                        robber=self.robber)
+        self.users = []
+        self.players = []
+        for turn, name in enumerate(['Nico', 'Pablo', 'Carlos', 'Ana']):
+            user = mixer.blend(User, username=name)
+            self.users.append(user)
+            self.players.append(Player.objects.create(
+                username=user, game=self.game, turn=turn + 1,
+                colour=Player.COLOUR[turn][0]))
+        Current_Turn.objects.create(game=self.game, user=self.users[0],
+                                    game_stage='FULL_PLAY',
+                                    dices1=3, dices2=2)
+        Building.objects.create(game=self.game, owner=self.players[0],
+                                name='settlement', level=1, index=0)
+        Building.objects.create(game=self.game, owner=self.players[1],
+                                name='settlement', level=1, index=3)
+        Road.objects.create(game=self.game, owner=self.players[0],
+                            level_1=1, index_1=0, level_2=1, index_2=1)
+        for name in ['brick', 'lumber', 'wool', 'grain', 'ore']:
+            self.players[0].gain_resources(name, 5)
+        self.players[1].gain_resources('wool', 9)
+
+    def post(self, user, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=user, token=self.token)
+        return PlayerActions.as_view()(request, pk=self.game.id)
+
+    def play(self):
+        nico = self.users[0]
+        trade = {'type': 'bank_trade',
+                 'payload': {'give': 'ore', 'receive': 'brick'}}
+        road = {'type': 'build_road',
+                'payload': [{'level': 1, 'index': 1},
+                            {'level': 1, 'index': 2}]}
+        assert self.post(nico, trade).status_code == 200
+        assert self.post(nico, road).status_code == 200
+        assert self.post(nico, {'type': 'buy_card'}).status_code == 200
+        assert self.post(nico, {'type': 'end_turn'}).status_code == 204
+
+    def assert_rebuilt(self):
+        rows = dump_state(load_game(self.game.id))
+        assert dump_state(rebuild_game(self.game.id)) == rows
+
+    def test_log(self):
+        self.play()
+        actions = GameAction.objects.filter(game=self.game)
+        assert [action.action for action in actions] == \
+            ['bank_trade', 'build_road', 'buy_card', 'end_turn']
+        assert [action.number for action in actions] == [1, 2, 3, 4]
+        assert actions[0].user == self.users[0]
+        buy_card = json.loads(actions[2].data)
+        card = Card.objects.get(owner=self.players[0])
+        assert buy_card == {'payload': None,
+                            'outcomes': {'card': card.name}}
+        dices = json.loads(actions[3].data)['outcomes']['dices']
+        assert tuple(dices) == Current_Turn.objects.get(
+            game=self.game).get_dices()
+        assert [snapshot.number for snapshot in
+                StateSnapshot.objects.filter(game=self.game)] == [0]
+        self.assert_rebuilt()
+
+    def test_rejected_action(self):
+        data = {'type': 'upgrade_city', 'payload': {'level': 1, 'index': 3}}
+        assert self.post(self.users[0], data).status_code == 403
+        assert not GameAction.objects.filter(game=self.game).exists()
+
+    @override_settings(ACTION_LOG_SNAPSHOT_EVERY=3)
+    def test_snapshots(self):
+        self.play()
+        assert [snapshot.number for snapshot in
+                StateSnapshot.objects.filter(game=self.game)] == [0, 3]
+        self.assert_rebuilt()
+
+    def test_seven(self):
+        # The next player gets a 7, discards and moves the robber
+        with mock.patch('random.randint', side_effect=[3, 4]):
+            self.post(self.users[0], {'type': 'end_turn'})
+        assert Player.objects.get(id=self.players[1].id).get_hand() == \
+            {'wool': 5}
+        data = {'type': 'move_robber',
+                'payload': {'position': {'level': 1, 'index': 0},
+                            'player': 'Nico'}}
+        assert self.post(self.users[1], data).status_code == 204
+        entries = [json.loads(action.data)['outcomes'] for action in
+                   GameAction.objects.filter(game=self.game)]
+        assert entries[0]['dices'] == [3, 4]
+        discarded = {}
+        for owner, name, amount in entries[0]['discarded']:
+            discarded[owner] = discarded.get(owner, 0) + amount
+        assert discarded == {self.players[0].id: 12, self.players[1].id: 4}
+        assert 'stolen' in entries[1]
+        self.assert_rebuilt()
+
+    def test_archive(self):
+        self.play()
+        state = dump_state(load_game(self.game.id))
+        archive_game(self.game.id)
+        assert not Building.objects.filter(game=self.game).exists()
+        assert not Hand.objects.filter(game=self.game).exists()
+        assert Game.objects.get(id=self.game.id).archived
+        assert dump_state(load_game(self.game.id)) == state
+
+    def get(self, view, name, user):
+        path = reverse(name, kwargs={'pk': self.game.id})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=user, token=self.token)
+        response = view.as_view()(request, pk=self.game.id)
+        assert response.status_code == 200
+        return response.data
+
+    def get_views(self, user):
+        return [self.get(view, name, user) for view, name in
+                [(GameSnapshot, 'GameSnapshot'), (GameInfo, 'GameInfo'),
+                 (PlayerInfo, 'PlayerInfo'),
+                 (PlayerActions, 'PlayerActions')]]
+
+    def test_archived_views(self):
+        self.play()
+        nico, pablo = self.users[:2]
+        views = [self.get_views(nico), self.get_views(pablo)]
+        archive_game(self.game.id)
+        # The archived game is read from its action log
+        assert [self.get_views(nico), self.get_views(pablo)] == views
+        trade = {'type': 'bank_trade',
+                 'payload': {'give': 'wool', 'receive': 'brick'}}
+        response = self.post(pablo, trade)
+        assert response.status_code == 403
+        assert response.data == {'detail': 'The game is archived'}
+        with override_settings(WRITE_BEHIND=True):
+            assert self.post(pablo, trade).data == \
+                {'detail': 'The game is archived'}
+        response = self.post(pablo, dict(trade, expected_version=4))
+        assert response.data == {'detail': 'The game is archived'}
+        assert Game.objects.get(id=self.game.id).version == 4
+        assert not Hand.objects.filter(game=self.game).exists()
+        assert GameAction.objects.filter(game=self.game).count() == 4
+
+    def test_without_snapshots(self):
+        with pytest.raises(StateSnapshot.DoesNotExist):
+            rebuild_game(self.game.id)
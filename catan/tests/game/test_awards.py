@@ -0,0 +1,110 @@
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.players_views import PlayerActions
+from catan.engine.write_behind import ACTIVE_GAMES
+from catan.engine.persistence import load_game
+from catan.engine.rules import update_longest_road
+from aux.bitboard import vertex_id
+from aux.generateBoard import generateBoardTest
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+
+
+def knight(level, index):
+    return {'type': 'play_knight_card',
+            'payload': {'position': {'level': level, 'index': index},
+                        'player': 'Pablo'}}
+
+
+def build_road(index):
+    return {'type': 'build_road',
+            'payload': [{'level': 1, 'index': index},
+                        {'level': 1, 'index': index + 1}]}
+
+
+@pytest.mark.django_db
+class TestAwards(TestCase):
+
+    def setUp(self):
+        self.token = AccessToken()
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.user = mixer.blend(User, username='Nico')
+        self.other = mixer.blend(User, username='Pablo')
+        self.game = Game.objects.create(name='Juego', board=self.board,
+                                        robber=self.robber)
+        self.player = Player.objects.create(username=self.user,
+                                            game=self.game, turn=1,
+                                            colour='Red', victory_points=7,
+                                            knights=2)
+        self.player2 = Player.objects.create(username=self.other,
+                                             game=self.game, turn=2,
+                                             colour='Blue', knights=2)
+        Current_Turn.objects.create(game=self.game, user=self.user,
+                                    game_stage='FULL_PLAY',
+                                    dices1=3, dices2=2)
+        Building.objects.create(game=self.game, owner=self.player,
+                                name='settlement', level=1, index=0)
+        Building.objects.create(game=self.game, owner=self.player2,
+                                name='settlement', level=1, index=3)
+        for index in range(5, 9):
+            Road.objects.create(game=self.game, owner=self.player,
+                                level_1=1, index_1=index,
+                                level_2=1, index_2=index + 1)
+        self.player.gain_resources('brick', 2)
+        self.player.gain_resources('lumber', 2)
+        Card.objects.create(owner=self.player, game=self.game,
+                            name='knight')
+
+    def post(self, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=self.user, token=self.token)
+        response = PlayerActions.as_view()(request, pk=self.game.id)
+        ACTIVE_GAMES.flush_all()
+        return response
+
+    def get_game(self):
+        return Game.objects.get(id=self.game.id)
+
+    def check_awards(self):
+        assert self.post(knight(1, 0)).status_code == 204
+        assert Player.objects.get(id=self.player.id).knights == 3
+        assert self.get_game().largest_army == self.player
+        # 7 points, the largest army and the longest road
+        assert self.post(build_road(9)).status_code == 200
+        assert self.get_game().longest_road == self.player
+        assert self.get_game().winner == self.user
+
+    def test_awards(self):
+        self.check_awards()
+
+    @override_settings(WRITE_BEHIND=True)
+    def test_awards_write_behind(self):
+        self.check_awards()
+
+    def test_win_with_knight(self):
+        self.player.gain_points(1)
+        response = self.post(knight(1, 0))
+        assert response.status_code == 200
+        assert response.data == {'detail': 'YOU WIN!!!'}
+        assert self.get_game().winner == self.user
+
+    @override_settings(WRITE_BEHIND=True)
+    def test_win_with_knight_write_behind(self):
+        self.test_win_with_knight()
+
+    def test_cut_road(self):
+        self.post(build_road(9))
+        assert self.get_game().longest_road == self.player
+        # A settlement of Pablo between the roads of Nico
+        state = load_game(self.game.id)
+        state.get_player(self.player2.id).add_building(vertex_id(1, 7),
+                                                       'settlement')
+        update_longest_road(state)
+        assert state.longest_road_id is None
@@ -33,10 +33,9 @@ class TestViews(TestCase):
                                 user=self.user,
                                 dices1=3,
                                 dices2=3)
-        for i in range(4):
-            mixer.blend('catan.Resource', owner=self.player,
-                        game=self.game,
-                        name="brick")
+        mixer.blend('catan.Hand', amount=4, owner=self.player,
+                    game=self.game,
+                    name="brick")
 
     def get_game_info(self, pk):
         path_game = reverse('GameInfo', kwargs={'pk': pk})
@@ -69,8 +68,8 @@ class TestViews(TestCase):
         assert response.status_code == 200
 
     def test_no_rsource(self):
-        brick = Resource.objects.filter(id=1)
-        brick.get().delete()
+        brick = Hand.objects.filter(id=1)
+        brick.update(amount=3)
         path = reverse('PlayerActions', kwargs={'pk': 1})
         data = {"type": "bank_trade",
                 "payload": {"give": "brick", "receive": "wool"}}
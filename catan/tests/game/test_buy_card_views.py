@@ -5,6 +5,7 @@ from django.contrib.auth.models import User
 from catan.models import *
 from catan.views.players_views import PlayerActions, PlayerInfo
 from catan.views.game_views import GameInfo
+from catan.engine.rules import deck_card
 from rest_framework.test import force_authenticate
 from rest_framework_simplejwt.tokens import AccessToken
 import pytest
@@ -33,13 +34,13 @@ class TestViews(TestCase):
                                 user=self.user,
                                 dices1=3,
                                 dices2=3)
-        self.ore = mixer.blend('catan.Resource', owner=self.player,
+        self.ore = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                game=self.game,
                                name="ore")
-        self.wool = mixer.blend('catan.Resource', owner=self.player,
+        self.wool = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                 game=self.game,
                                 name="wool")
-        self.grain = mixer.blend('catan.Resource', owner=self.player,
+        self.grain = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                  game=self.game,
                                  name="grain")
 
@@ -107,6 +108,39 @@ class TestViews(TestCase):
         assert response.status_code == 200
         assert response.data == {'detail': 'YOU WIN!!!'}
 
+    def buy_card(self):
+        path = reverse('PlayerActions', kwargs={'pk': 1})
+        request = RequestFactory().post(path, {"type": "buy_card"},
+                                        content_type='application/json')
+        force_authenticate(request, user=self.user, token=self.token)
+        return PlayerActions.as_view()(request, pk=1)
+
+    def test_deck_order(self):
+        Game.objects.filter(id=1).update(deck='mkv', deck_top=1)
+        for name in ['ore', 'wool', 'grain']:
+            self.player.gain_resources(name, 1)
+        assert self.buy_card().status_code == 200
+        assert self.buy_card().status_code == 200
+        cards = Card.objects.filter(owner=self.player).order_by('id')
+        assert [card.name for card in cards] == ['knight', 'victory_point']
+        assert Game.objects.get(id=1).deck_top == 3
+
+    def test_empty_deck(self):
+        Game.objects.filter(id=1).update(deck='k', deck_top=1)
+        response = self.buy_card()
+        assert response.status_code == 403
+        assert response.data == {"detail": "There are no more cards"}
+        assert Card.objects.filter(owner=self.player).count() == 0
+        assert self.player.get_hand() == {'ore': 1, 'wool': 1, 'grain': 1}
+
+    def test_new_decks(self):
+        game = Game.objects.get(id=1)
+        assert sorted(game.deck) == sorted('k' * 14 + 'v' * 5 + 'rrmmyy')
+        assert self.buy_card().status_code == 200
+        card = Card.objects.get(owner=self.player)
+        assert card.name == deck_card(game.deck, 0)
+        assert Game.objects.get(id=1).deck_top == 1
+
     def test_get_bank_trade(self):
         path = reverse('PlayerActions', kwargs={'pk': 1})
         request = RequestFactory().get(path)
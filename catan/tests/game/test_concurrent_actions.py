@@ -0,0 +1,127 @@
+from django.test import TransactionTestCase, RequestFactory
+from django.db import connection
+from django.urls import reverse
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.locks import GAME_LOCKS
+from catan.views.players_views import PlayerActions
+from aux.generateBoard import generateBoardTest
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import threading
+import pytest
+
+
+REQUESTS = 8
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentActions(TransactionTestCase):
+
+    def setUp(self):
+        self.token = AccessToken()
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.game = Game.objects.create(name='Juego', board=self.board,
+                                        robber=self.robber)
+        self.users = []
+        self.players = []
+        for turn, name in enumerate(['Nico', 'Pablo', 'Carlos', 'Ana']):
+            user = mixer.blend(User, username=name)
+            self.users.append(user)
+            self.players.append(Player.objects.create(
+                username=user, game=self.game, turn=turn + 1,
+                colour=Player.COLOUR[turn][0]))
+        Current_Turn.objects.create(game=self.game, user=self.users[0],
+                                    game_stage='FULL_PLAY',
+                                    dices1=3, dices2=2)
+        Building.objects.create(game=self.game, owner=self.players[0],
+                                name='settlement', level=1, index=0)
+        Road.objects.create(game=self.game, owner=self.players[0],
+                            level_1=1, index_1=0, level_2=1, index_2=1)
+        Road.objects.create(game=self.game, owner=self.players[0],
+                            level_1=1, index_1=1, level_2=1, index_2=2)
+
+    def post(self, user, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=user, token=self.token)
+        try:
+            return PlayerActions.as_view()(request, pk=self.game.id)
+        finally:
+            connection.close()
+
+    def post_parallel(self, user, data):
+        """
+        Send the same action REQUESTS times at once and return the
+        status codes of the responses.
+        """
+        barrier = threading.Barrier(REQUESTS)
+        codes = []
+
+        def send():
+            barrier.wait()
+            codes.append(self.post(user, data).status_code)
+        threads = [threading.Thread(target=send) for i in range(REQUESTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(codes)
+
+    def assert_log(self, accepted, version=None):
+        game = Game.objects.get(id=self.game.id)
+        assert game.version == (accepted if version is None else version)
+        assert [action.number for action in
+                GameAction.objects.filter(game=self.game)] == \
+            list(range(1, accepted + 1))
+        assert len(GAME_LOCKS) == 0
+
+    def test_double_click_settlement(self):
+        for name in ['brick', 'lumber', 'wool', 'grain']:
+            self.players[0].gain_resources(name, 2)
+        data = {'type': 'build_settlement',
+                'payload': {'level': 1, 'index': 2}}
+        codes = self.post_parallel(self.users[0], data)
+        assert codes == [200] + [403] * (REQUESTS - 1)
+        assert Building.objects.filter(game=self.game, level=1,
+                                       index=2).count() == 1
+        hand = Player.objects.get(id=self.players[0].id).get_hand()
+        assert hand == {'brick': 1, 'lumber': 1, 'wool': 1, 'grain': 1}
+        assert Player.objects.get(
+            id=self.players[0].id).victory_points == 1
+        self.assert_log(1)
+
+    def test_parallel_trades(self):
+        self.players[0].gain_resources('ore', 9)
+        data = {'type': 'bank_trade',
+                'payload': {'give': 'ore', 'receive': 'brick'}}
+        codes = self.post_parallel(self.users[0], data)
+        assert codes == [200] * 2 + [403] * (REQUESTS - 2)
+        hand = Player.objects.get(id=self.players[0].id).get_hand()
+        assert hand == {'ore': 1, 'brick': 2}
+        self.assert_log(2)
+
+    def test_parallel_end_turn(self):
+        codes = self.post_parallel(self.users[0], {'type': 'end_turn'})
+        assert codes == [204] + [403] * (REQUESTS - 1)
+        turn = Current_Turn.objects.get(game=self.game)
+        assert turn.user == self.users[1]
+        self.assert_log(1)
+
+    def test_road_building_card_rolled_back(self):
+        Card.objects.create(owner=self.players[0], game=self.game,
+                            name='road_building')
+        data = {'type': 'play_road_building_card',
+                'payload': [[{'level': 1, 'index': 2},
+                             {'level': 1, 'index': 3}],
+                            [{'level': 1, 'index': 2},
+                             {'level': 1, 'index': 3}]]}
+        assert self.post(self.users[0], data).status_code == 403
+        assert Road.objects.filter(game=self.game).count() == 2
+        turn = Current_Turn.objects.get(game=self.game)
+        assert turn.last_action == 'NON_BLOCKING_ACTION'
+        assert Card.objects.filter(owner=self.players[0]).count() == 1
+        self.assert_log(0)
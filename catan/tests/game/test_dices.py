@@ -6,6 +6,8 @@ from django.contrib.auth.models import User
 from aux.generateBoard import generateBoardTest, TYPE_RESOURCE
 from catan.views.players_views import PlayerInfo
 from catan.views.game_views import GameInfo
+from catan.engine.persistence import load_game, save_game
+from catan.engine.rules import throw_dices
 from rest_framework.test import force_authenticate
 from rest_framework_simplejwt.tokens import AccessToken
 import pytest
@@ -30,12 +32,15 @@ class TestView(TestCase):
         self.token = AccessToken()
 
     def test_set_not_last_gained(self):
-        resource = mixer.blend('catan.Resource', owner=self.player1,
+        resource = mixer.blend('catan.Hand', amount=1, owner=self.player1,
                                game=self.game1, name='wool',
-                               last_gained=True)
-        self.player1.set_not_last_gained()
-        resource = Resource.objects.filter(id=1, owner=self.player1)[0]
-        assert resource.last_gained is False
+                               last_gained=1)
+        # A 7 doesn't give resources, so nothing is last gained
+        state = load_game(self.game1.id)
+        throw_dices(state, dices=(3, 4))
+        save_game(state)
+        resource = Hand.objects.filter(id=1, owner=self.player1)[0]
+        assert resource.last_gained == 0
 
     def test_gain_resources(self):
         self.player1.gain_resources('wool', 1)
@@ -123,7 +128,9 @@ class TestView(TestCase):
                                     index=hexes_positions[i][1])
             game_test.robber = hexe
             game_test.save()
-            game_test.throw_dices(dice1=throws[i][0], dice2=throws[i][1])
+            state = load_game(game_test.id)
+            throw_dices(state, dices=throws[i])
+            save_game(state)
             url_game = reverse('GameInfo', kwargs={'pk': 2})
             request_game = RequestFactory().get(url_game)
             force_authenticate(request_game, user=self.user1, token=self.token)
@@ -137,8 +144,9 @@ class TestView(TestCase):
         game_test.robber = self.robber
         game_test.save()
         for i in range(10):
-            self.player1.set_not_last_gained()
-            game_test.throw_dices(dice1=throws[i][0], dice2=throws[i][1])
+            state = load_game(game_test.id)
+            throw_dices(state, dices=throws[i])
+            save_game(state)
             url_game = reverse('GameInfo', kwargs={'pk': 2})
             request_game = RequestFactory().get(url_game)
             force_authenticate(request_game, user=self.user1, token=self.token)
@@ -174,7 +182,9 @@ class TestView(TestCase):
                                 owner=player_test,
                                 name='settlement',
                                 level=2, index=2)
-        game_test.throw_dices(dice1=3, dice2=4)
+        state = load_game(game_test.id)
+        throw_dices(state, dices=(3, 4))
+        save_game(state)
         url_game = reverse('GameInfo', kwargs={'pk': 2})
         request_game = RequestFactory().get(url_game)
         force_authenticate(request_game, user=self.user1, token=self.token)
@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from catan.models import *
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from aux.generateBoard import generateBoardTest
+from aux.json_load import HexagonInfo
+from catan.engine.persistence import load_game, save_game
+from catan.engine.rules import distribute_resources
+import pytest
+
+
+@pytest.mark.django_db
+class TestDistribution(TestCase):
+
+    def setUp(self):
+        self.board = generateBoardTest()
+        # The hexe (2, 2) has the token 12 and nobody builds there
+        self.robber = Hexe.objects.get(board=self.board, level=2, index=2)
+        self.game = mixer.blend('catan.Game', name='Juego',
+                                board=self.board, robber=self.robber)
+        self.players = []
+        for i, colour in enumerate(['red', 'blue', 'green', 'yellow']):
+            user = mixer.blend(User, username='User%d' % i)
+            self.players.append(mixer.blend(Player, username=user,
+                                            game=self.game, colour=colour))
+
+    def build(self, player, name, level, index):
+        return Building.objects.create(game=self.game, owner=player,
+                                       name=name, level=level, index=index)
+
+    def distribute(self, token):
+        state = load_game(self.game.id)
+        distribute_resources(state, token)
+        save_game(state)
+
+    def count_queries(self, token):
+        with CaptureQueriesContext(connection) as context:
+            self.distribute(token)
+        return len(context.captured_queries)
+
+    def test_settlement_and_city(self):
+        # The vertex (0, 0) touches the hexe (0, 0) with token 2 (brick)
+        self.build(self.players[0], 'settlement', 0, 0)
+        self.build(self.players[1], 'city', 0, 3)
+        self.distribute(2)
+        assert self.players[0].get_hand() == {'brick': 1}
+        assert self.players[1].get_hand() == {'brick': 2}
+        assert Hand.objects.get(owner=self.players[1]).last_gained == 2
+
+    def test_last_gained_reset(self):
+        self.build(self.players[0], 'settlement', 0, 0)
+        Hand.objects.create(owner=self.players[1], game=self.game,
+                            name='ore', amount=3, last_gained=2)
+        self.distribute(2)
+        ore = Hand.objects.get(owner=self.players[1], name='ore')
+        assert ore.amount == 3
+        assert ore.last_gained == 0
+        brick = Hand.objects.get(owner=self.players[0], name='brick')
+        assert brick.last_gained == 1
+
+    def test_robber_blocks(self):
+        self.build(self.players[0], 'settlement', 0, 0)
+        self.game.robber = Hexe.objects.get(board=self.board, token=2)
+        self.game.save()
+        self.distribute(2)
+        assert self.players[0].get_hand() == {}
+
+    def test_queries_not_depend_on_buildings(self):
+        # The hands already exist, so they are only updated
+        for player in self.players:
+            player.gain_resources('brick', 1)
+        self.build(self.players[0], 'settlement', 0, 0)
+        few = self.count_queries(2)
+        # Fill the board: every player has buildings on the hexe
+        # with the token 2 and on other hexes
+        vertices = HexagonInfo(0, 0)
+        for i, vertex in enumerate(vertices[1:]):
+            name = 'city' if i % 2 else 'settlement'
+            self.build(self.players[i % 4], name, vertex[0], vertex[1])
+        for i, vertex in enumerate(HexagonInfo(2, 6)):
+            self.build(self.players[i % 4], 'settlement', vertex[0],
+                       vertex[1])
+        many = self.count_queries(2)
+        assert few == many
+        gained = sum(sum(player.get_hand().values())
+                     for player in self.players)
+        # 4 before, 1 + 1 of the settlement, then 3 settlements and
+        # 2 cities in the hexe
+        assert gained == 4 + 2 + 3 + 2 * 2
@@ -0,0 +1,283 @@
+from django.test import TransactionTestCase, override_settings
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.events import HUB, GameHub, publish_event
+from catan.views.events_views import (GameEventStream, EventsToken,
+                                      format_event, make_stream_token)
+from catan.views.players_views import PlayerActions
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import force_authenticate
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+import asyncio
+from unittest import mock
+import json
+import threading
+import pytest
+
+
+def not_found_application(scope, receive, send):
+    raise AssertionError('The request must not go to Django')
+
+
+class TestGameHub:
+
+    def test_publish_subscribers(self):
+        hub = GameHub()
+
+        async def run():
+            subscriber1 = hub.subscribe(1)
+            subscriber2 = hub.subscribe(1)
+            other = hub.subscribe(2)
+            hub.publish(1, 'turn_changed', {'user': 'Nico'})
+            event1 = await asyncio.wait_for(subscriber1.get(), 1)
+            event2 = await asyncio.wait_for(subscriber2.get(), 1)
+            await asyncio.sleep(0)
+            assert other.queue.empty()
+            hub.unsubscribe(subscriber2)
+            assert hub.subscribers_count(1) == 1
+            return (event1, event2)
+
+        event1, event2 = asyncio.run(run())
+        assert event1 == event2 == {'id': 1, 'type': 'turn_changed',
+                                    'data': {'user': 'Nico'}}
+
+    def test_counters(self):
+        hub = GameHub()
+
+        async def run():
+            assert hub.publish(1, 'turn_changed', {}) is None
+            assert hub.counters == {}
+            subscriber = hub.subscribe(1)
+            hub.publish(1, 'turn_changed', {})
+            assert 1 in hub.counters
+            hub.unsubscribe(subscriber)
+
+        asyncio.run(run())
+        assert hub.counters == {} and hub.games == {}
+
+    def test_watch(self):
+        hub = GameHub()
+
+        async def run():
+            watcher = hub.watch(1)
+            other = hub.watch(2)
+            thread = threading.Thread(target=lambda: hub.notify_change(1))
+            thread.start()
+            changed = await watcher.wait(1)
+            thread.join()
+            not_changed = await other.wait(0.05)
+            hub.unwatch(watcher)
+            hub.unwatch(other)
+            return (changed, not_changed)
+
+        assert asyncio.run(run()) == (True, False)
+        assert hub.watchers == {}
+
+    def test_publish_from_thread(self):
+        hub = GameHub()
+
+        async def run():
+            subscriber = hub.subscribe(1)
+            thread = threading.Thread(
+                target=lambda: [hub.publish(1, 'winner', {'player': 'Nico'})
+                                for i in range(3)])
+            thread.start()
+            events = [await asyncio.wait_for(subscriber.get(), 1)
+                      for i in range(3)]
+            thread.join()
+            return events
+
+        events = asyncio.run(run())
+        assert [event['id'] for event in events] == [1, 2, 3]
+
+    def test_lagging(self):
+        hub = GameHub(max_events=2)
+
+        async def run():
+            subscriber = hub.subscribe(1)
+            for i in range(3):
+                hub.publish(1, 'turn_changed', {})
+            await asyncio.sleep(0.01)
+            return subscriber
+
+        subscriber = asyncio.run(run())
+        assert subscriber.lagging
+        assert subscriber.queue.qsize() == 2
+
+    def test_format_event(self):
+        event = {'id': 3, 'type': 'build', 'data': {'building': 'road'}}
+        assert format_event(event) == \
+            b'id: 3\nevent: build\ndata: {"building": "road"}\n\n'
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(EVENTS_KEEPALIVE=0.1)
+class TestGameEventStream(TransactionTestCase):
+
+    def setUp(self):
+        self.user = mixer.blend(User, username='Nico')
+        self.user2 = mixer.blend(User, username='Pablo')
+        self.token = str(AccessToken.for_user(self.user))
+        self.board = mixer.blend('catan.Board', name='Colonos')
+        self.hexe = mixer.blend('catan.Hexe', level=2, index=11,
+                                terrain='desert', token=2, board=self.board)
+        self.game = mixer.blend('catan.Game', name='juego1',
+                                board=self.board, robber=self.hexe)
+        self.player = mixer.blend('catan.Player', turn=1, username=self.user,
+                                  colour='RED', game=self.game,
+                                  victory_points=0)
+        self.player2 = mixer.blend('catan.Player', turn=2,
+                                   username=self.user2, colour='BLUE',
+                                   game=self.game, victory_points=0)
+        self.turn = mixer.blend('catan.Current_Turn', game=self.game,
+                                user=self.user, game_stage='FULL_PLAY',
+                                last_action='NON_BLOCKING_ACTION',
+                                robber_moved=False, dices1=3, dices2=3)
+        self.application = GameEventStream(not_found_application)
+
+    def get_scope(self, pk, query_string):
+        path = '/games/%s/events/' % pk
+        return {'type': 'http', 'method': 'GET', 'path': path,
+                'raw_path': path.encode(), 'root_path': '',
+                'scheme': 'http', 'query_string': query_string,
+                'http_version': '1.1', 'server': ('testserver', 80),
+                'client': ('127.0.0.1', 5000),
+                'headers': [(b'host', b'testserver'),
+                            (b'origin', b'http://localhost:3000')]}
+
+    async def connect(self, pk, query_string):
+        communicator = ApplicationCommunicator(
+            self.application, self.get_scope(pk, query_string))
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(5)
+        return (communicator, start)
+
+    def stream_token(self):
+        path = reverse('EventsToken', kwargs={'pk': self.game.id})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=self.user, token=self.token)
+        response = EventsToken.as_view()(request, pk=self.game.id)
+        assert response.status_code == 200
+        return response.data['token']
+
+    def test_stream(self):
+        token = self.stream_token()
+
+        async def run():
+            query_string = ('token=%s' % token).encode()
+            communicator, start = await self.connect(self.game.id,
+                                                     query_string)
+            connected = await communicator.receive_output(5)
+            await sync_to_async(
+                lambda: publish_event(self.game.id, 'turn_changed',
+                                      user='Pablo'),
+                thread_sensitive=False)()
+            event = await communicator.receive_output(5)
+            keepalive = await communicator.receive_output(5)
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(5)
+            return (start, connected, event, keepalive)
+
+        start, connected, event, keepalive = asyncio.run(run())
+        assert start['status'] == 200
+        headers = dict(start['headers'])
+        assert headers[b'content-type'] == b'text/event-stream'
+        assert headers[b'access-control-allow-origin'] == \
+            b'http://localhost:3000'
+        assert connected['body'] == b': connected\n\n'
+        lines = event['body'].decode().split('\n')
+        assert lines[1] == 'event: turn_changed'
+        assert json.loads(lines[2][len('data: '):]) == {'user': 'Pablo'}
+        assert keepalive['body'] == b': keepalive\n\n'
+        assert HUB.subscribers_count(self.game.id) == 0
+
+    def test_invalid_token(self):
+        async def run():
+            communicator, start = await self.connect(self.game.id,
+                                                     b'token=invalid')
+            return start
+
+        assert asyncio.run(run())['status'] == 401
+
+    def test_stream_token(self):
+        def status(query_string, pk=None):
+            async def run():
+                communicator, start = await self.connect(
+                    pk or self.game.id, query_string.encode())
+                await communicator.send_input({'type': 'http.disconnect'})
+                await communicator.wait(5)
+                return start['status']
+            return asyncio.run(run())
+
+        token = make_stream_token(self.game.id, self.user.id)
+        # The access tokens are not accepted in the query string
+        assert status('token=%s' % self.token) == 401
+        # The token is only valid for its game
+        assert status('token=%s' % make_stream_token(100, self.user.id),
+                      pk=self.game.id) == 401
+        assert status('token=%s' % token) == 200
+        with override_settings(EVENTS_TOKEN_MAX_AGE=-1):
+            assert status('token=%s' % token) == 401
+
+    def test_game_not_exists(self):
+        token = make_stream_token(100, self.user.id)
+
+        async def run():
+            query_string = ('token=%s' % token).encode()
+            communicator, start = await self.connect(100, query_string)
+            return start
+
+        assert asyncio.run(run())['status'] == 404
+
+    def get_events(self, action, count):
+        """
+        Do an action (in other thread) and get the first events
+        of the game.
+        """
+        async def run():
+            subscriber = HUB.subscribe(self.game.id)
+            try:
+                await sync_to_async(action, thread_sensitive=False)()
+                return [await asyncio.wait_for(subscriber.get(), 1)
+                        for i in range(count)]
+            finally:
+                HUB.unsubscribe(subscriber)
+
+        return asyncio.run(run())
+
+    def post(self, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=self.user, token=self.token)
+        return PlayerActions.as_view()(request, pk=self.game.id)
+
+    def test_build_road_event(self):
+        Building.objects.create(game=self.game, owner=self.player,
+                                name='settlement', level=0, index=0)
+        self.player.gain_resources('brick', 1)
+        self.player.gain_resources('lumber', 1)
+        payload = [{'level': 0, 'index': 0}, {'level': 0, 'index': 1}]
+        data = {'type': 'build_road', 'payload': payload}
+        events = self.get_events(lambda: self.post(data), 1)
+        assert events[0]['type'] == 'build'
+        assert events[0]['data'] == {'player': 'Nico', 'building': 'road',
+                                     'position': payload}
+
+    def test_end_turn_events(self):
+        Building.objects.create(game=self.game, owner=self.player2,
+                                name='city', level=0, index=0)
+        Hexe.objects.create(board=self.board, level=0, index=0,
+                            terrain='ore', token=8)
+        with mock.patch('random.randint', return_value=4):
+            events = self.get_events(lambda: self.post({'type': 'end_turn'}),
+                                     3)
+        assert [event['type'] for event in events] == ['turn_changed',
+                                                       'dice_rolled',
+                                                       'resources_gained']
+        assert events[0]['data'] == {'user': 'Pablo'}
+        assert events[2]['data'] == {'resources': {'Pablo': {'ore': 2}}}
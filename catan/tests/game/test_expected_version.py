@@ -0,0 +1,97 @@
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.players_views import PlayerActions
+from aux.generateBoard import generateBoardTest
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+
+
+def trade(version):
+    return {'type': 'bank_trade', 'expected_version': version,
+            'payload': {'give': 'ore', 'receive': 'brick'}}
+
+
+@pytest.mark.django_db
+class TestExpectedVersion(TestCase):
+
+    def setUp(self):
+        self.token = AccessToken()
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.user = mixer.blend(User, username='Nico')
+        self.game = Game.objects.create(name='Juego', board=self.board,
+                                        robber=self.robber, version=5)
+        self.player = Player.objects.create(username=self.user,
+                                            game=self.game, turn=1,
+                                            colour='RED')
+        Current_Turn.objects.create(game=self.game, user=self.user,
+                                    game_stage='FULL_PLAY',
+                                    dices1=3, dices2=2)
+        self.player.gain_resources('ore', 8)
+
+    def post(self, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=self.user, token=self.token)
+        return PlayerActions.as_view()(request, pk=self.game.id)
+
+    def get_version(self):
+        return Game.objects.get(id=self.game.id).version
+
+    def get_ore(self):
+        return Player.objects.get(id=self.player.id).get_hand()['ore']
+
+    def test_expected_version(self):
+        assert self.post(trade(5)).status_code == 200
+        assert self.get_version() == 6
+        assert self.get_ore() == 4
+        action = GameAction.objects.get(game=self.game)
+        assert action.action == 'bank_trade'
+        assert 'expected_version' not in action.data
+
+    def test_conflict(self):
+        response = self.post(trade(4))
+        assert response.status_code == 409
+        assert response.data == {'detail': 'The game has changed',
+                                 'version': 5}
+        assert self.get_version() == 5
+        assert self.get_ore() == 8
+        assert not GameAction.objects.filter(game=self.game).exists()
+
+    def test_same_version_twice(self):
+        assert self.post(trade(5)).status_code == 200
+        assert self.post(trade(5)).status_code == 409
+        assert self.get_ore() == 4
+
+    def test_rejected_action(self):
+        data = {'type': 'build_settlement', 'expected_version': 5,
+                'payload': {'level': 1, 'index': 2}}
+        assert self.post(data).status_code == 403
+        # The version is not increased by an action that failed
+        assert self.get_version() == 5
+        assert self.post(trade(5)).status_code == 200
+
+    def test_invalid_version(self):
+        assert self.post(trade('last')).status_code == 400
+        assert self.get_version() == 5
+
+    def test_missing_game(self):
+        path = reverse('PlayerActions', kwargs={'pk': 999})
+        request = RequestFactory().post(path, trade(5),
+                                        content_type='application/json')
+        force_authenticate(request, user=self.user, token=self.token)
+        assert PlayerActions.as_view()(request, pk=999).status_code == 404
+
+    @override_settings(WRITE_BEHIND=True)
+    def test_write_behind(self):
+        response = self.post(trade(4))
+        assert response.status_code == 409
+        assert response.data['version'] == 5
+        assert self.post(trade(5)).status_code == 200
+        assert self.post(trade(5)).status_code == 409
+        assert self.post(trade(6)).status_code == 200
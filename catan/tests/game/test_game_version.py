@@ -0,0 +1,113 @@
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.players_views import PlayerActions, PlayerInfo
+from catan.views.game_views import GameInfo
+from catan.views.snapshot_views import GameSnapshot
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+
+
+@pytest.mark.django_db
+class TestGameVersion(TestCase):
+
+    def setUp(self):
+        self.user = mixer.blend(User, username='Nico')
+        self.user2 = mixer.blend(User, username='Pablo')
+        self.token = AccessToken()
+        self.board = mixer.blend('catan.Board', name='Colonos')
+        self.hexe = mixer.blend('catan.Hexe', level=2, index=11,
+                                terrain='desert',
+                                token=2, board=self.board)
+        self.game = mixer.blend('catan.Game', name='juego1',
+                                board=self.board,
+                                robber=self.hexe, version=0)
+        self.player = mixer.blend('catan.Player', turn=1, username=self.user,
+                                  colour='RED', game=self.game,
+                                  victory_points=0)
+        self.player2 = mixer.blend('catan.Player', turn=2,
+                                   username=self.user2, colour='BLUE',
+                                   game=self.game, victory_points=0)
+        self.turn = mixer.blend('catan.Current_Turn', game=self.game,
+                                user=self.user, game_stage='FULL_PLAY',
+                                last_action='NON_BLOCKING_ACTION',
+                                robber_moved=False,
+                                dices1=3, dices2=3)
+        mixer.blend('catan.Hand', amount=4, owner=self.player,
+                    game=self.game, name="brick", last_gained=0)
+
+    def get(self, view, name, user=None, etag=None):
+        path = reverse(name, kwargs={'pk': self.game.id})
+        headers = {}
+        if etag is not None:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        request = RequestFactory().get(path, **headers)
+        force_authenticate(request, user=user or self.user, token=self.token)
+        return view.as_view()(request, pk=self.game.id)
+
+    def post_action(self, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=self.user, token=self.token)
+        return PlayerActions.as_view()(request, pk=self.game.id)
+
+    def get_version(self):
+        self.game.refresh_from_db()
+        return self.game.version
+
+    def test_etag_not_modified(self):
+        views = [(GameInfo, 'GameInfo'), (PlayerInfo, 'PlayerInfo'),
+                 (PlayerActions, 'PlayerActions'),
+                 (GameSnapshot, 'GameSnapshot')]
+        for view, name in views:
+            response = self.get(view, name)
+            assert response.status_code == 200
+            etag = response['ETag']
+            with CaptureQueriesContext(connection) as context:
+                response = self.get(view, name, etag=etag)
+            assert response.status_code == 304
+            # Only the version of the game is read
+            assert len(context.captured_queries) == 1
+
+    def test_etag_by_user(self):
+        response = self.get(PlayerInfo, 'PlayerInfo')
+        response2 = self.get(PlayerInfo, 'PlayerInfo', user=self.user2,
+                             etag=response['ETag'])
+        assert response2.status_code == 200
+        assert response2['ETag'] != response['ETag']
+
+    def test_action_changes_version(self):
+        response = self.get(GameInfo, 'GameInfo')
+        etag = response['ETag']
+        data = {"type": "bank_trade",
+                "payload": {"give": "brick", "receive": "wool"}}
+        assert self.post_action(data).status_code == 200
+        assert self.get_version() == 1
+        response = self.get(GameInfo, 'GameInfo', etag=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_invalid_action_same_version(self):
+        data = {"type": "bank_trade",
+                "payload": {"give": "wool", "receive": "brick"}}
+        assert self.post_action(data).status_code == 403
+        assert self.get_version() == 0
+
+    def test_end_turn(self):
+        response = self.post_action({"type": "end_turn"})
+        assert response.status_code == 204
+        # The new turn and the throw of the dices are one change
+        assert self.get_version() == 1
+
+    def test_game_not_exists(self):
+        path = reverse('GameInfo', kwargs={'pk': 100})
+        request = RequestFactory().get(path, HTTP_IF_NONE_MATCH='"1-0-1"')
+        force_authenticate(request, user=self.user, token=self.token)
+        response = GameInfo.as_view()(request, pk=100)
+        assert response.status_code == 404
@@ -67,9 +67,9 @@ class TestView(TestCase):
                               development_cards=1, resources_cards=2)
         current_turn = mixer.blend('catan.Current_Turn', game=game1,
                                    user=user1)
-        resource1 = mixer.blend('catan.Resource', owner=player1,
+        resource1 = mixer.blend('catan.Hand', amount=1, owner=player1,
                                 game=game1, name='wool',
-                                last_gained=True)
+                                last_gained=1)
         building = mixer.blend('catan.Building',
                                name="settlement", owner=player2,
                                level=2, index=6, game=game1)
@@ -128,3 +128,73 @@ class TestView(TestCase):
         response = view(request, pk=1)
         assert response.data == []
         assert response.status_code == 200
+
+    def test_GameInfo_queries(self):
+        robber = mixer.blend('catan.Hexe', level=1, index=2)
+        board = Board.objects.create(name='Colonos')
+        game = Game.objects.create(name='Juego', board=board,
+                                   robber=robber, winner=self.user)
+        for turn in range(1, 5):
+            user = mixer.blend(User)
+            player = mixer.blend('catan.Player', username=user, game=game,
+                                 colour=Player.COLOUR[turn - 1][0],
+                                 turn=turn)
+            for index in range(turn * 6, turn * 6 + 3):
+                mixer.blend('catan.Building', name='settlement', game=game,
+                            owner=player, level=2, index=index)
+                mixer.blend('catan.Road', owner=player, game=game,
+                            level_1=2, index_1=index, level_2=2,
+                            index_2=index + 1)
+                mixer.blend('catan.Card', owner=player, game=game,
+                            name='knight')
+            mixer.blend('catan.Hand', owner=player, game=game, name='ore',
+                        amount=3, last_gained=1)
+        mixer.blend('catan.Current_Turn', game=game, user=user)
+        path = reverse('GameInfo', kwargs={'pk': game.id})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=self.user, token=self.token)
+        # The version, the game and one query for each table of its
+        # pieces, no matter how many players and pieces it has
+        with self.assertNumQueries(7):
+            response = GameInfo.as_view()(request, pk=game.id)
+        assert response.data['winner'] == 'test_user'
+        assert len(response.data['players']) == 4
+        assert response.data['players'][3]['settlements'][0] == \
+            {'level': 2, 'index': 24}
+        assert response.data['players'][3]['development_cards'] == 3
+        assert response.data['players'][3]['last_gained'] == ['ore']
+
+    def test_GameList_pages_and_filters(self):
+        robber = mixer.blend('catan.Hexe', level=1, index=2)
+        board = Board.objects.create(name='Colonos')
+        other = mixer.blend(User, username='Nico')
+        for i in range(5):
+            game = Game.objects.create(name='Juego%d' % i, board=board,
+                                       robber=robber,
+                                       winner=other if i < 2 else None)
+            mixer.blend(Current_Turn, game=game, user=other)
+            if i % 2 == 0:
+                mixer.blend(Player, username=self.user, game=game,
+                            colour='yellow', turn=1)
+
+        def get(query):
+            path = reverse('Games') + query
+            request = RequestFactory().get(path)
+            force_authenticate(request, user=self.user, token=self.token)
+            response = GameList.as_view()(request)
+            return [game['id'] for game in response.data], response
+
+        ids, response = get('?limit=3')
+        assert ids == [1, 2, 3]
+        assert response['Link'] == \
+            '<http://testserver/games/?limit=3&after=3>; rel="next"'
+        ids, response = get('?limit=3&after=3')
+        assert ids == [4, 5]
+        assert response.data[0] == {'id': 4, 'name': 'Juego3',
+                                    'in_turn': 'Nico'}
+        assert get('?finished=false')[0] == [3, 4, 5]
+        assert get('?finished=true')[0] == [1, 2]
+        assert get('?mine=true')[0] == [1, 3, 5]
+        assert get('?mine=true&finished=false')[0] == [3, 5]
+        with self.assertNumQueries(1):
+            get('')
@@ -0,0 +1,88 @@
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.players_views import PlayerActions
+from catan.engine.actions import initial_settlements
+from catan.engine.write_behind import ACTIVE_GAMES
+from aux.generateBoard import generateBoardTest
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+
+
+def settlement(level, index):
+    return {'type': 'build_settlement',
+            'payload': {'level': level, 'index': index}}
+
+
+@pytest.mark.django_db
+class TestGamesIsolation(TestCase):
+    """
+    Several games played by the same process: the positions of a game
+    must not change with the buildings of the others.
+    """
+    def setUp(self):
+        self.token = AccessToken()
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.games = []
+        self.users = []
+        for number in range(3):
+            game = Game.objects.create(name='Juego%d' % number,
+                                       board=self.board, robber=self.robber)
+            user = mixer.blend(User, username='Nico%d' % number)
+            Player.objects.create(username=user, game=game, turn=1,
+                                  colour='RED')
+            Current_Turn.objects.create(game=game, user=user,
+                                        game_stage='FIRST_CONSTRUCTION',
+                                        last_action='NON_BLOCKING_ACTION')
+            self.games.append(game)
+            self.users.append(user)
+
+    def request(self, number, data=None):
+        game = self.games[number]
+        path = reverse('PlayerActions', kwargs={'pk': game.id})
+        if data is None:
+            request = RequestFactory().get(path)
+        else:
+            request = RequestFactory().post(path, data,
+                                            content_type='application/json')
+        force_authenticate(request, user=self.users[number],
+                           token=self.token)
+        return PlayerActions.as_view()(request, pk=game.id)
+
+    def get_settlements(self, number):
+        response = self.request(number)
+        assert response.status_code == 200
+        return response.data[0]['payload']
+
+    def build_settlements(self):
+        assert [len(self.get_settlements(number))
+                for number in range(3)] == [54, 54, 54]
+        assert self.request(0, settlement(0, 0)).status_code == 200
+        assert self.request(2, settlement(2, 10)).status_code == 200
+
+    def test_initial_settlements_of_views(self):
+        self.build_settlements()
+        for i in range(3):
+            # Every player can build again, without ending the turn
+            Current_Turn.objects.filter(game__in=self.games).update(
+                last_action='NON_BLOCKING_ACTION')
+            Game.objects.filter(board=self.board).update(
+                version=models.F('version') + 1)
+            settlements = [self.get_settlements(number)
+                           for number in range(3)]
+            assert [len(payload) for payload in settlements] == [50, 54, 51]
+            assert {'level': 0, 'index': 0} not in settlements[0]
+            assert {'level': 0, 'index': 0} in settlements[1]
+            assert {'level': 0, 'index': 0} in settlements[2]
+
+    @override_settings(WRITE_BEHIND=True)
+    def test_initial_settlements_in_memory(self):
+        self.build_settlements()
+        states = [ACTIVE_GAMES.get(game.id).state for game in self.games]
+        for i in range(3):
+            assert [len(initial_settlements(state))
+                    for state in states] == [50, 54, 51]
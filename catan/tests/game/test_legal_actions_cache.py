@@ -0,0 +1,98 @@
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.players_views import (PlayerActions, LegalActionsCache,
+                                       LEGAL_ACTIONS)
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+
+
+@pytest.mark.django_db
+class TestLegalActionsCache(TestCase):
+
+    def setUp(self):
+        self.user = mixer.blend(User, username='Nico')
+        self.user2 = mixer.blend(User, username='Pablo')
+        self.user3 = mixer.blend(User, username='Carlos')
+        self.token = AccessToken()
+        self.board = mixer.blend('catan.Board', name='Colonos')
+        self.hexe = mixer.blend('catan.Hexe', level=2, index=11,
+                                terrain='desert', token=2, board=self.board)
+        self.game = mixer.blend('catan.Game', name='juego1',
+                                board=self.board, robber=self.hexe,
+                                version=0)
+        self.player = mixer.blend('catan.Player', turn=1, username=self.user,
+                                  colour='RED', game=self.game,
+                                  victory_points=0)
+        self.player2 = mixer.blend('catan.Player', turn=2,
+                                   username=self.user2, colour='BLUE',
+                                   game=self.game, victory_points=0)
+        self.turn = mixer.blend('catan.Current_Turn', game=self.game,
+                                user=self.user, game_stage='FULL_PLAY',
+                                last_action='NON_BLOCKING_ACTION',
+                                robber_moved=False, dices1=3, dices2=3)
+        mixer.blend('catan.Hand', amount=4, owner=self.player,
+                    game=self.game, name='brick', last_gained=0)
+
+    def get_actions(self, user):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=user, token=self.token)
+        return PlayerActions.as_view()(request, pk=self.game.id)
+
+    def post_action(self, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=self.user, token=self.token)
+        return PlayerActions.as_view()(request, pk=self.game.id)
+
+    def test_hit(self):
+        response = self.get_actions(self.user)
+        assert LEGAL_ACTIONS.stats() == {'hits': 0, 'misses': 1, 'games': 1}
+        with CaptureQueriesContext(connection) as context:
+            cached = self.get_actions(self.user)
+        assert cached.data == response.data
+        assert LEGAL_ACTIONS.stats()['hits'] == 1
+        # The ETag, the turn and nothing more
+        assert len(context.captured_queries) == 2
+
+    def test_new_version(self):
+        response = self.get_actions(self.user)
+        assert {'type': 'bank_trade'} in response.data
+        data = {"type": "bank_trade",
+                "payload": {"give": "brick", "receive": "wool"}}
+        assert self.post_action(data).status_code == 200
+        response = self.get_actions(self.user)
+        assert {'type': 'bank_trade'} not in response.data
+        assert LEGAL_ACTIONS.stats()['misses'] == 2
+
+    def test_not_in_turn(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_actions(self.user2)
+        assert response.status_code == 200
+        assert response.data == []
+        assert LEGAL_ACTIONS.stats() == {'hits': 0, 'misses': 0, 'games': 0}
+        # The ETag, the turn and the player
+        assert len(context.captured_queries) == 3
+
+    def test_not_player(self):
+        response = self.get_actions(self.user3)
+        assert response.status_code == 404
+
+    def test_least_recently_used(self):
+        cache = LegalActionsCache(max_games=2)
+        cache.set(1, 0, 1, ['game 1'])
+        cache.set(2, 0, 1, ['game 2'])
+        assert cache.get(1, 0, 1) == ['game 1']
+        cache.set(3, 0, 1, ['game 3'])
+        assert cache.get(2, 0, 1) is None
+        assert cache.get(1, 1, 1) is None
+        assert cache.get(3, 0, 2) is None
+        assert cache.get(3, 0, 1) == ['game 3']
+        assert cache.stats() == {'hits': 2, 'misses': 3, 'games': 2}
@@ -0,0 +1,130 @@
+from django.test import TransactionTestCase, override_settings
+from django.core.asgi import get_asgi_application
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.wait_views import WaitGameChange, get_wait_params
+from catan.events import HUB, publish_change
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+import asyncio
+import json
+import time
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(LONG_POLL_TIMEOUT=5, LONG_POLL_RECHECK=10)
+class TestLongPolling(TransactionTestCase):
+
+    def setUp(self):
+        self.user = mixer.blend(User, username='Nico')
+        self.token = str(AccessToken.for_user(self.user))
+        self.board = mixer.blend('catan.Board', name='Colonos')
+        self.hexe = mixer.blend('catan.Hexe', level=2, index=11,
+                                terrain='desert', token=2, board=self.board)
+        self.game = mixer.blend('catan.Game', name='juego1',
+                                board=self.board, robber=self.hexe,
+                                version=3)
+        self.player = mixer.blend('catan.Player', turn=1, username=self.user,
+                                  colour='RED', game=self.game,
+                                  victory_points=0)
+        mixer.blend('catan.Current_Turn', game=self.game, user=self.user,
+                    game_stage='FULL_PLAY', dices1=3, dices2=3)
+        self.application = WaitGameChange(get_asgi_application())
+
+    def get_scope(self, path, query_string=b'', token=None):
+        token = token or self.token
+        return {'type': 'http', 'method': 'GET', 'path': path,
+                'raw_path': path.encode(), 'root_path': '',
+                'scheme': 'http', 'query_string': query_string,
+                'http_version': '1.1', 'server': ('testserver', 80),
+                'client': ('127.0.0.1', 5000),
+                'headers': [(b'host', b'testserver'),
+                            (b'authorization',
+                             ('Bearer %s' % token).encode())]}
+
+    async def request(self, scope, during_wait=None):
+        communicator = ApplicationCommunicator(self.application, scope)
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        if during_wait is not None:
+            await during_wait()
+        start = await communicator.receive_output(10)
+        body = await communicator.receive_output(10)
+        await communicator.wait(10)
+        return (start['status'], body.get('body', b''))
+
+    def wait(self, version, timeout=5, during_wait=None, **kwargs):
+        query_string = ('version=%s&timeout=%s' % (version, timeout)).encode()
+        scope = self.get_scope('/games/%s/wait/' % self.game.id,
+                               query_string, **kwargs)
+        return asyncio.run(self.request(scope, during_wait))
+
+    def test_changed_version(self):
+        status, body = self.wait(version=2)
+        assert status == 200
+        data = json.loads(body)
+        assert data['version'] == 3
+        assert data['game']['players'][0]['username'] == 'Nico'
+        assert data['board']['hexes'][0]['terrain'] == 'desert'
+
+    def test_without_board(self):
+        scope = self.get_scope('/games/%s/wait/' % self.game.id,
+                               b'version=2&board=false&timeout=1')
+        status, body = asyncio.run(self.request(scope))
+        assert status == 200
+        data = json.loads(body)
+        assert data['version'] == 3
+        assert 'board' not in data
+
+    def test_timeout(self):
+        begin = time.monotonic()
+        status, body = self.wait(version=3, timeout=0.3)
+        assert status == 304
+        assert body == b''
+        assert 0.3 <= time.monotonic() - begin < 3
+
+    def test_wait_change(self):
+        async def change():
+            await asyncio.sleep(0.2)
+            await sync_to_async(self.game.bump_version)()
+            await sync_to_async(publish_change)(self.game.id)
+
+        begin = time.monotonic()
+        status, body = self.wait(version=3, during_wait=change)
+        assert status == 200
+        assert json.loads(body)['version'] == 4
+        assert time.monotonic() - begin < 3
+        assert HUB.watchers == {}
+
+    @override_settings(LONG_POLL_RECHECK=0.05)
+    def test_change_of_other_process(self):
+        # Nobody wakes the wait, the version is checked again
+        async def change():
+            await asyncio.sleep(0.2)
+            await sync_to_async(self.game.bump_version)()
+
+        status, body = self.wait(version=3, during_wait=change)
+        assert status == 200
+        assert json.loads(body)['version'] == 4
+
+    def test_invalid_token(self):
+        status, body = self.wait(version=3, token='invalid')
+        assert status == 401
+
+    def test_game_not_exists(self):
+        scope = self.get_scope('/games/100/wait/', b'version=1')
+        status, body = asyncio.run(self.request(scope))
+        assert status == 404
+
+    def test_other_paths(self):
+        scope = self.get_scope('/games/%s/' % self.game.id)
+        status, body = asyncio.run(self.request(scope))
+        assert status == 200
+        assert json.loads(body)['players'][0]['username'] == 'Nico'
+
+    def test_wait_params(self):
+        assert get_wait_params(b'version=2&timeout=1') == (2, 1)
+        assert get_wait_params(b'timeout=100') == (None, 5)
+        assert get_wait_params(b'version=a&timeout=-1') == (None, 0)
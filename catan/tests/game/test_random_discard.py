@@ -4,6 +4,8 @@ from mixer.backend.django import mixer
 from django.contrib.auth.models import User
 from catan.models import *
 from catan.views.players_views import PlayerInfo
+from catan.engine.persistence import load_game, save_game
+from catan.engine.rules import random_discard
 from aux.generateBoard import *
 from rest_framework.test import force_authenticate
 from rest_framework_simplejwt.tokens import AccessToken
@@ -35,26 +37,24 @@ class TestView(TestCase):
                               game=game, colour="green", resources_cards=7)
         player4 = mixer.blend("catan.Player", turn=4, username=username4,
                               game=game, colour="red", resources_cards=2)
-        for i in range(3):
-            mixer.blend("catan.Resource", game=game,
-                        name="grain", owner=player1)
-            mixer.blend("catan.Resource", game=game,
-                        name="brick", owner=player1)
-            mixer.blend("catan.Resource", game=game,
-                        name="wool", owner=player2)
-            mixer.blend("catan.Resource", game=game,
-                        name="ore", owner=player2)
-            mixer.blend("catan.Resource", game=game,
-                        name="lumber", owner=player2)
-            mixer.blend("catan.Resource", game=game,
-                        name="lumber", owner=player3)
-        for i in range(2):
-            mixer.blend("catan.Resource", game=game,
-                        name="ore", owner=player3)
-            mixer.blend("catan.Resource", game=game,
-                        name="wool", owner=player3)
-            mixer.blend("catan.Resource", game=game,
-                        name="lumber", owner=player4)
+        mixer.blend("catan.Hand", amount=3, game=game,
+                    name="grain", owner=player1)
+        mixer.blend("catan.Hand", amount=3, game=game,
+                    name="brick", owner=player1)
+        mixer.blend("catan.Hand", amount=3, game=game,
+                    name="wool", owner=player2)
+        mixer.blend("catan.Hand", amount=3, game=game,
+                    name="ore", owner=player2)
+        mixer.blend("catan.Hand", amount=3, game=game,
+                    name="lumber", owner=player2)
+        mixer.blend("catan.Hand", amount=3, game=game,
+                    name="lumber", owner=player3)
+        mixer.blend("catan.Hand", amount=2, game=game,
+                    name="ore", owner=player3)
+        mixer.blend("catan.Hand", amount=2, game=game,
+                    name="wool", owner=player3)
+        mixer.blend("catan.Hand", amount=2, game=game,
+                    name="lumber", owner=player4)
         path = reverse('PlayerInfo', kwargs={'pk': 1})
         request = RequestFactory().get(path)
         token = AccessToken()
@@ -66,10 +66,10 @@ class TestView(TestCase):
                                  'cards': [],
                                  'resources': [
                                      'grain',
-                                     'brick',
                                      'grain',
-                                     'brick',
                                      'grain',
+                                     'brick',
+                                     'brick',
                                      'brick']
                                 }
         force_authenticate(request, user=username2, token=token)
@@ -80,13 +80,13 @@ class TestView(TestCase):
                                  'cards': [],
                                  'resources': [
                                      'wool',
-                                     'ore',
-                                     'lumber',
                                      'wool',
-                                     'ore',
-                                     'lumber',
                                      'wool',
                                      'ore',
+                                     'ore',
+                                     'ore',
+                                     'lumber',
+                                     'lumber',
                                      'lumber']
                                 }
         force_authenticate(request, user=username3, token=token)
@@ -100,8 +100,8 @@ class TestView(TestCase):
                                      'lumber',
                                      'lumber',
                                      'ore',
-                                     'wool',
                                      'ore',
+                                     'wool',
                                      'wool']
                                 }
         force_authenticate(request, user=username4, token=token)
@@ -115,8 +115,10 @@ class TestView(TestCase):
                                      'lumber']
                                 }
         players = Player.objects.filter(game=game)
-        game.random_discard()
-        assert len(Resource.objects.filter(owner=player1)) == 6
-        assert len(Resource.objects.filter(owner=player2)) == 5
-        assert len(Resource.objects.filter(owner=player3)) == 7
-        assert len(Resource.objects.filter(owner=player4)) == 2
+        state = load_game(game.id)
+        random_discard(state)
+        save_game(state)
+        assert sum(player1.get_hand().values()) == 6
+        assert sum(player2.get_hand().values()) == 5
+        assert sum(player3.get_hand().values()) == 7
+        assert sum(player4.get_hand().values()) == 2
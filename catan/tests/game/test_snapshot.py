@@ -0,0 +1,121 @@
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.game_views import GameInfo, GameLoad
+from catan.views.board_views import BoardInfo
+from catan.views.players_views import (PlayerInfo, PlayerActions,
+                                       LEGAL_ACTIONS)
+from catan.views.snapshot_views import GameSnapshot
+from catan.engine.persistence import load_game
+from catan.engine.log import dump_state
+from aux.generateBoard import generateBoardTest
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+
+
+@pytest.mark.django_db
+class TestSnapshot(TestCase):
+
+    def setUp(self):
+        self.token = AccessToken()
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.game = Game.objects.create(name='Juego', board=self.board,
+                                        robber=self.robber)
+        self.user1 = mixer.blend(User, username='Nico')
+        self.user2 = mixer.blend(User, username='Pablo')
+        self.user3 = mixer.blend(User, username='Carlos')
+        self.player1 = mixer.blend(Player, username=self.user1,
+                                   game=self.game, colour='yellow', turn=1)
+        self.player2 = mixer.blend(Player, username=self.user2,
+                                   game=self.game, colour='green', turn=2)
+        Current_Turn.objects.create(game=self.game, user=self.user1,
+                                    game_stage='FULL_PLAY',
+                                    dices1=3, dices2=2)
+        Building.objects.create(game=self.game, owner=self.player1,
+                                name='settlement', level=1, index=0)
+        Building.objects.create(game=self.game, owner=self.player2,
+                                name='city', level=2, index=6)
+        Road.objects.create(game=self.game, owner=self.player1,
+                            level_1=1, index_1=0, level_2=1, index_2=1)
+        self.player1.gain_resources('brick', 2)
+        self.player1.gain_resources('lumber', 1)
+        self.player2.gain_resources('ore', 3)
+        Card.objects.create(owner=self.player1, game=self.game,
+                            name='monopoly')
+
+    def get(self, view, name, user):
+        path = reverse(name, kwargs={'pk': self.game.id})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=user, token=self.token)
+        return view.as_view()(request, pk=self.game.id)
+
+    def test_same_data_as_views(self):
+        response = self.get(GameSnapshot, 'GameSnapshot', self.user1)
+        assert response.status_code == 200
+        actions = self.get(PlayerActions, 'PlayerActions', self.user1)
+        board = self.get(BoardInfo, 'BoardInfo', self.user1)
+        hand = self.get(PlayerInfo, 'PlayerInfo', self.user1)
+        game = self.get(GameInfo, 'GameInfo', self.user1)
+        assert response.data['actions'] == actions.data
+        assert response.data['board'] == board.data
+        assert response.data['hand'] == hand.data
+        assert response.data['game'] == game.data
+        assert response.data['hand'] == {'resources': ['brick', 'brick',
+                                                       'lumber'],
+                                         'cards': ['monopoly']}
+        assert {'type': 'build_road'} in [{'type': action['type']}
+                                          for action in
+                                          response.data['actions']]
+
+    def test_state_of_load(self):
+        Card.objects.create(owner=self.player2, game=self.game,
+                            name='knight')
+        # The state made from the loaded pieces is the state of the rules
+        state = GameLoad(Game.objects.get(id=self.game.id)).get_state()
+        assert dump_state(state) == dump_state(load_game(self.game.id))
+
+    def test_not_in_turn(self):
+        response = self.get(GameSnapshot, 'GameSnapshot', self.user2)
+        assert response.status_code == 200
+        assert response.data['actions'] == []
+        assert response.data['hand'] == {'resources': ['ore', 'ore', 'ore'],
+                                         'cards': []}
+
+    def test_without_board(self):
+        path = reverse('GameSnapshot', kwargs={'pk': self.game.id})
+        request = RequestFactory().get(path, {'board': 'false'})
+        force_authenticate(request, user=self.user1, token=self.token)
+        response = GameSnapshot.as_view()(request, pk=self.game.id)
+        assert response.status_code == 200
+        assert 'board' not in response.data
+        assert response.data['version'] == self.game.version
+
+    def test_not_player(self):
+        response = self.get(GameSnapshot, 'GameSnapshot', self.user3)
+        assert response.status_code == 404
+
+    def test_game_not_exists(self):
+        path = reverse('GameSnapshot', kwargs={'pk': 100})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=self.user1, token=self.token)
+        response = GameSnapshot.as_view()(request, pk=100)
+        assert response.status_code == 404
+
+    def test_less_queries_than_views(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get(GameSnapshot, 'GameSnapshot', self.user1)
+        snapshot = len(context.captured_queries)
+        # Compare without the actions cached by the snapshot
+        LEGAL_ACTIONS.clear()
+        views = [(PlayerActions, 'PlayerActions'), (BoardInfo, 'BoardInfo'),
+                 (PlayerInfo, 'PlayerInfo'), (GameInfo, 'GameInfo')]
+        with CaptureQueriesContext(connection) as context:
+            for view, name in views:
+                self.get(view, name, self.user1)
+        assert snapshot < len(context.captured_queries)
@@ -0,0 +1,236 @@
+from django.test import TestCase, RequestFactory, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+from django.contrib.auth.models import User
+from catan.models import *
+from catan.views.players_views import PlayerActions, PlayerInfo
+from catan.views.game_views import GameInfo
+from catan.views.snapshot_views import GameSnapshot
+from catan.views.wait_views import get_game_version
+from catan.engine.log import dump_state
+from catan.engine.persistence import load_game
+from catan.engine.write_behind import (ACTIVE_GAMES, recover_game,
+                                       check_single_worker, FlushTimer)
+from django.core.exceptions import ImproperlyConfigured
+from aux.generateBoard import generateBoardTest
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+import os
+from unittest import mock
+import pytest
+
+
+TRADE = {'type': 'bank_trade', 'payload': {'give': 'ore', 'receive': 'brick'}}
+ROAD = {'type': 'build_road',
+        'payload': [{'level': 1, 'index': 1}, {'level': 1, 'index': 2}]}
+
+
+@pytest.mark.django_db
+@override_settings(WRITE_BEHIND=True, WRITE_BEHIND_FLUSH_ACTIONS=20,
+                   WRITE_BEHIND_FLUSH_SECONDS=60)
+class TestWriteBehind(TestCase):
+
+    def setUp(self):
+        self.token = AccessToken()
+        self.board = generateBoardTest()
+        self.robber = Hexe.objects.get(board=self.board, level=0, index=0)
+        self.game = Game.objects.create(name='Juego', board=self.board,
+                                        robber=self.robber)
+        self.users = []
+        self.players = []
+        for turn, name in enumerate(['Nico', 'Pablo', 'Carlos', 'Ana']):
+            user = mixer.blend(User, username=name)
+            self.users.append(user)
+            self.players.append(Player.objects.create(
+                username=user, game=self.game, turn=turn + 1,
+                colour=Player.COLOUR[turn][0]))
+        Current_Turn.objects.create(game=self.game, user=self.users[0],
+                                    game_stage='FULL_PLAY',
+                                    dices1=3, dices2=2)
+        Building.objects.create(game=self.game, owner=self.players[0],
+                                name='settlement', level=1, index=0)
+        Road.objects.create(game=self.game, owner=self.players[0],
+                            level_1=1, index_1=0, level_2=1, index_2=1)
+        for name in ['brick', 'lumber', 'wool', 'grain', 'ore']:
+            self.players[0].gain_resources(name, 5)
+
+    def post(self, user, data):
+        path = reverse('PlayerActions', kwargs={'pk': self.game.id})
+        request = RequestFactory().post(path, data,
+                                        content_type='application/json')
+        force_authenticate(request, user=user, token=self.token)
+        return PlayerActions.as_view()(request, pk=self.game.id)
+
+    def get(self, view, name, user):
+        path = reverse(name, kwargs={'pk': self.game.id})
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=user, token=self.token)
+        return view.as_view()(request, pk=self.game.id)
+
+    def nico_hand(self):
+        return Player.objects.get(id=self.players[0].id).get_hand()
+
+    def test_flush_at_end_of_turn(self):
+        nico = self.users[0]
+        assert self.post(nico, TRADE).status_code == 200
+        assert self.post(nico, ROAD).status_code == 200
+        # Nothing is written during the turn
+        assert self.nico_hand()['ore'] == 5
+        assert Road.objects.filter(game=self.game).count() == 1
+        assert not GameAction.objects.filter(game=self.game).exists()
+        # But the player sees his actions
+        response = self.get(PlayerInfo, 'PlayerInfo', nico)
+        assert response.data['resources'].count('ore') == 1
+        assert response.data['resources'].count('brick') == 5
+        response = self.get(PlayerActions, 'PlayerActions', nico)
+        assert response['ETag'] == '"%s-2-%s"' % (self.game.id, nico.id)
+        assert self.post(nico, {'type': 'end_turn'}).status_code == 204
+        assert Road.objects.filter(game=self.game).count() == 2
+        assert [action.action for action in
+                GameAction.objects.filter(game=self.game)] == \
+            ['bank_trade', 'build_road', 'end_turn']
+        game = Game.objects.get(id=self.game.id)
+        assert game.version == 3
+        assert game.current_turn.user == self.users[1]
+        assert dump_state(load_game(self.game.id)) == \
+            dump_state(ACTIVE_GAMES.peek(self.game.id).state)
+
+    def test_snapshot_sees_actions(self):
+        nico = self.users[0]
+        assert self.post(nico, TRADE).status_code == 200
+        assert self.post(nico, ROAD).status_code == 200
+        # The rows are not written, but the snapshot has the actions
+        response = self.get(GameSnapshot, 'GameSnapshot', nico)
+        assert response.status_code == 200
+        assert response['ETag'] == '"%s-2-%s"' % (self.game.id, nico.id)
+        assert response.data['version'] == 2
+        assert response.data['hand']['resources'].count('ore') == 1
+        roads = response.data['game']['players'][0]['roads']
+        assert [{'level': 1, 'index': 1}, {'level': 1, 'index': 2}] in roads
+        game = self.get(GameInfo, 'GameInfo', nico)
+        assert game['ETag'] == '"%s-2-%s"' % (self.game.id, nico.id)
+        assert game.data == response.data['game']
+        assert response.data['board']['hexes']
+        assert get_game_version(self.game.id) == 2
+        # The same information is written at the end of the turn
+        ACTIVE_GAMES.flush_all()
+        with override_settings(WRITE_BEHIND=False):
+            assert get_game_version(self.game.id) == 2
+            written = self.get(GameSnapshot, 'GameSnapshot', nico)
+        assert written.data == response.data
+
+    def test_single_worker(self):
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '2'}):
+            with pytest.raises(ImproperlyConfigured):
+                check_single_worker()
+            with override_settings(WRITE_BEHIND=False):
+                check_single_worker()
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '1'}):
+            check_single_worker()
+
+    def test_rejected_action(self):
+        data = {'type': 'upgrade_city', 'payload': {'level': 1, 'index': 3}}
+        response = self.post(self.users[0], data)
+        assert response.status_code == 403
+        assert response.data == {'detail': 'Must upgrade an existent '
+                                           'settlement'}
+        response = self.post(self.users[1], TRADE)
+        assert response.data == {'detail': 'Not in turn'}
+        assert ACTIVE_GAMES.peek(self.game.id).state.version == 0
+
+    @override_settings(WRITE_BEHIND_FLUSH_ACTIONS=2)
+    def test_flush_by_actions(self):
+        nico = self.users[0]
+        self.post(nico, TRADE)
+        assert self.nico_hand()['ore'] == 5
+        self.post(nico, ROAD)
+        assert self.nico_hand()['ore'] == 1
+        assert GameAction.objects.filter(game=self.game).count() == 2
+
+    def test_flush_by_time(self):
+        self.post(self.users[0], TRADE)
+        with override_settings(WRITE_BEHIND_FLUSH_SECONDS=0):
+            ACTIVE_GAMES.flush_expired()
+        assert self.nico_hand()['ore'] == 1
+
+    def test_flush_timer(self):
+        self.post(self.users[0], TRADE)
+        with override_settings(WRITE_BEHIND_FLUSH_SECONDS=0):
+            FlushTimer(ACTIVE_GAMES).tick()
+        assert self.nico_hand()['ore'] == 1
+        assert ACTIVE_GAMES.peek(self.game.id) is not None
+
+    def test_evict_idle(self):
+        nico = self.users[0]
+        self.post(nico, TRADE)
+        active = ACTIVE_GAMES.peek(self.game.id)
+        ACTIVE_GAMES.evict_idle()
+        assert ACTIVE_GAMES.peek(self.game.id) is active
+        with override_settings(WRITE_BEHIND_IDLE_SECONDS=0):
+            ACTIVE_GAMES.evict_idle()
+        # It's flushed before it's removed
+        assert active.evicted
+        assert ACTIVE_GAMES.peek(self.game.id) is None
+        assert self.nico_hand()['ore'] == 1
+        assert self.post(nico, ROAD).status_code == 200
+        assert ACTIVE_GAMES.peek(self.game.id).state.version == 2
+
+    def test_events_not_held(self):
+        with mock.patch('catan.engine.write_behind.publish_event') as publish:
+            self.post(self.users[0], ROAD)
+        # The action is not written, but its event is published
+        assert not GameAction.objects.filter(game=self.game).exists()
+        publish.assert_called_once()
+        assert publish.call_args[0][:2] == (self.game.id, 'build')
+
+    def test_crash(self):
+        nico = self.users[0]
+        saved = dump_state(load_game(self.game.id))
+        self.post(nico, TRADE)
+        # The worker dies: the actions that were not flushed are lost
+        ACTIVE_GAMES.clear()
+        assert dump_state(ACTIVE_GAMES.get(self.game.id).state) == saved
+        self.post(nico, TRADE)
+        self.post(nico, {'type': 'end_turn'})
+        assert GameAction.objects.filter(game=self.game).count() == 2
+        ACTIVE_GAMES.clear()
+        state = ACTIVE_GAMES.get(self.game.id).state
+        assert state.player_in_turn().username == 'Pablo'
+        assert dump_state(state) == dump_state(load_game(self.game.id))
+
+    def test_recover_from_log(self):
+        nico = self.users[0]
+        self.post(nico, TRADE)
+        self.post(nico, {'type': 'end_turn'})
+        logged = dump_state(load_game(self.game.id))
+        # The rows are changed but not the log
+        Hand.objects.filter(owner=self.players[0]).update(amount=9)
+        Road.objects.filter(game=self.game).delete()
+        state = recover_game(self.game.id)
+        assert dump_state(state) == logged
+        assert dump_state(load_game(self.game.id)) == logged
+
+    def play_turn(self):
+        nico = self.users[0]
+        lumber = {'type': 'bank_trade',
+                  'payload': {'give': 'lumber', 'receive': 'brick'}}
+        for data in [TRADE, lumber, ROAD, {'type': 'buy_card'},
+                     {'type': 'end_turn'}]:
+            assert self.post(nico, data).status_code in (200, 204)
+
+    def test_fewer_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.play_turn()
+        write_behind = len(queries)
+        # The same turn without write-behind
+        Current_Turn.objects.filter(game=self.game).update(
+            user=self.users[0], dices1=3, dices2=2)
+        Road.objects.filter(game=self.game, index_2=2).delete()
+        for name in ['brick', 'lumber', 'wool', 'grain', 'ore']:
+            self.players[0].gain_resources(name, 5)
+        with override_settings(WRITE_BEHIND=False):
+            with CaptureQueriesContext(connection) as queries:
+                self.play_turn()
+        assert write_behind < len(queries)
@@ -50,18 +50,16 @@ class TestViews(TestCase):
         self.current_turn = mixer.blend(
             Current_Turn, user=self.user1, game=self.game,
             dices1=4, dices2=1)
-        Resource.objects.create(
-            owner=self.player3, game=self.game, name='ore')
-        Resource.objects.create(
-            owner=self.player3, game=self.game, name='brick')
-        Resource.objects.create(
-            owner=self.player3, game=self.game, name='brick')
-        Resource.objects.create(
-            owner=self.player2, game=self.game, name='brick')
-        Resource.objects.create(
-            owner=self.player4, game=self.game, name='lumber')
-        Resource.objects.create(
-            owner=self.player4, game=self.game, name='wool')
+        Hand.objects.create(
+            owner=self.player3, game=self.game, name='ore', amount=1)
+        Hand.objects.create(
+            owner=self.player3, game=self.game, name='brick', amount=2)
+        Hand.objects.create(
+            owner=self.player2, game=self.game, name='brick', amount=1)
+        Hand.objects.create(
+            owner=self.player4, game=self.game, name='lumber', amount=1)
+        Hand.objects.create(
+            owner=self.player4, game=self.game, name='wool', amount=1)
         card = Card.objects.create(owner=self.player1,
                                    game=self.game,
                                    name='monopoly')
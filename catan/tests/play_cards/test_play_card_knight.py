@@ -203,8 +203,8 @@ class TestViews(TestCase):
         assert response_player.data['cards'] == ['knight']
         assert response_game.data['players'][0]['development_cards'] == 1
         assert response_game.data['robber'] == {'level': 2, 'index': 10}
-        resources = Resource.objects.create(
-            owner=self.player2, game=self.game, name='ore')
+        resources = Hand.objects.create(
+            owner=self.player2, game=self.game, name='ore', amount=1)
         request = RequestFactory().post(path, data,
                                         content_type='application/json')
         force_authenticate(request, user=self.user1, token=self.token)
@@ -256,12 +256,12 @@ class TestViews(TestCase):
                             name='knight')
         mixer.blend('catan.Hexe', terrain='ore', token=2,
                     board=self.board, level=2, index=10)
-        resources = Resource.objects.create(
-            owner=self.player2, game=self.game, name='ore')
-        resources = Resource.objects.create(
-            owner=self.player3, game=self.game, name='lumber')
-        resources = Resource.objects.create(
-            owner=self.player2, game=self.game, name='brick')
+        resources = Hand.objects.create(
+            owner=self.player2, game=self.game, name='ore', amount=1)
+        resources = Hand.objects.create(
+            owner=self.player3, game=self.game, name='lumber', amount=1)
+        resources = Hand.objects.create(
+            owner=self.player2, game=self.game, name='brick', amount=1)
         path = reverse('PlayerActions', kwargs={'pk': 1})
         data = {'type': 'play_knight_card',
                 'payload': {
@@ -303,12 +303,12 @@ class TestViews(TestCase):
                             name='knight')
         mixer.blend('catan.Hexe', terrain='ore', token=2,
                     board=self.board, level=2, index=10)
-        resources = Resource.objects.create(
-            owner=self.player2, game=self.game, name='ore')
-        resources = Resource.objects.create(
-            owner=self.player3, game=self.game, name='lumber')
-        resources = Resource.objects.create(
-            owner=self.player2, game=self.game, name='brick')
+        resources = Hand.objects.create(
+            owner=self.player2, game=self.game, name='ore', amount=1)
+        resources = Hand.objects.create(
+            owner=self.player3, game=self.game, name='lumber', amount=1)
+        resources = Hand.objects.create(
+            owner=self.player2, game=self.game, name='brick', amount=1)
         path = reverse('PlayerActions', kwargs={'pk': 1})
         data = {'type': 'play_knight_card',
                 'payload': {
@@ -350,12 +350,12 @@ class TestViews(TestCase):
                             name='knight')
         mixer.blend('catan.Hexe', terrain='ore', token=2,
                     board=self.board, level=2, index=10)
-        resources = Resource.objects.create(
-            owner=self.player2, game=self.game, name='ore')
-        resources = Resource.objects.create(
-            owner=self.player3, game=self.game, name='lumber')
-        resources = Resource.objects.create(
-            owner=self.player2, game=self.game, name='brick')
+        resources = Hand.objects.create(
+            owner=self.player2, game=self.game, name='ore', amount=1)
+        resources = Hand.objects.create(
+            owner=self.player3, game=self.game, name='lumber', amount=1)
+        resources = Hand.objects.create(
+            owner=self.player2, game=self.game, name='brick', amount=1)
         path = reverse('PlayerActions', kwargs={'pk': 1})
         data = {'type': 'play_knight_card',
                 'payload': {
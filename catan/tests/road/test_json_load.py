@@ -4,7 +4,8 @@ from mixer.backend.django import mixer
 from rest_framework import status
 from rest_framework.test import force_authenticate
 from rest_framework_simplejwt.tokens import AccessToken
-from catan.views.actions.road import *
+from aux.json_load import *
+from aux.topology import is_edge
 from django.test import TestCase
 from catan.models import *
 from django.contrib.auth.models import User
@@ -32,9 +33,9 @@ class TestView(TestCase):
         self.turn = mixer.blend('catan.Current_Turn', game=self.game,
                                 user=self.user, dices1=3, dices2=3,
                                 game_stage='FULL_PLAY')
-        self.brick = mixer.blend('catan.Resource', owner=self.player,
+        self.brick = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                  game=self.game, name="brick")
-        self.lumber = mixer.blend('catan.Resource', owner=self.player,
+        self.lumber = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                   game=self.game, name="lumber")
         self.road = mixer.blend('catan.Road', owner=self.player,
                                 level_1=2, index_1=0,
@@ -48,8 +49,8 @@ class TestView(TestCase):
                                       index=2,  level=1)
 
     def test_is_neighbor(self):
-        self.assertEqual(are_neighbors(2, 18, 2, 20), False)
-        self.assertEqual(are_neighbors(2, 0, 2, 1), True)
+        self.assertEqual(is_edge((2, 18), (2, 20)), False)
+        self.assertEqual(is_edge((2, 0), (2, 1)), True)
 
     def test_vertex_info(self):
         aux_vec = [[2, 26], [1, 17], [1, 15]]
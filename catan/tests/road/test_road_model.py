@@ -1,4 +1,7 @@
 import pytest
+from django.db import IntegrityError, transaction, connection
+from django.db.migrations.executor import MigrationExecutor
+from aux.bitboard import edge_id
 from catan.models import *
 from mixer.backend.django import mixer
 from django.contrib.auth.models import User
@@ -33,28 +36,25 @@ class TestModels:
                            robber=hexe_pos)
         player = mixer.blend('catan.Player', turn=1, username=user,
                              game=game, colour="red")
-        road = mixer.blend('catan.Road', owner=player,
-                           level_1=0, index_1=16,
-                           level_2=2, index_2=26,
-                           game=game)
+        road = Road(owner=player, game=game,
+                    level_1=0, index_1=16,
+                    level_2=2, index_2=26)
         try:
             road.full_clean()
         except ValidationError as e:
             error = 'The index with level 0 must be between 0 and 5.'
             assert error in e.message_dict['__all__']
-        road = mixer.blend('catan.Road', owner=player,
-                           level_1=1, index_1=18,
-                           level_2=2, index_2=26,
-                           game=game)
+        road = Road(owner=player, game=game,
+                    level_1=1, index_1=18,
+                    level_2=2, index_2=26)
         try:
             road.full_clean()
         except ValidationError as e:
             error = 'The index with level 1 must be between 0 and 17.'
             assert error in e.message_dict['__all__']
-        road = mixer.blend('catan.Road', owner=player,
-                           level_1=1, index_1=16,
-                           level_2=2, index_2=30,
-                           game=game)
+        road = Road(owner=player, game=game,
+                    level_1=1, index_1=16,
+                    level_2=2, index_2=30)
         try:
             road.full_clean()
         except ValidationError as e:
@@ -80,3 +80,80 @@ class TestModels:
         except ValidationError as e:
             error = 'Cannot be player of other game'
             assert error in e.message_dict['__all__']
+
+    def test_road_edge(self):
+        user = mixer.blend(User, username='nvero', password='barco12')
+        board = mixer.blend('catan.Board', name="Colonos")
+        hexe = mixer.blend('catan.Hexe', terrain='desert', token=2,
+                           board=board)
+        game = mixer.blend('catan.Game', name="Game1", board=board,
+                           robber=hexe)
+        player = mixer.blend('catan.Player', turn=1, username=user,
+                             game=game, colour="red")
+        road = Road.objects.create(game=game, owner=player,
+                                   level_1=1, index_1=16,
+                                   level_2=2, index_2=26)
+        assert road.edge == edge_id((2, 26), (1, 16))
+        # The reverse road is the same edge
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Road.objects.create(game=game, owner=player,
+                                level_1=2, index_1=26,
+                                level_2=1, index_2=16)
+        assert Road.objects.filter(game=game).count() == 1
+
+    def test_road_not_neighbors(self):
+        user = mixer.blend(User, username='nvero', password='barco12')
+        board = mixer.blend('catan.Board', name="Colonos")
+        hexe = mixer.blend('catan.Hexe', terrain='desert', token=2,
+                           board=board)
+        game = mixer.blend('catan.Game', name="Game1", board=board,
+                           robber=hexe)
+        player = mixer.blend('catan.Player', turn=1, username=user,
+                             game=game, colour="red")
+        road = Road(game=game, owner=player,
+                    level_1=1, index_1=16,
+                    level_2=2, index_2=20)
+        error = 'The vertices of the road must be neighbors.'
+        with pytest.raises(ValidationError) as e:
+            road.full_clean()
+        assert error in e.value.message_dict['__all__']
+        with pytest.raises(ValidationError):
+            road.save()
+        assert not Road.objects.filter(game=game).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRoadEdgeMigration:
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def test_road_edges(self):
+        apps = self.migrate(('catan', '0008_hot_query_indexes'))
+        User = apps.get_model('auth', 'User')
+        Board = apps.get_model('catan', 'Board')
+        Hexe = apps.get_model('catan', 'Hexe')
+        Game = apps.get_model('catan', 'Game')
+        Player = apps.get_model('catan', 'Player')
+        Road = apps.get_model('catan', 'Road')
+        board = Board.objects.create(name='Colonos')
+        hexe = Hexe.objects.create(board=board, terrain='desert')
+        game = Game.objects.create(name='Juego', board=board, robber=hexe)
+        user = User.objects.create(username='Nico')
+        player = Player.objects.create(turn=1, username=user, game=game,
+                                       colour='Red')
+        for vertices in [(1, 16, 2, 26), (2, 26, 1, 16), (1, 16, 2, 20),
+                         (0, 0, 0, 1)]:
+            Road.objects.create(owner=player, game=game,
+                                level_1=vertices[0], index_1=vertices[1],
+                                level_2=vertices[2], index_2=vertices[3])
+        apps = self.migrate(('catan', '0011_road_edge_constraint'))
+        Road = apps.get_model('catan', 'Road')
+        roads = Road.objects.filter(game=game.id).order_by('id')
+        assert list(roads.values_list('level_1', 'index_1', 'edge')) == \
+            [(1, 16, edge_id((1, 16), (2, 26))),
+             (0, 0, edge_id((0, 0), (0, 1)))]
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes(
+            'catan')[0])
@@ -33,9 +33,9 @@ class TestViews(TestCase):
         self.turn = mixer.blend('catan.Current_Turn', game=self.game,
                                 user=self.user, dices1=3, dices2=3,
                                 game_stage='FULL_PLAY')
-        self.brick = mixer.blend('catan.Resource', owner=self.player,
+        self.brick = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                  game=self.game, name="brick")
-        self.lumber = mixer.blend('catan.Resource', owner=self.player,
+        self.lumber = mixer.blend('catan.Hand', amount=1, owner=self.player,
                                   game=self.game, name="lumber")
         self.road = mixer.blend('catan.Road', owner=self.player,
                                 level_1=2, index_1=0,
@@ -1,4 +1,4 @@
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
 from django.urls import reverse
 from mixer.backend.django import mixer
 from django.contrib.auth.models import User
@@ -259,3 +259,85 @@ class TestViewRoom(TestCase):
         assert response.data == {
             "detail": "Can't delete the room"}
         assert Room.objects.filter(id=1).exists() is True
+
+    def list_rooms(self, query='', user=None):
+        path = reverse('list_rooms') + query
+        request = RequestFactory().get(path)
+        force_authenticate(request, user=user or self.user, token=self.token)
+        return RoomList.as_view()(request)
+
+    def test_list_rooms_pages(self):
+        for i in range(3):
+            mixer.blend('catan.Room', owner=self.owner, name='room',
+                        board_id=self.board.id)
+        response = self.list_rooms('?limit=2')
+        assert [room['id'] for room in response.data] == [1, 2]
+        assert response['Link'] == \
+            '<http://testserver/rooms/?limit=2&after=2>; rel="next"'
+        response = self.list_rooms('?limit=2&after=2')
+        assert [room['id'] for room in response.data] == [3, 4]
+        response = self.list_rooms('?limit=2&after=4')
+        assert [room['id'] for room in response.data] == [5]
+        assert not response.has_header('Link')
+
+    def test_list_rooms_filters(self):
+        self.room_1.players.add(self.player_3)
+        started = mixer.blend('catan.Room', owner=self.owner,
+                              board_id=self.board.id, name='started',
+                              game_has_started=True)
+        started.players.add(self.player_1)
+        response = self.list_rooms('?open=true')
+        assert [room['id'] for room in response.data] == [2]
+        response = self.list_rooms('?mine=true', user=self.player_1)
+        assert [room['id'] for room in response.data] == [1, started.id]
+        response = self.list_rooms('?open=1&mine=1', user=self.player_2)
+        assert [room['id'] for room in response.data] == [2]
+        assert response.data[0]['players'] == ['owner_test', 'player_test2']
+
+    def list_all_rooms(self, query, user=None):
+        """
+        Get all the pages of a list of rooms, as the lobby does: the url
+        of the next page is in the Link header.
+        """
+        rooms = []
+        while query is not None:
+            response = self.list_rooms(query, user=user)
+            assert response.status_code == 200
+            rooms += [room['id'] for room in response.data]
+            link = response.get('Link')
+            query = None
+            if link is not None:
+                url = link[1:link.index('>')]
+                query = url[url.index('?'):]
+        return rooms
+
+    @override_settings(LIST_PAGE_SIZE=2)
+    def test_list_open_rooms_pages(self):
+        self.room_1.players.add(self.player_3)
+        rooms = [mixer.blend('catan.Room', owner=self.owner, name='room',
+                             board_id=self.board.id) for i in range(4)]
+        started = mixer.blend('catan.Room', owner=self.owner, name='started',
+                              board_id=self.board.id, game_has_started=True)
+        started.players.add(self.player_1)
+        # The full room 1 and the started room aren't in the pages
+        assert self.list_all_rooms('?open=true') == \
+            [self.room_2.id] + [room.id for room in rooms]
+        assert self.list_all_rooms('?mine=true', user=self.player_1) == \
+            [self.room_1.id, started.id]
+
+    def test_list_rooms_invalid_page(self):
+        assert self.list_rooms('?limit=0').status_code == 400
+        assert self.list_rooms('?after=first').status_code == 400
+        assert self.list_rooms('?limit=100000').status_code == 400
+
+    def test_list_rooms_queries(self):
+        for i in range(10):
+            room = mixer.blend('catan.Room', owner=self.owner,
+                               board_id=self.board.id, name='room')
+            room.players.add(self.player_1, self.player_2)
+        # The rooms and all their players
+        with self.assertNumQueries(2):
+            response = self.list_rooms('?open=true&mine=true',
+                                       user=self.player_1)
+            response.render()
+        assert len(response.data) == 11
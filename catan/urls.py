@@ -3,7 +3,7 @@ from rest_framework.urlpatterns import format_suffix_patterns
 from rest_framework_simplejwt.views import TokenRefreshView
 from catan.views import (room_views, login_views,
                          players_views, game_views,
-                         board_views)
+                         board_views, snapshot_views, events_views)
 
 urlpatterns = [
     # Rooms views
@@ -22,6 +22,10 @@ urlpatterns = [
          name='PlayerActions'),
     path('games/<int:pk>/player/', players_views.PlayerInfo.as_view(),
          name='PlayerInfo'),
+    path('games/<int:pk>/snapshot/', snapshot_views.GameSnapshot.as_view(),
+         name='GameSnapshot'),
+    path('games/<int:pk>/events/token/', events_views.EventsToken.as_view(),
+         name='EventsToken'),
     path('games/<int:pk>/', game_views.GameInfo.as_view(),
          name='GameInfo'),
     path('games/', game_views.GameList.as_view(), name='Games'),
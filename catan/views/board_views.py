@@ -1,26 +1,153 @@
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework.views import APIView
 from catan.serializers import BoardSerializer, HexeSerializer
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from catan.models import Board, Hexe, Game
 
 
+# The boards never change after they are created, so a client can keep
+# them for a year without asking again
+BOARD_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class BoardCache(object):
+    """
+    The serialized boards, by board id, with the strong ETag of their
+    content. The list of boards isn't cached: the boards can be created
+    by other processes (see aux/generateBoard.py), that this one doesn't
+    hear about.
+    The boards aren't changed by the games, so an entry is only removed
+    when its board or its hexes are saved or deleted (see the receivers
+    below), or when there are too many boards and it's the least
+    recently used one.
+    """
+    def __init__(self, max_boards=100):
+        self.max_boards = max_boards
+        self.lock = Lock()
+        self.boards = OrderedDict()
+
+    def get(self, board_id):
+        """
+        A method to get the ETag and the data of a board, serializing it
+        if it's not cached.
+        """
+        with self.lock:
+            entry = self.boards.get(board_id)
+            if entry is not None:
+                self.boards.move_to_end(board_id)
+                return entry
+        entry = make_entry({'hexes': get_hexes(board_id)})
+        with self.lock:
+            self.boards[board_id] = entry
+            while len(self.boards) > self.max_boards:
+                self.boards.popitem(last=False)
+        return entry
+
+    def discard(self, board_id):
+        with self.lock:
+            self.boards.pop(board_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.boards.clear()
+
+
+BOARD_CACHE = BoardCache(settings.BOARD_CACHE_SIZE)
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_delete, sender=Board)
+def clear_cached_board(sender, instance, **kwargs):
+    BOARD_CACHE.discard(instance.id)
+
+
+@receiver(post_save, sender=Hexe)
+@receiver(post_delete, sender=Hexe)
+def clear_cached_hexes(sender, instance, **kwargs):
+    BOARD_CACHE.discard(instance.board_id)
+
+
+def make_entry(data):
+    """
+    A method to get the strong ETag of some data, with the data.
+    """
+    content = json.dumps(data, sort_keys=True).encode()
+    return ('"%s"' % hashlib.sha1(content).hexdigest(), data)
+
+
+def get_board_list():
+    """
+    A method to get the id and the name of all the boards.
+    """
+    boards_serializers = BoardSerializer(Board.objects.all(), many=True)
+    return [dict(board) for board in boards_serializers.data]
+
+
+def get_hexes(board_id):
+    """
+    A method to get the hexes of a board with their positions
+    Args:
+    board_id: the id of a board.
+    """
+    board_hexes = Hexe.objects.filter(board=board_id)
+    hexes_serializer = HexeSerializer(board_hexes, many=True)
+    hexes = []
+    for hexe in hexes_serializer.data:
+        hexe = dict(hexe)
+        hexe['position'] = {'level': hexe.pop('level'),
+                            'index': hexe.pop('index')}
+        hexes.append(hexe)
+    return hexes
+
+
+def cached_response(request, entry, **cache_control):
+    """
+    A method to answer with a board or the list of boards, or with
+    304 Not Modified if the client has the same ETag.
+    Args:
+    entry: the ETag and the data of the board.
+    cache_control: the directives of the Cache-Control header.
+    """
+    etag, data = entry
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(data)
+    response['ETag'] = etag
+    patch_cache_control(response, **cache_control)
+    return response
+
+
 class BoardList(APIView):
     def get(self, request, format=None):
-        boards = Board.objects.all()
-        boards_serializers = BoardSerializer(boards, many=True)
-        return Response(boards_serializers.data)
+        # A new board changes the list, so the client must revalidate it
+        return cached_response(request, make_entry(get_board_list()),
+                               private=True, no_cache=True)
 
 
 class BoardInfo(APIView):
+    def get_hexes(self, board_id):
+        """
+        A method to get the (cached) hexes of a board with their
+        positions
+        Args:
+        board_id: the id of a board.
+        """
+        return BOARD_CACHE.get(board_id)[1]['hexes']
+
     def get(self, request, pk):
-        game = get_object_or_404(Game, pk=pk)
-        board_hexes = Hexe.objects.filter(board=game.board.id)
-        hexes_serializer = HexeSerializer(board_hexes, many=True)
-        hexes = hexes_serializer.data
-        for hexe in hexes:
-            hexe['position'] = {'level': hexe['level'],
-                                'index': hexe['index']}
-            hexe.pop('level')
-            hexe.pop('index')
-        return Response({"hexes": hexes})
+        board_id = Game.objects.filter(pk=pk).values_list(
+            'board', flat=True).first()
+        if board_id is None:
+            raise Http404
+        # The board of a game is always the same
+        return cached_response(request, BOARD_CACHE.get(board_id),
+                               private=True, max_age=BOARD_MAX_AGE,
+                               immutable=True)
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.http import Http404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from catan.models import Game
+from catan.events import HUB
+from catan.views.wait_views import (get_game_version, is_authenticated,
+                                    read_body)
+
+
+EVENTS_PATH = re.compile(r'^/games/(?P<pk>\d+)/events/$')
+STREAM_TOKEN_SALT = 'catan.events.stream'
+
+
+def format_event(event):
+    """
+    A method to get an event in the format of Server-Sent Events.
+    Args:
+    event: a dict with the id, the type and the data of the event.
+    """
+    return ('id: %s\nevent: %s\ndata: %s\n\n' % (
+        event['id'], event['type'], json.dumps(event['data']))).encode()
+
+
+def get_cors_headers(scope):
+    """
+    A method to get the CORS headers of the answer (the same ones of
+    the Django application) for the origin of the request.
+    Args:
+    scope: the ASGI scope of the request.
+    """
+    origin = dict(scope['headers']).get(b'origin')
+    if origin is None:
+        return []
+    allow_all = getattr(settings, 'CORS_ORIGIN_ALLOW_ALL', False)
+    whitelist = getattr(settings, 'CORS_ORIGIN_WHITELIST', ())
+    if not allow_all and origin.decode('latin-1') not in whitelist:
+        return []
+    headers = [(b'access-control-allow-origin', origin)]
+    if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+def make_stream_token(pk, user_id):
+    """
+    A method to get a token to open the events stream of a game, valid
+    for EVENTS_TOKEN_MAX_AGE seconds (see EventsToken).
+    Args:
+    pk: the id of the game.
+    user_id: the id of the user that opens the stream.
+    """
+    signer = signing.TimestampSigner(salt=STREAM_TOKEN_SALT)
+    return signer.sign('%s:%s' % (pk, user_id))
+
+
+def is_valid_stream_token(token, pk):
+    """
+    A method to check (without queries) if a token of make_stream_token
+    is valid for the stream of a game.
+    Args:
+    token: the token (str).
+    pk: the id of the game.
+    """
+    signer = signing.TimestampSigner(salt=STREAM_TOKEN_SALT)
+    try:
+        value = signer.unsign(token, max_age=settings.EVENTS_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value.split(':')[0] == str(pk)
+
+
+def has_valid_token(scope, pk):
+    """
+    A method to check the token of the request. The EventSource of the
+    browsers can't send headers, so a stream token of the game (see
+    EventsToken) can be in the query string (?token=<stream token>); the
+    access tokens are only accepted in the Authorization header, so they
+    are never written in the logs of the urls.
+    Args:
+    scope: the ASGI scope of the request.
+    pk: the id of the game.
+    """
+    params = parse_qs(scope['query_string'].decode('latin-1'))
+    if 'token' in params:
+        return is_valid_stream_token(params['token'][0], pk)
+    return is_authenticated(scope)
+
+
+class EventsToken(APIView):
+    """
+    The stream token of a game (see make_stream_token), for the clients
+    that can't send the access token in a header.
+    """
+    def get(self, request, pk):
+        if not Game.objects.filter(pk=pk).exists():
+            raise Http404
+        return Response({'token': make_stream_token(pk, request.user.id)},
+                        status=status.HTTP_200_OK)
+
+
+class GameEventStream(object):
+    """
+    An ASGI middleware for the stream of the events of the games.
+    GET /games/<id>/events/?token=<stream token> answers with a
+    Server-Sent Events stream of the events of the game (see :module
+    `catan.events`), for the players and the spectators of the game.
+    A comment is sent every
+    EVENTS_KEEPALIVE seconds to keep the connection open.
+    The other requests go to the Django application.
+    """
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = None
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = EVENTS_PATH.match(scope['path'])
+        if match is None:
+            return await self.application(scope, receive, send)
+        pk = int(match.group('pk'))
+        if await read_body(receive) is None:
+            # The client is gone
+            return
+        cors_headers = get_cors_headers(scope)
+        if not has_valid_token(scope, pk):
+            detail = 'Authentication credentials were not provided.'
+            return await self.send_error(send, 401, detail, cors_headers)
+        version = await sync_to_async(get_game_version,
+                                      thread_sensitive=False)(pk)
+        if version is None:
+            return await self.send_error(send, 404, 'Not found.',
+                                         cors_headers)
+        await self.stream(pk, receive, send, cors_headers)
+
+    async def send_error(self, send, status, detail, cors_headers):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')] +
+                    cors_headers})
+        await send({'type': 'http.response.body',
+                    'body': json.dumps({'detail': detail}).encode()})
+
+    async def stream(self, pk, receive, send, cors_headers):
+        """
+        A method to send the events of a game until the client is gone.
+        If the client is too slow to read the events, the stream is
+        closed with a 'resync' event, so it must reconnect and reload
+        the game.
+        """
+        subscriber = HUB.subscribe(pk)
+        disconnect = asyncio.ensure_future(receive())
+        try:
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'content-type', b'text/event-stream'),
+                                    (b'cache-control', b'no-cache'),
+                                    (b'x-accel-buffering', b'no')] +
+                        cors_headers})
+            await send({'type': 'http.response.body',
+                        'body': b': connected\n\n', 'more_body': True})
+            while True:
+                event = asyncio.ensure_future(subscriber.get())
+                done, pending = await asyncio.wait(
+                    [event, disconnect],
+                    timeout=settings.EVENTS_KEEPALIVE,
+                    return_when=asyncio.FIRST_COMPLETED)
+                if disconnect in done:
+                    event.cancel()
+                    return
+                if event not in done:
+                    event.cancel()
+                    message = b': keepalive\n\n'
+                else:
+                    message = format_event(event.result())
+                if subscriber.lagging:
+                    message = format_event({'id': '', 'type': 'resync',
+                                            'data': {}})
+                    await send({'type': 'http.response.body',
+                                'body': message})
+                    return
+                await send({'type': 'http.response.body', 'body': message,
+                            'more_body': True})
+        finally:
+            disconnect.cancel()
+            HUB.unsubscribe(subscriber)
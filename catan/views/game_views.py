@@ -14,162 +14,288 @@ from random import random
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from catan.models import *
 from rest_framework.permissions import AllowAny
 from random import shuffle
-from django.db.models import Q
+from catan.views.pagination import get_page, get_flag, page_response
+from django.conf import settings
+from catan.engine.state import PlayerState
+from catan.engine.persistence import load_hexes, make_state, rebuild_state
+from catan.engine.write_behind import ACTIVE_GAMES
+from aux.bitboard import vertex_id, vertex_position, edge_positions, iter_bits
 
 
-class GameInfo(APIView):
-    def get_list_without_keys(self, serialized_list, key):
-        """
-        A method to quit the keys of the serialized objects
-        Args:
-        serialized_list: serialized list of objects.
-        key: a key to obtain the elements.
-        """
-        data = []
-        for serialized_data in serialized_list.data:
-            data.append(serialized_data[key])
-        return data
+def game_etag(request, pk):
+    """
+    A method to get the ETag of the state of a game seen by the user
+    of the request. It only reads the version of the game, so the views
+    can answer 304 Not Modified without loading the game.
+    Args:
+    request: the request of the view.
+    pk: the id of the game.
+    """
+    version = Game.objects.filter(pk=pk).values_list('version',
+                                                     flat=True).first()
+    if version is None:
+        return None
+    return '%s-%s-%s' % (pk, version, request.user.id)
+
+
+def get_active_game(pk):
+    """
+    A method to get a game that is played in memory by this process,
+    or None if the games are not played with write-behind or it's not
+    loaded (see :mod: `catan.engine.write_behind`).
+    """
+    if not settings.WRITE_BEHIND:
+        return None
+    return ACTIVE_GAMES.peek(pk)
+
+
+def active_etag(request, pk):
+    """
+    A method to get the ETag of a game (see game_etag) with the version
+    of its state in memory, if it's played with write-behind, so the
+    player sees his actions before they are written.
+    """
+    active = get_active_game(pk)
+    if active is None:
+        return game_etag(request, pk)
+    return '%s-%s-%s' % (pk, active.state.version, request.user.id)
+
 
-    def get_list_serialized_objects(self, queryset, serializer, key):
+class GameLoad(object):
+    """
+    The players of a game with their pieces, hands and development
+    cards, loaded with one query per table and grouped by player id.
+    It's shared by the views that show the state of a game, and the
+    state of the game for the rules can be made from it (see get_state)
+    without reading the pieces again.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.players = list(Player.objects.filter(game=game).select_related(
+                                'username').order_by('id'))
+        self.settlements = {}
+        self.cities = {}
+        self.roads = {}
+        self.edges = {}
+        self.hands = {}
+        self.cards = {}
+        self.buildings = list(Building.objects.filter(
+                            owner__game=game).order_by('id').values_list(
+                            'owner', 'name', 'level', 'index'))
+        for owner, name, level, index in self.buildings:
+            if name == 'city':
+                owner_buildings = self.cities.setdefault(owner, [])
+            else:
+                owner_buildings = self.settlements.setdefault(owner, [])
+            owner_buildings.append({'level': level, 'index': index})
+        roads = Road.objects.filter(owner__game=game).order_by(
+                    'id').values_list('owner', 'level_1', 'index_1',
+                                      'level_2', 'index_2', 'edge')
+        for owner, level_1, index_1, level_2, index_2, edge in roads:
+            self.roads.setdefault(owner, []).append(
+                [{'level': level_1, 'index': index_1},
+                 {'level': level_2, 'index': index_2}])
+            self.edges[owner] = self.edges.get(owner, 0) | 1 << edge
+        hands = Hand.objects.filter(owner__game=game).values_list(
+                    'owner', 'name', 'amount', 'last_gained')
+        for owner, name, amount, last_gained in hands:
+            self.hands.setdefault(owner, []).append(
+                (name, amount, last_gained))
+        cards = Card.objects.filter(owner__game=game).order_by(
+                    'id').values_list('owner', 'name')
+        for owner, name in cards:
+            self.cards.setdefault(owner, []).append(name)
+
+    def get_player(self, user):
         """
-        A method to get serialized objects without keys from a queryset
+        A method to get the player of a user in the game, or None
+        if the user doesn't play in the game.
         Args:
-        queryset: a queryset of certain objects.
-        key: a key to obtain elements.
+        user: an User object.
         """
-        data = []
-        serialized_objects = serializer(queryset, many=True)
-        final_data = self.get_list_without_keys(serialized_objects, key)
-        return final_data
+        for player in self.players:
+            if player.username_id == user.id:
+                player.game = self.game
+                return player
+        return None
 
-    def get_roads(self, player):
+    def get_state(self):
         """
-        A method to obtain a list of roads of a player
-        Args:
-        player: A player object.
-        """
-        roads = []
-        player_roads = Road.objects.filter(owner=player)
-        serialized_roads = RoadSerializer(player_roads, many=True)
-        for serialized_road in serialized_roads.data:
-            new_road = []
-            vertex_1 = {'level': serialized_road['level_1'],
-                        'index': serialized_road['index_1']}
-            vertex_2 = {'level': serialized_road['level_2'],
-                        'index': serialized_road['index_2']}
-            new_road.append(vertex_1)
-            new_road.append(vertex_2)
-            roads.append(new_road)
-        return roads
-
-    def get_settlements(self, player):
-        """
-        A method to obtain a list of settlements of a player
-        Args:
-        player: A player object.
+        A method to get the GameState of the loaded game, with one more
+        query for the hexes of its board.
         """
-        settlements = Building.objects.filter(name="settlement", owner=player)
-        serializered = BuildingSerializer(settlements, many=True)
-        return serializered.data
+        players = {}
+        for player in self.players:
+            state = PlayerState(player.id, player.username_id,
+                                player.username.username, player.turn,
+                                player.colour, player.victory_points,
+                                player.knights)
+            state.roads = self.edges.get(player.id, 0)
+            for name, amount, last_gained in self.hands.get(player.id, []):
+                state.hand[name] = amount
+                state.last_gained[name] = last_gained
+            state.cards.extend(self.cards.get(player.id, []))
+            players[player.id] = state
+        for owner, name, level, index in self.buildings:
+            players[owner].add_building(vertex_id(level, index), name)
+        return make_state(self.game, load_hexes(self.game.board_id),
+                          players.values())
 
-    def get_cities(self, player):
+
+class GameInfo(APIView):
+    """
+    The state of a game seen by all the players. It's read with one
+    query for the game (with its robber, turn and winner) and one for
+    each table of GameLoad, and serialized to plain dicts. A game played
+    in memory (see get_active_game) is serialized from its state, so the
+    players see the actions that are not written yet, and an archived
+    game from the state rebuilt from its action log.
+    """
+    queryset = Game.objects.select_related('robber', 'winner',
+                                           'current_turn',
+                                           'current_turn__user')
+
+    def get_last_gained(self, hand):
         """
-        A method to obtain a list of cities of a player
+        A method to obtain a list of last_gained of a player
         Args:
-        player: A player object.
+        hand: a list of (name, amount, last_gained) of a player.
         """
-        cities = Building.objects.filter(name="city", owner=player)
-        serializered = BuildingSerializer(cities, many=True)
-        return serializered.data
+        last_gained = []
+        for name, amount, amount_gained in hand:
+            last_gained.extend([name] * amount_gained)
+        return last_gained
 
-    def get_last_gained(self, player):
+    def get_resource_card(self, hand):
         """
-        A method to obtain a list of last_gained of a player
+        A method to obtain the amount of resources of a player
         Args:
-        player: A player object.
+        hand: a list of (name, amount, last_gained) of a player.
         """
-        last_gained = self.get_list_serialized_objects(
-                            queryset=Resource.objects.filter(last_gained=True,
-                                                             owner=player.id),
-                            serializer=ResourceSerializer, key='name')
-        return last_gained
+        return sum(amount for name, amount, last_gained in hand)
 
-    def get_resource_card(self, player, game):
+    def get_players(self, load):
         """
+        A method to obtain the list of serialized players
+        Args:
+        load: a GameLoad of the game.
         """
-        resource_card = Resource.objects.filter(Q(owner=player) &
-                                                (Q(name='ore') |
-                                                 Q(name='brick') |
-                                                 Q(name='lumber') |
-                                                 Q(name='grain') |
-                                                 Q(name='wool'))).count()
-        return resource_card
+        serialized_players = []
+        for player in load.players:
+            data = {'username': player.username.username,
+                    'colour': player.colour,
+                    'victory_points': player.victory_points}
+            hand = load.hands.get(player.id, [])
+            data['resources_cards'] = self.get_resource_card(hand)
+            data['development_cards'] = len(load.cards.get(player.id, []))
+            data['roads'] = load.roads.get(player.id, [])
+            data['last_gained'] = self.get_last_gained(hand)
+            data['settlements'] = load.settlements.get(player.id, [])
+            data['cities'] = load.cities.get(player.id, [])
+            serialized_players.append(data)
+        return serialized_players
 
-    def get_development_card(self, player, game):
+    def get_game_data(self, game, load):
         """
+        A method to obtain the information of a game
+        Args:
+        game: a started game, with its robber, turn and winner loaded
+              (see queryset).
+        load: a GameLoad of the game.
         """
-        development_card = Card.objects.filter(Q(owner=player) &
-                                               (Q(name='knight') |
-                                                Q(name='monopoly') |
-                                                Q(name='year_of_plenty') |
-                                                Q(name='road_building') |
-                                                Q(name='victory_point'))
-                                               ).count()
-        return development_card
+        current_turn = game.current_turn
+        winner = game.winner
+        return {'robber': {'level': game.robber.level,
+                           'index': game.robber.index},
+                'current_turn': {'user': current_turn.user.username,
+                                 'dice': [current_turn.dices1,
+                                          current_turn.dices2]},
+                'winner': winner.username if winner is not None else None,
+                'players': self.get_players(load)}
 
-    def get_players(self, pk):
+    def get_state_players(self, state):
         """
-        A method to obtain the list of serialized players
+        A method to obtain the list of serialized players of a GameState,
+        in the same order and format as get_players.
+        Args:
+        state: the state of a game played in memory.
         """
-        players = Player.objects.filter(game=pk)
         serialized_players = []
-        for player in players:
-            partial_serialized_player = PlayerSerializer(player)
-            data = partial_serialized_player.data
-            last_gained = self.get_last_gained(player)
-            settlements = self.get_settlements(player)
-            cities = self.get_cities(player)
-            roads = self.get_roads(player)
-            resource_card = self.get_resource_card(player, pk)
-            development_card = self.get_development_card(player, pk)
-            data['resources_cards'] = resource_card
-            data['development_cards'] = development_card
-            data['roads'] = roads
-            data['last_gained'] = last_gained
-            data['settlements'] = settlements
-            data['cities'] = cities
+        for player in sorted(state.players, key=lambda player: player.id):
+            hand = [(name, amount, player.last_gained.get(name, 0))
+                    for name, amount in player.hand.items()]
+            data = {'username': player.username,
+                    'colour': player.colour,
+                    'victory_points': player.victory_points}
+            data['resources_cards'] = self.get_resource_card(hand)
+            data['development_cards'] = len(player.cards)
+            data['roads'] = [[{'level': level, 'index': index}
+                              for level, index in edge_positions(eid)]
+                             for eid in iter_bits(player.roads)]
+            data['last_gained'] = self.get_last_gained(hand)
+            data['settlements'] = []
+            data['cities'] = []
+            for vid in player.buildings:
+                level, index = vertex_position(vid)
+                name = 'cities' if player.cities & (1 << vid) else \
+                    'settlements'
+                data[name].append({'level': level, 'index': index})
             serialized_players.append(data)
         return serialized_players
 
+    def get_state_data(self, state):
+        """
+        A method to obtain the information of a game played in memory,
+        in the same format as get_game_data.
+        Args:
+        state: the state of the game, locked by the caller.
+        """
+        level, index = state.robber
+        in_turn = state.player_in_turn()
+        winner = state.get_player_by_user(state.winner_id)
+        return {'robber': {'level': level, 'index': index},
+                'current_turn': {'user': in_turn.username,
+                                 'dice': list(state.turn.dices)},
+                'winner': winner.username if winner is not None else None,
+                'players': self.get_state_players(state)}
+
+    @method_decorator(condition(etag_func=active_etag))
     def get(self, request, pk):
-        game = get_object_or_404(Game, pk=pk)
-        # Get the game serializer...
-        serialized_game = GameSerializer(game)
-        data = serialized_game.data
-        # Change data presentation of a dices
-        data['robber'].pop('terrain')
-        data['robber'].pop('token')
-        dices1 = data['current_turn'].pop('dices1')
-        dices2 = data['current_turn'].pop('dices2')
-        data['current_turn']['dice'] = [dices1, dices2]
-        # Add players...
-        serialized_players = self.get_players(pk=pk)
-        data['players'] = serialized_players
+        active = get_active_game(pk)
+        if active is not None:
+            with active.lock:
+                return Response(self.get_state_data(active.state))
+        game = get_object_or_404(self.queryset, pk=pk)
+        if game.archived:
+            return Response(self.get_state_data(rebuild_state(game)))
+        data = self.get_game_data(game, GameLoad(game))
         return Response(data)
 
 
 class GameList(APIView):
+    def get_games(self, request):
+        """
+        A method to get the games of the filters of the request:
+        finished (true or false) and mine (the games of the user).
+        """
+        games = Game.objects.select_related('current_turn__user')
+        finished = request.query_params.get('finished')
+        if finished is not None:
+            games = games.filter(winner__isnull=not get_flag(request,
+                                                             'finished'))
+        if get_flag(request, 'mine'):
+            games = games.filter(id__in=Player.objects.filter(
+                        username=request.user).values('game'))
+        return games
+
     def get(self, request, format=None):
-        games = Game.objects.all()
-        games_serializers = GameListSerializer(games, many=True)
-        data = []
-        for serialized_game in games_serializers.data:
-            game_data = serialized_game
-            game_id = game_data['id']
-            current_turn = Current_Turn.objects.filter(game=game_id)[0]
-            game_data['in_turn'] = current_turn.user.username
-            data.append(game_data)
-        return Response(data)
+        games, next_url = get_page(request, self.get_games(request))
+        data = [{'id': game.id, 'name': game.name,
+                 'in_turn': game.current_turn.user.username}
+                for game in games]
+        return page_response(data, next_url)
@@ -0,0 +1,63 @@
+"""
+Keyset pagination of the lists of the api: a page has the items with
+an id greater than `after` (at most `limit` of them, LIST_PAGE_SIZE by
+default), so the cost of a page doesn't depend on its position. The
+body of the response is still the list of items and the url of the
+next page, if there is one, is in the Link header.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+
+
+def get_int_param(request, name, default, minimum, maximum=None):
+    """
+    A method to get a positive integer from the query string.
+    Raise ParseError (400) if it's not valid.
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ParseError('Invalid %s' % name)
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ParseError('Invalid %s' % name)
+    return value
+
+
+def get_flag(request, name):
+    """
+    A method to check if a filter of the query string is on.
+    """
+    return request.query_params.get(name, '').lower() in ('1', 'true')
+
+
+def get_page(request, queryset):
+    """
+    A method to get a page of a queryset ordered by id.
+    Return the items of the page and the url of the next one (or None).
+    """
+    after = get_int_param(request, 'after', 0, 0)
+    limit = get_int_param(request, 'limit', settings.LIST_PAGE_SIZE, 1,
+                          settings.LIST_MAX_PAGE_SIZE)
+    items = list(queryset.filter(id__gt=after).order_by('id')[:limit + 1])
+    next_url = None
+    if len(items) > limit:
+        items = items[:limit]
+        params = request.query_params.copy()
+        params['after'] = items[-1].id
+        next_url = request.build_absolute_uri(
+            '%s?%s' % (request.path, params.urlencode()))
+    return (items, next_url)
+
+
+def page_response(data, next_url):
+    """
+    A method to get the response of a page (see get_page).
+    """
+    response = Response(data)
+    if next_url is not None:
+        response['Link'] = '<%s>; rel="next"' % next_url
+    return response
@@ -1,246 +1,374 @@
 from rest_framework.views import APIView
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from catan.serializers import *
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from catan.models import *
 from rest_framework.permissions import AllowAny
 from random import shuffle
-from catan.views.actions.road import build_road, play_road_building_card
-from catan.views.actions.buy_card import buy_card
-from catan.views.actions.bank import bank_trade
-from catan.views.actions.monopoly import play_monopoly_card
-from catan.views.actions.build import build_settlement, upgrade_city
-from catan.views.actions.move_robber import move_robber
-from catan.views.actions.plenty_year import play_year_of_plenty
-from catan.views.actions.change_turn import change_turn
+from collections import OrderedDict
+from threading import Lock
+from catan.views.game_views import get_active_game, active_etag
+from catan.locks import GAME_LOCKS
+from catan.events import publish_event, publish_change
+from catan.engine import (legal_actions, apply_action, has_won,
+                          action_events, RuleError)
+from catan.engine.persistence import (load_game, save_game, rebuild_state,
+                                      next_action_number, log_action)
+from catan.engine.write_behind import ACTIVE_GAMES, VersionConflict
 
 
 class PlayerInfo(APIView):
-    def get(self, request, pk):
+    def get_hand_data(self, hand, cards):
+        """
+        A method to get the resources and the development cards
+        of a player.
+        Args:
+        hand: a list of (name, amount) of the resources of the player.
+        cards: a list with the names of the cards of the player.
+        """
         resource_list = []
-        card_list = []
-        game = get_object_or_404(Game, pk=pk)
+        for name, amount in hand:
+            resource_list.extend([name] * amount)
+        return {'resources': resource_list,
+                'cards': list(cards)}
+
+    def get_active_data(self, active, user):
+        """
+        A method to get the hand of a player of a game played in memory.
+        """
+        with active.lock:
+            return self.get_state_hand(active.state, user)
+
+    def get_state_hand(self, state, user):
+        """
+        A method to get the hand of a player from the state of a game,
+        locked by the caller.
+        """
+        player = state.get_player_by_user(user.id)
+        if player is None:
+            raise Http404
+        hand = [(name, amount) for name, amount in player.hand.items()
+                if amount > 0]
+        return self.get_hand_data(hand, player.cards)
+
+    @method_decorator(condition(etag_func=active_etag))
+    def get(self, request, pk):
         user = self.request.user
+        active = get_active_game(pk)
+        if active is not None:
+            return Response(self.get_active_data(active, user))
+        game = get_object_or_404(Game, pk=pk)
+        if game.archived:
+            return Response(self.get_state_hand(rebuild_state(game), user))
         player = Player.objects.filter(username=user, game=pk).get().id
-        queryset_card = Card.objects.filter(Q(owner=player) &
-                                            (Q(name='knight') |
-                                            Q(name='monopoly') |
-                                            Q(name='year_of_plenty') |
-                                            Q(name='road_building') |
-                                            Q(name='victory_point')))
-        queryset_resource = Resource.objects.filter(Q(owner=player) &
-                                                    (Q(name='ore') |
-                                                     Q(name='brick') |
-                                                     Q(name='lumber') |
-                                                     Q(name='grain') |
-                                                     Q(name='wool')))
-        serializer_card = CardSerializer(queryset_card, many=True)
-        serializer_resource = ResourceSerializer(queryset_resource, many=True)
-        for resource in serializer_resource.data:
-            resource_list.append(resource['name'])
-        for card in serializer_card.data:
-            card_list.append(card['name'])
-        data = {'resources': resource_list,
-                'cards': card_list}
+        queryset_card = Card.objects.filter(owner=player)
+        queryset_hand = Hand.objects.filter(owner=player, amount__gt=0)
+        data = self.get_hand_data(queryset_hand.values_list('name', 'amount'),
+                                  queryset_card.values_list('name',
+                                                            flat=True))
         return Response(data)
 
 
+class LegalActionsCache(object):
+    """
+    The actions of the player in turn of the last games, by game.
+    Each game keeps only the actions of its last version: any change of
+    the game increases its version, so the old actions are never used
+    again. When there are too many games the least recently used one
+    is removed.
+    """
+    def __init__(self, max_games=1000):
+        self.max_games = max_games
+        self.lock = Lock()
+        self.games = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, game_id, version, user_id):
+        """
+        A method to get the cached actions, or None if they aren't
+        cached for this version of the game.
+        """
+        with self.lock:
+            entry = self.games.get(game_id)
+            if entry is None or entry[0] != (version, user_id):
+                self.misses += 1
+                return None
+            self.games.move_to_end(game_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, game_id, version, user_id, actions):
+        with self.lock:
+            self.games[game_id] = ((version, user_id), actions)
+            self.games.move_to_end(game_id)
+            while len(self.games) > self.max_games:
+                self.games.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.games.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'games': len(self.games)}
+
+
+LEGAL_ACTIONS = LegalActionsCache()
+
+
 class PlayerActions(APIView):
 
-    def to_json_positions(self, list_positions):
-        data = []
-        for position in list_positions:
-            data.append({'level': position[0],
-                         'index': position[1]})
+    @method_decorator(condition(etag_func=active_etag))
+    def get(self, request, pk):
+        user = request.user
+        active = get_active_game(pk)
+        if active is not None:
+            return Response(self.get_active_actions(active, user),
+                            status=status.HTTP_200_OK)
+        turn = Game.objects.filter(pk=pk).values_list(
+                    'version', 'current_turn__user').first()
+        if turn is None:
+            raise Http404
+        version, user_in_turn = turn
+        # The players that are not in turn can't do anything, so the
+        # rules aren't checked
+        if user_in_turn != user.id:
+            if not Player.objects.filter(username=user, game=pk).exists():
+                raise Http404
+            return Response([], status=status.HTTP_200_OK)
+        data = LEGAL_ACTIONS.get(pk, version, user.id)
+        if data is None:
+            try:
+                state = load_game(pk)
+            except Game.DoesNotExist:
+                raise Http404
+            player = state.get_player_by_user(user.id)
+            if player is None:
+                raise Http404
+            data = legal_actions(state, player)
+            LEGAL_ACTIONS.set(pk, version, user.id, data)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def get_active_actions(self, active, user):
+        """
+        A method to get the actions of a player of a game played in
+        memory, from the cache if they were already computed.
+        """
+        with active.lock:
+            return self.get_state_actions(active.state, user)
+
+    def get_state_actions(self, state, user):
+        """
+        A method to get the actions of a player from the state of a game,
+        locked by the caller, from the cache if they were already
+        computed.
+        """
+        player = state.get_player_by_user(user.id)
+        if player is None:
+            raise Http404
+        if not state.is_in_turn(player):
+            return []
+        data = LEGAL_ACTIONS.get(state.id, state.version, user.id)
+        if data is None:
+            data = legal_actions(state, player)
+            LEGAL_ACTIONS.set(state.id, state.version, user.id, data)
         return data
 
-    def get_roads(self, posibles_roads, item):
+    def get_cached_actions(self, load, player):
         """
-        A function to get the payload in a given item with the positions
-        available to build roads.
+        A method to get the actions of a player of a loaded game, from
+        the cache if they were already computed for its version.
         Args:
-        @posibles_roads = a list of [vertex_position, vertex_position]
-        that represent the posibles roads to build.
-        @item = a given item to push in the data
-        """
-        for road in posibles_roads:
-            item['payload'].append(self.to_json_positions(road))
-        return item
-
-    def posible_robber_positions(self, game):
-        """
-        A function that obtains the possible positions
-        where the thief can move and for each of them, the players to steal.
-        """
-        hexes_positions_robber = generateHexesPositions()
-        actual_robber = [game.robber.level, game.robber.index]
-        hexes_positions_robber.remove(actual_robber)
-        data = []
-        for hexe in hexes_positions_robber:
-            item = {'position': {
-                                    'level': hexe[0],
-                                    'index': hexe[1]
-                                }
-                    }
-            neighbors = HexagonInfo(hexe[0], hexe[1])
-            item['players'] = []
-            for neighbor in neighbors:
-                try:
-                    building = Building.objects.get(level=neighbor[0],
-                                                    index=neighbor[1],
-                                                    game=game)
-                    new_user = building.owner.username.username
-                    if new_user not in item['players'] and \
-                            new_user != game.current_turn.user.username:
-                        item['players'].append(new_user)
-                except Building.DoesNotExist:
-                    pass
-            data.append(item)
+        @load: a GameLoad of a started game.
+        @player: a player of the game.
+        """
+        game = load.game
+        if game.current_turn.user_id != player.username_id:
+            return []
+        data = LEGAL_ACTIONS.get(game.id, game.version, player.username_id)
+        if data is None:
+            data = self.get_actions(load, player)
+            LEGAL_ACTIONS.set(game.id, game.version, player.username_id,
+                              data)
         return data
 
-    def get(self, request, pk):
-        game = get_object_or_404(Game, pk=pk)
-        user = request.user
-        player = get_object_or_404(Player, username=user, game=game)
-        turn = Current_Turn.objects.get(game=game)
-        data = []
-        if not game.check_player_in_turn(player):
-            return Response(data, status=status.HTTP_200_OK)
-        game_stage = game.current_turn.game_stage
-        last_action = game.current_turn.last_action
-        # Las acciones posibles cambian si estan en la fase de construccion
-        # Si un jugador esta al comienzo de su fase, se le muestran las
-        # opciones para construir un poblado, luego las para construir
-        # una carretera luego debe terminar el turno no puede hacer nada mas...
-        if game_stage != 'FULL_PLAY':
-            if last_action == 'NON_BLOCKING_ACTION':
-                item = {"type": 'build_settlement'}
-                posibles_settlements = game.posibles_initial_settlements()
-                item['payload'] = self.to_json_positions(posibles_settlements)
-                data.append(item)
-            if last_action == 'BUILD_SETTLEMENT':
-                item = {"type": 'build_road'}
-                posibles_roads = player.posibles_initial_roads()
-                item['payload'] = []
-                for road in posibles_roads:
-                    item['payload'].append(self.to_json_positions(road))
-                data.append(item)
-            if last_action == 'BUILD_ROAD':
-                item = {"type": 'end_turn'}
-                data.append(item)
-            return Response(data, status=status.HTTP_200_OK)
-        else:
-            if game.get_sum_dices() == 7 and not game.robber_has_been_moved():
-                item = {"type": 'move_robber'}
-                posibles_robber = self.posible_robber_positions(game)
-                item["payload"] = posibles_robber
-                data.append(item)
-                return Response(data, status=status.HTTP_200_OK)
-            else:
-                item = {"type": 'end_turn'}
-                data.append(item)
-                if player.has_necessary_resources('build_road'):
-                    item = {"type": 'build_road'}
-                    posibles_roads = player.posible_roads()
-                    item['payload'] = []
-                    for road in posibles_roads:
-                        item['payload'].append(self.to_json_positions(road))
-                    if len(item['payload']) != 0:
-                        data.append(item)
-                if player.can_trade_bank():
-                    item = {"type": 'bank_trade'}
-                    data.append(item)
-                if player.has_necessary_resources('buy_card'):
-                    item = {"type": 'buy_card'}
-                    data.append(item)
-                if player.has_necessary_resources('build_settlement'):
-                    item = {"type": 'build_settlement'}
-                    posibles_settlements = player.posibles_settlements()
-                    item['payload'] = self.to_json_positions(
-                                        posibles_settlements)
-                    if len(item['payload']) != 0:
-                        data.append(item)
-                if player.has_necessary_resources('upgrade_city'):
-                    if player.has_settlements():
-                        item = {"type": 'upgrade_city'}
-                        posibles_cities = player.posibles_upgrades()
-                        item['payload'] = self.to_json_positions(
-                                           posibles_cities)
-                        if len(item['payload']) != 0:
-                            data.append(item)
-                if player.has_card('knight'):
-                    item = {"type": 'play_knight_card'}
-                    posibles_robber = self.posible_robber_positions(game)
-                    item["payload"] = posibles_robber
-                    data.append(item)
-                if player.has_card('monopoly'):
-                    item = {"type": 'play_monopoly_card'}
-                    data.append(item)
-                if player.has_card('year_of_plenty'):
-                    item = {"type": 'play_year_of_plenty_card'}
-                    data.append(item)
-                if player.has_card('road_building'):
-                    item = {"type": 'play_road_building_card'}
-                    posibles_roads = player.posibles_roads_card_road_building()
-                    item['payload'] = []
-                    item = self.get_roads(posibles_roads, item)
-                    if len(item['payload']) != 0:
-                        data.append(item)
-                return Response(data, status=status.HTTP_200_OK)
+    def get_actions(self, load, player):
+        """
+        A method to get the list of actions that a player can do
+        in a game (see :func: `catan.engine.legal_actions`).
+        The state of the game is made from the pieces already loaded.
+        Args:
+        @load: a GameLoad of a started game.
+        @player: a player of the game.
+        """
+        state = load.get_state()
+        return legal_actions(state, state.get_player(player.id))
 
     def post(self, request, pk):
-        data = request.data
-        game = get_object_or_404(Game, pk=pk)
-        user = request.user
-        player = get_object_or_404(Player, username=user, game=game)
-        game_stage = game.current_turn.game_stage
+        expected_version = request.data.get('expected_version')
+        if expected_version is not None:
+            try:
+                expected_version = int(expected_version)
+            except (TypeError, ValueError):
+                response = {"detail": "Invalid expected_version"}
+                return Response(response, status=status.HTTP_400_BAD_REQUEST)
+        if settings.WRITE_BEHIND:
+            return self.do_active_action(request.data, pk, request.user,
+                                         expected_version)
+        if expected_version is not None:
+            return self.do_versioned_action(request.data, pk, request.user,
+                                            expected_version)
+        # The actions of a game are done one at a time, each one in a
+        # transaction that is rolled back if the action fails
+        with GAME_LOCKS.hold(pk), transaction.atomic():
+            game = get_object_or_404(Game.objects.select_for_update(), pk=pk)
+            response = self.do_locked_action(request.data, game,
+                                             request.user)
+            if not status.is_success(response.status_code):
+                transaction.set_rollback(True)
+        return response
+
+    def archived_game(self):
+        """
+        A method to get the response to an action of an archived game:
+        the rows of its pieces were removed, so it can't be played.
+        """
+        response = {"detail": "The game is archived"}
+        return Response(response, status=status.HTTP_403_FORBIDDEN)
+
+    def version_conflict(self, version):
+        """
+        A method to get the response to an action sent for a version of
+        the game that is not the last one.
+        """
+        response = {"detail": "The game has changed", "version": version}
+        return Response(response, status=status.HTTP_409_CONFLICT)
+
+    def do_versioned_action(self, data, pk, user, expected_version):
+        """
+        A method to do the action of a user only if the game is in the
+        version that the user expects, without locking the game.
+        The version is increased with a conditional update before the
+        rules are checked: only one action of each version is done, and
+        the others get 409 Conflict with the last version.
+        Args:
+        @data: the type and the payload of the action.
+        @pk: the id of the game.
+        @user: the user that does the action.
+        @expected_version: the version of the game seen by the user.
+        """
+        with transaction.atomic():
+            claimed = Game.objects.filter(
+                pk=pk, version=expected_version).update(
+                version=F('version') + 1)
+            if not claimed:
+                version = Game.objects.filter(pk=pk).values_list(
+                            'version', flat=True).first()
+                if version is None:
+                    raise Http404
+                return self.version_conflict(version)
+            game = Game.objects.get(pk=pk)
+            response = self.do_locked_action(data, game, user,
+                                             bump_version=False)
+            if not status.is_success(response.status_code):
+                transaction.set_rollback(True)
+        return response
+
+    def do_locked_action(self, data, game, user, bump_version=True):
+        """
+        A method to do the action of a user in a locked game with the
+        engine, to save the changes of the game and to log the action.
+        Args:
+        @data: the type and the payload of the action.
+        @game: a started game, locked for the action.
+        @user: the user that does the action.
+        @bump_version: if False, the version of the game was already
+                       increased for the action.
+        """
+        if game.archived:
+            return self.archived_game()
+        state = load_game(game.id)
+        player = state.get_player_by_user(user.id)
+        if player is None:
+            raise Http404
         # Check if the player is on his turn
-        if not game.check_player_in_turn(player):
+        if not state.is_in_turn(player):
             response = {"detail": "Not in turn"}
             return Response(response, status=status.HTTP_403_FORBIDDEN)
-        if data['type'] == 'end_turn':
-            if game.get_sum_dices() == 7 and not game.robber_has_been_moved():
-                response = {"detail": "You have to move the thief"}
-                return Response(response, status=status.HTTP_403_FORBIDDEN)
-            response = change_turn(game)
-            # Only throw the dices if I am in full play...
-            if game_stage == 'FULL_PLAY':
-                game.throw_dices()
-            return response
-        if data['type'] == 'build_settlement':
-            response = build_settlement(data['payload'], game, player)
-            return response
-        if data['type'] == 'upgrade_city':
-            response = upgrade_city(data['payload'], game, player)
-            return response
-        if data['type'] == 'build_road':
-            response = build_road(data['payload'], game, player)
-            return response
-        if data['type'] == 'buy_card':
-            response = buy_card(game, player)
-            return response
-        if data['type'] == 'bank_trade':
-            response = bank_trade(data['payload'], game, player)
-            return response
-        if data['type'] == 'move_robber':
-            response = move_robber(data['payload'], game,
-                                   user, player)
-            return response
-        if data['type'] == 'play_knight_card':
-            response = move_robber(data['payload'], game,
-                                   user, player, knight=True)
-            return response
-        if data['type'] == 'play_road_building_card':
-            response = play_road_building_card(data['payload'], game, player)
-            return response
-        if data['type'] == 'play_monopoly_card':
-            response = play_monopoly_card(data['payload'], game, player)
-            return response
-        if data['type'] == 'play_year_of_plenty_card':
-            response = play_year_of_plenty(data['payload'], game, player)
-            return response
-        response = {"detail": 'Please select a valid action'}
-        return Response(response, status=status.HTTP_403_FORBIDDEN)
+        number = next_action_number(state)
+        stage = state.turn.game_stage
+        outcomes = {}
+        try:
+            result = apply_action(state, player, data, outcomes=outcomes)
+        except RuleError as error:
+            response = {"detail": error.detail}
+            return Response(response, status=status.HTTP_403_FORBIDDEN)
+        save_game(state)
+        # The state of the game changed, so the clients must reload it
+        if bump_version:
+            game.bump_version()
+        log_action(state, user.id, data, outcomes, number)
+        for event_type, event_data in action_events(state, player, data,
+                                                    stage, result):
+            publish_event(game.id, event_type, **event_data)
+        publish_change(game.id)
+        return self.action_response(state, player, data, result)
+
+    def do_active_action(self, data, pk, user, expected_version=None):
+        """
+        A method to do the action of a player in turn in the state of
+        the game in memory, that is written later (see
+        :mod: `catan.engine.write_behind`).
+        Args:
+        @data: the type and the payload of the action.
+        @pk: the id of the game.
+        @user: the user of the player.
+        @expected_version: optional, the version of the game seen by the
+                           user (see do_versioned_action).
+        """
+        if ACTIVE_GAMES.peek(pk) is None and \
+                Game.objects.filter(pk=pk, archived=True).exists():
+            return self.archived_game()
+        try:
+            active = ACTIVE_GAMES.get(pk)
+        except Game.DoesNotExist:
+            raise Http404
+        if active.state.get_player_by_user(user.id) is None:
+            raise Http404
+        try:
+            active, result = ACTIVE_GAMES.do_action(
+                pk, user.id, data, expected_version=expected_version)
+        except VersionConflict as conflict:
+            return self.version_conflict(conflict.version)
+        except RuleError as error:
+            response = {"detail": error.detail}
+            return Response(response, status=status.HTTP_403_FORBIDDEN)
+        state = active.state
+        return self.action_response(state, state.get_player_by_user(user.id),
+                                    data, result)
+
+    def action_response(self, state, player, data, result):
+        """
+        A method to get the response to an action done with the engine.
+        Args:
+        @data: the type and the payload of the action.
+        @result: the result of the rule (see apply_action).
+        """
+        if has_won(state, player, data, result):
+            response = {"detail": "YOU WIN!!!"}
+            return Response(response, status=status.HTTP_200_OK)
+        if data['type'] in ('end_turn', 'move_robber', 'play_knight_card'):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_200_OK)
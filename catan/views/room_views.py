@@ -5,14 +5,33 @@ from django.http import Http404
 from random import random
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db.models import Count, F
 from catan.models import *
+from catan.views.pagination import get_page, get_flag, page_response
 
 
 class RoomList(APIView):
+    def get_rooms(self, request):
+        """
+        A method to get the rooms of the filters of the request:
+        open (the rooms that a player can join) and mine (the rooms of
+        the user).
+        """
+        rooms = Room.objects.select_related('owner').prefetch_related(
+                    'players')
+        if get_flag(request, 'open'):
+            rooms = rooms.filter(game_has_started=False).annotate(
+                        players_count=Count('players')).filter(
+                        players_count__lt=F('max_players'))
+        if get_flag(request, 'mine'):
+            rooms = rooms.filter(id__in=Room.players.through.objects.filter(
+                        user=request.user).values('room'))
+        return rooms
+
     def get(self, request, format=None):
-        rooms = Room.objects.all()
+        rooms, next_url = get_page(request, self.get_rooms(request))
         serializer = RoomSerializer(rooms, many=True)
-        return Response(serializer.data)
+        return page_response(serializer.data, next_url)
 
     def post(self, request, *args, **kwargs):
         data = request.data
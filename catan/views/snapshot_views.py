@@ -0,0 +1,98 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from catan.models import Game
+from catan.views.game_views import (GameInfo, GameLoad, get_active_game,
+                                    active_etag)
+from catan.views.board_views import BOARD_CACHE
+from catan.engine.persistence import rebuild_state
+from catan.views.players_views import PlayerInfo, PlayerActions
+
+
+class GameSnapshot(APIView):
+    """
+    The actions, board, hand and game information that the client polls,
+    in one response. The game and its players are loaded only one time
+    and shared by all the parts of the snapshot, the legal actions too.
+    The board never changes, so the clients that already have it (see
+    BoardInfo) ask the snapshot without it with ?board=false.
+    A game played in memory (see get_active_game) is read from its
+    state, so the player sees his actions before they are written.
+    """
+    def get_hand(self, load, player):
+        """
+        A method to get the hand of a player from a GameLoad
+        Args:
+        load: a GameLoad of the game.
+        player: a player of the game.
+        """
+        hand = [(name, amount)
+                for name, amount, last_gained in load.hands.get(player.id, [])
+                if amount > 0]
+        cards = load.cards.get(player.id, [])
+        return PlayerInfo().get_hand_data(hand, cards)
+
+    def get_state_data(self, state, user):
+        """
+        A method to get the snapshot of a GameState, without the board,
+        and the id of its board.
+        Args:
+        state: the state of the game, locked by the caller if it's
+               played in memory.
+        user: the user of a player of the game.
+        """
+        return ({'actions': PlayerActions().get_state_actions(state, user),
+                 'hand': PlayerInfo().get_state_hand(state, user),
+                 'game': GameInfo().get_state_data(state),
+                 'version': state.version}, state.board_id)
+
+    def get_active_data(self, active, user):
+        """
+        A method to get the snapshot of a game played in memory (see
+        get_state_data).
+        Args:
+        active: the ActiveGame of the game.
+        user: the user of a player of the game.
+        """
+        with active.lock:
+            return self.get_state_data(active.state, user)
+
+    def get_data(self, pk, user):
+        """
+        A method to get the snapshot of a game from the database, without
+        the board, and the id of its board. The rows of the pieces of an
+        archived game were removed, so it's rebuilt from its action log.
+        Args:
+        pk: the id of the game.
+        user: the user of a player of the game.
+        """
+        games = Game.objects.select_related('robber', 'winner',
+                                            'current_turn',
+                                            'current_turn__user')
+        game = get_object_or_404(games, pk=pk)
+        if game.archived:
+            return self.get_state_data(rebuild_state(game), user)
+        load = GameLoad(game)
+        player = load.get_player(user)
+        if player is None:
+            raise Http404
+        return ({'actions': PlayerActions().get_cached_actions(load,
+                                                               player),
+                 'hand': self.get_hand(load, player),
+                 'game': GameInfo().get_game_data(game, load),
+                 'version': game.version}, game.board_id)
+
+    @method_decorator(condition(etag_func=active_etag))
+    def get(self, request, pk):
+        active = get_active_game(pk)
+        if active is not None:
+            data, board_id = self.get_active_data(active, request.user)
+        else:
+            data, board_id = self.get_data(pk, request.user)
+        board = request.query_params.get('board', '').lower()
+        if board not in ('0', 'false'):
+            data['board'] = BOARD_CACHE.get(board_id)[1]
+        return Response(data)
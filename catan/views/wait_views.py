@@ -0,0 +1,200 @@
+import asyncio
+import re
+from urllib.parse import parse_qs, urlencode
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from catan.models import Game
+from catan.events import HUB
+from catan.views.game_views import get_active_game
+
+
+WAIT_PATH = re.compile(r'^/games/(?P<pk>\d+)/wait/$')
+
+
+def get_game_version(pk):
+    """
+    A method to get the version of a game, or None if the game doesn't
+    exist. A game played in memory (see get_active_game) has the version
+    of its state, without queries.
+    Args:
+    pk: the id of the game.
+    """
+    active = get_active_game(pk)
+    if active is not None:
+        return active.state.version
+    return Game.objects.filter(pk=pk).values_list('version',
+                                                  flat=True).first()
+
+
+def is_valid_token(raw_token):
+    """
+    A method to check (without queries) if a raw access token is valid.
+    Args:
+    raw_token: the token (bytes).
+    """
+    try:
+        JWTAuthentication().get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return False
+    return True
+
+
+def is_authenticated(scope):
+    """
+    A method to check (without queries) if the request has a valid token.
+    Args:
+    scope: the ASGI scope of the request.
+    """
+    header = dict(scope['headers']).get(b'authorization')
+    if header is None:
+        return False
+    raw_token = JWTAuthentication().get_raw_token(header)
+    if raw_token is None:
+        return False
+    return is_valid_token(raw_token)
+
+
+async def read_body(receive):
+    """
+    A method to read the body of a request, or None if the client
+    is gone.
+    Args:
+    receive: the ASGI receive function of the request.
+    """
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+def get_wait_params(query_string):
+    """
+    A method to get the version known by the client and the time to
+    wait (never more than LONG_POLL_TIMEOUT) from the query string.
+    Args:
+    query_string: the query string of the request (bytes).
+    """
+    params = parse_qs(query_string.decode('latin-1'))
+    try:
+        version = int(params['version'][0])
+    except (KeyError, ValueError):
+        version = None
+    try:
+        timeout = float(params['timeout'][0])
+    except (KeyError, ValueError):
+        timeout = settings.LONG_POLL_TIMEOUT
+    timeout = max(0, min(timeout, settings.LONG_POLL_TIMEOUT))
+    return (version, timeout)
+
+
+class WaitGameChange(object):
+    """
+    An ASGI middleware for the long polling of the games.
+    GET /games/<id>/wait/?version=<n>&timeout=<seconds> waits until the
+    version of the game is not <n>, and then answers with the snapshot
+    of the game. If the time is over, it answers 304 Not Modified.
+    The wait is a coroutine that holds no worker: it's woken by the
+    changes of the game (see :func: `catan.events.publish_change`), and
+    the version is checked again every LONG_POLL_RECHECK seconds in case
+    the change was made by other process. Only one query is made in
+    each check (none for a game played in memory).
+    The answers are made by the Django application (the snapshot view),
+    so the authentication, the permissions and the CORS headers are
+    the same as the other views.
+    The other requests go to the Django application.
+    """
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = None
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = WAIT_PATH.match(scope['path'])
+        if match is None:
+            return await self.application(scope, receive, send)
+        pk = int(match.group('pk'))
+        body = await read_body(receive)
+        if body is None:
+            # The client is gone
+            return
+        changed = True
+        if is_authenticated(scope):
+            changed = await self.wait_change(pk, scope['query_string'],
+                                             receive)
+        if changed is None:
+            return
+        await self.application(self.get_snapshot_scope(scope, pk, changed),
+                               self.replay_body(body, receive), send)
+
+    def replay_body(self, body, receive):
+        """
+        A method to give the body, that is already read, to the
+        Django application.
+        """
+        messages = [{'type': 'http.request', 'body': body,
+                     'more_body': False}]
+
+        async def replay():
+            if len(messages) != 0:
+                return messages.pop()
+            return await receive()
+        return replay
+
+    async def wait_change(self, pk, query_string, receive):
+        """
+        A method to wait the change of the version of a game.
+        Return True if the game changed (or doesn't exist), False if
+        the time is over and None if the client is gone.
+        """
+        version, timeout = get_wait_params(query_string)
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+        watcher = HUB.watch(pk)
+        disconnect = asyncio.ensure_future(receive())
+        try:
+            while True:
+                actual_version = await sync_to_async(
+                    get_game_version, thread_sensitive=False)(pk)
+                if actual_version is None or actual_version != version:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                change = asyncio.ensure_future(watcher.wait(
+                    min(settings.LONG_POLL_RECHECK, remaining)))
+                done, pending = await asyncio.wait(
+                    [disconnect, change],
+                    return_when=asyncio.FIRST_COMPLETED)
+                if disconnect in done:
+                    change.cancel()
+                    return None
+        finally:
+            disconnect.cancel()
+            HUB.unwatch(watcher)
+
+    def get_snapshot_scope(self, scope, pk, changed):
+        """
+        A method to get the scope of the request of the snapshot.
+        If the game didn't change, the request is conditional (any
+        version matches), so the answer is 304 Not Modified.
+        Only the board parameter is given to the snapshot, so the
+        clients that have the board don't receive it again.
+        """
+        path = '/games/%s/snapshot/' % pk
+        headers = [(name, value) for name, value in scope['headers']
+                   if name != b'if-none-match']
+        if not changed:
+            headers.append((b'if-none-match', b'*'))
+        params = parse_qs(scope['query_string'].decode('latin-1'))
+        query_string = urlencode({'board': params['board'][0]}
+                                 if 'board' in params else {})
+        return dict(scope, path=path, raw_path=path.encode('latin-1'),
+                    query_string=query_string.encode('latin-1'),
+                    headers=headers)
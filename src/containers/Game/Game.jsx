@@ -10,8 +10,7 @@ import {
 } from './Game.ducks';
 import Error from '../../components/Error';
 import GameScreen from '../../components/Game/Game';
-import { getGameStatus } from '../../utils/Api';
-import useInterval from '../../utils/UseInterval';
+import { getGameStatus, waitGameStatus } from '../../utils/Api';
 
 
 const mapStateToProps = (state) => ({
@@ -44,8 +43,11 @@ export const Game = (props) => {
     getGameStatus(id, init, setError);
   }, [id, setError, setRunning, setState]);
 
-  // Fetch data from API every 5 seconds.
-  useInterval(() => { if (stage !== 'frozen') getGameStatus(id, setState, setError); }, 2000);
+  // Wait for the changes of the game while it is not frozen.
+  useEffect(() => {
+    if (stage === 'frozen') return undefined;
+    return waitGameStatus(id, setState, setError);
+  }, [id, stage, setError, setState]);
 
   if (stage === 'empty') return (<></>);
 
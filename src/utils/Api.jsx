@@ -1,5 +1,5 @@
 import {
-  getFromPlayers, getToken, path, request,
+  getFromPlayers, getToken, path, request, requestAll,
 } from './ApiUtils';
 
 
@@ -40,11 +40,19 @@ export const getBoards = (onSuccess, onFailure) => {
 
 /* Rooms */
 
+// The lobby has the rooms that the user can join and the rooms of the
+// user, with all the pages of both lists.
 export const getRooms = (onSuccess, onFailure) => {
   const url = `${path}/rooms/`;
   const options = { method: 'GET' };
 
-  request(url, options, onSuccess, onFailure);
+  requestAll(`${url}?open=true`, options, (open) => {
+    requestAll(`${url}?mine=true`, options, (mine) => {
+      const rooms = {};
+      [...open, ...mine].forEach((room) => { rooms[room.id] = room; });
+      onSuccess(Object.values(rooms));
+    }, onFailure);
+  }, onFailure);
 };
 
 export const createRoom = (name, id, onSuccess, onFailure) => {
@@ -88,57 +96,122 @@ export const joinRoom = (id, onSuccess, onFailure) => {
 
 /* Games */
 
-export const getGameStatus = (id, onSuccess, onFailure) => {
-  const endPoints = [
-    `${path}/games/${id}/player/actions/`,
-    `${path}/games/${id}/board/`,
-    `${path}/games/${id}/player/`,
-    `${path}/games/${id}/`,
-  ];
-
-  const options = {
-    method: 'GET',
-    headers: {
-      Authorization: `Bearer ${getToken()}`,
-      'Content-Type': 'application/json',
-    },
+// Split a game snapshot and the hexagons of its board into the parts
+// of the game state.
+const toGameState = (hexagons, { actions, hand, game: gameData }) => {
+  const {
+    settlements, cities, roads, players,
+  } = getFromPlayers(gameData.players);
+
+  const board = {
+    hexagons,
+    robber: gameData.robber,
+    settlements,
+    cities,
+    roads,
+  };
+  const info = {
+    players,
+    currentTurn: gameData.current_turn,
+    winner: gameData.winner,
   };
 
-  // Fetch data from all endpoints.
-  Promise.all(endPoints.map((e) => fetch(e, options)))
+  return [actions, board, hand, info];
+};
 
-  // Once resolved, get json content.
-    .then((rs) => Promise.all(
-      rs.map((r) => {
+const gameOptions = () => ({
+  method: 'GET',
+  headers: {
+    Authorization: `Bearer ${getToken()}`,
+    'Content-Type': 'application/json',
+  },
+});
+
+// The hexagons of the board of each game. A board never changes, so it
+// is fetched once per game and the snapshots are asked without it.
+const boards = {};
+
+const getGameBoard = (id) => {
+  if (!boards[id]) {
+    const url = `${path}/games/${id}/board/`;
+    boards[id] = fetch(url, gameOptions())
+      .then((r) => {
         if (r.ok) return r.json();
         throw Error(r.statusText);
-      }),
-    ))
-
-  // Return json content.
-    .then(([actions, { hexes: hexagons }, hand, gameData]) => {
-      const {
-        settlements, cities, roads, players,
-      } = getFromPlayers(gameData.players);
-
-      const board = {
-        hexagons,
-        robber: gameData.robber,
-        settlements,
-        cities,
-        roads,
-      };
-      const info = {
-        players,
-        currentTurn: gameData.current_turn,
-        winner: gameData.winner,
-      };
-
-      onSuccess(actions, board, hand, info);
-    })
+      })
+      .then(({ hexes }) => hexes)
+      .catch((error) => {
+        delete boards[id];
+        throw error;
+      });
+  }
+  return boards[id];
+};
+
+export const getGameStatus = (id, onSuccess, onFailure) => {
+  const url = `${path}/games/${id}/snapshot/?board=false`;
+
+  // Fetch actions, hand and game info in one request.
+  const snapshot = fetch(url, gameOptions())
+
+  // Once resolved, get json content.
+    .then((r) => {
+      if (r.ok) return r.json();
+      throw Error(r.statusText);
+    });
+
+  // Return json content with the board.
+  Promise.all([getGameBoard(id), snapshot])
+    .then(([hexagons, data]) => onSuccess(...toGameState(hexagons, data)))
     .catch(onFailure);
 };
 
+/*
+ * Wait for the changes of a game (long polling): each request returns
+ * when the game changes, or with 304 when the wait is over. After an
+ * error the request is sent again, waiting twice the time after each
+ * failure (never more than 30 seconds), and the failure is only given
+ * to onFailure when it happened 5 times in a row.
+ * Returns a function to stop waiting.
+ */
+export const waitGameStatus = (id, onSuccess, onFailure) => {
+  let version = -1;
+  let stopped = false;
+  let failures = 0;
+  let timer = null;
+
+  const wait = () => {
+    if (stopped) return;
+    const url = `${path}/games/${id}/wait/?version=${version}&board=false`;
+    fetch(url, { ...gameOptions(), cache: 'no-store' })
+      .then((r) => {
+        if (r.status === 304) return null;
+        if (r.ok) return r.json();
+        throw Error(r.statusText);
+      })
+      .then((data) => {
+        failures = 0;
+        if (!data || stopped) return null;
+        ({ version } = data);
+        return getGameBoard(id)
+          .then((hexagons) => onSuccess(...toGameState(hexagons, data)));
+      })
+      .then(wait)
+      .catch((error) => {
+        if (stopped) return;
+        failures += 1;
+        if (failures === 5) onFailure(error);
+        timer = setTimeout(wait, Math.min(500 * (2 ** failures), 30000));
+      });
+  };
+
+  wait();
+  return () => {
+    stopped = true;
+    clearTimeout(timer);
+  };
+};
+
 
 // Actions
 
@@ -5,7 +5,9 @@ export const path = process.env.REACT_APP_PATH || 'http://localhost:8000';
 
 export const getToken = () => JSON.parse(localStorage.getItem('token'));
 
-export const request = (url, opts, onSuccess, onFailure, emptyBody) => {
+export const request = (
+  url, opts, onSuccess, onFailure, emptyBody, readBody = (r) => r.json(),
+) => {
   const options = { ...opts };
 
   // Add headers.
@@ -24,12 +26,31 @@ export const request = (url, opts, onSuccess, onFailure, emptyBody) => {
 
       if (emptyBody) return new Promise((f) => f());
 
-      return r.json();
+      return readBody(r);
     })
     .then(onSuccess)
     .catch(onFailure);
 };
 
+// The url of the next page of a list, from the Link header.
+const nextPage = (response) => {
+  const link = response.headers.get('Link');
+  const match = link && link.match(/<([^>]*)>;\s*rel="next"/);
+  return match ? match[1] : null;
+};
+
+// Get all the pages of a list, following the Link header.
+export const requestAll = (url, opts, onSuccess, onFailure) => {
+  const items = [];
+  const next = (pageUrl) => request(pageUrl, opts, ([page, nextUrl]) => {
+    items.push(...page);
+    if (nextUrl) next(nextUrl);
+    else onSuccess(items);
+  }, onFailure, false, (r) => r.json().then((page) => [page, nextPage(r)]));
+
+  next(url);
+};
+
 export const getFromPlayers = (ps) => ({
   settlements: ps.map((player) => ({
     colour: colours[player.colour],